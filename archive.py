@@ -0,0 +1,136 @@
+#Download archive, remembers what was already downloaded so re-runs can skip it before any extraction
+#The log file is written in yt-dlp's own archive format ("extractor id" per line, append only) so it can
+#also be used with plain yt-dlp --download-archive. The dbm file next to it is only an index over that log,
+#it gives constant time lookups without reading the whole log on every start and can always be rebuilt from it.
+import dbm
+import os
+import threading
+
+DEFAULT_ARCHIVE_PATH = os.path.join(os.path.expanduser("~"), "Downloads", "yt-dlite", ".archive", "archive.txt")
+
+# Index key holding how many bytes of the log are already indexed
+_LOG_SIZE_KEY = b'__log_size__'
+
+# Build the archive id yt-dlp uses for an extracted info dict
+def make_archive_id(info):
+    extractor = info.get('extractor_key') or info.get('ie_key') or info.get('extractor')
+    if not extractor or not info.get('id'):
+        return None
+    return f"{extractor.lower()} {info['id']}"
+
+class DownloadArchive:
+    # Set-like object, yt-dlp accepts it directly as the 'download_archive' option and then checks
+    # membership before extracting a URL (and each playlist entry) and calls add() after a finished download
+    def __init__(self, path=DEFAULT_ARCHIVE_PATH):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.index_path = self.path + '.idx'
+        self.lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.index = self._open_index('c')
+        with self.lock:
+            self._sync_index()
+
+    def _open_index(self, flag):
+        try:
+            index = dbm.open(self.index_path, flag)
+        except dbm.error:
+            # Index is locked by another running instance, keep the lookups in memory instead
+            return {}
+        if dbm.whichdb(self.index_path) == 'dbm.dumb':
+            # dbm.dumb (the only one on Pythons without gdbm/ndbm, e.g. on Windows) takes no lock, a second
+            # instance writing the same index would corrupt it. The log is read into memory instead
+            index.close()
+            return {}
+        return index
+
+    # Replay log lines the index has not seen yet, covers first use, entries appended by other
+    # processes and archives written by yt-dlp itself. Caller must hold self.lock
+    def _sync_index(self):
+        log_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        indexed = int(self.index.get(_LOG_SIZE_KEY, b'0'))
+        if indexed == log_size:
+            return
+        if indexed > log_size:
+            # Log was truncated or replaced by hand, start the index over
+            if isinstance(self.index, dict):
+                self.index.clear()
+            else:
+                self.index.close()
+                self.index = self._open_index('n')
+            indexed = 0
+
+        with open(self.path, 'rb') as f:
+            f.seek(indexed)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Another process is still writing this line
+                archive_id = line.strip()
+                if archive_id:
+                    self.index[archive_id] = b'1'
+                indexed += len(line)
+        self.index[_LOG_SIZE_KEY] = str(indexed).encode()
+
+    def __contains__(self, archive_id):
+        with self.lock:
+            return archive_id.encode('utf-8') in self.index
+
+    def add(self, archive_id):
+        with self.lock:
+            self._sync_index()
+            key = archive_id.encode('utf-8')
+            if key in self.index:
+                return
+            with open(self.path, 'a+b') as f:
+                # A line cut off by a crash or a hand edit would run into this one, end it first
+                f.seek(0, os.SEEK_END)
+                terminated = f.tell() == 0
+                if not terminated:
+                    f.seek(-1, os.SEEK_END)
+                    terminated = f.read(1) == b'\n'
+                f.write(key + b'\n' if terminated else b'\n' + key + b'\n')
+                log_size = f.tell()
+            self.index[key] = b'1'
+            # The line ended here was never indexed, leave it to the next sync
+            if terminated:
+                self.index[_LOG_SIZE_KEY] = str(log_size).encode()
+
+    def close(self):
+        with self.lock:
+            if not isinstance(self.index, dict):
+                self.index.close()
+            self.index = {}
+
+class ArchiveTransaction:
+    # Wraps an archive and holds add() calls back until commit(), for media that is
+    # downloaded in several passes (video then audio) and must only count as done at the end.
+    # rollback() drops them when a pass failed
+    def __init__(self, archive):
+        self.archive = archive
+        self.pending = set()
+
+    def __contains__(self, archive_id):
+        return archive_id in self.archive
+
+    def add(self, archive_id):
+        self.pending.add(archive_id)
+
+    def commit(self):
+        for archive_id in self.pending:
+            self.archive.add(archive_id)
+        self.pending.clear()
+
+    def rollback(self):
+        self.pending.clear()
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+# Shared archive per file, the dbm index can only be opened once per process
+def open_archive(path=DEFAULT_ARCHIVE_PATH):
+    key = os.path.abspath(os.path.expanduser(path))
+    with _archives_lock:
+        if key not in _archives:
+            _archives[key] = DownloadArchive(key)
+        return _archives[key]
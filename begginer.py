@@ -1,24 +1,31 @@
 import contextlib
 import copy
 import hashlib
+import itertools
 import json
 import os
 import queue
 import re
-import sys
 import time
 import threading
 import types
-import urllib.request
 import webbrowser
-import requests
-import yt_dlp
 import tkinter as tk
 from tkinter import filedialog, Toplevel, StringVar, messagebox, ttk, Button
-from io import BytesIO
-from PIL import Image, ImageTk
-from misc import PlaylistHandler
-import io
+import contentindex
+import infocache
+import resultlist
+import scheduler
+import searchcache
+import thumbnails
+import ydlopts
+# yt_dlp, requests, PIL and misc are imported where they are used, loading them up front delays the first window
+
+# Results shown per page of a search, "Load more results" reads the next page from the same search
+SEARCH_PAGE_SIZE = 50
+# Upper bound of a search, result pages are only fetched from YouTube when they are read
+SEARCH_MAX_RESULTS = 500
+
 class HomeGui(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
@@ -26,6 +33,7 @@ class HomeGui(ttk.Frame):
         self.thumbnail_images = []
         self.downloader_thread = None
         self.search_thread = None
+        self.search_session = None  # shared search results being shown and how far they were read
         self._search_active = True 
         self.is_downloading = False
         self.cancel_requested = False
@@ -101,7 +109,9 @@ class HomeGui(ttk.Frame):
         )
 
         self.canvas_window = self.scrollable_canvas.create_window((0, 0), window=self.scrollable_frame, anchor="n")
-        self.scrollable_canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollable_canvas.configure(yscrollcommand=self.on_results_scrolled)
+        # Search results are drawn on the scrollable frame by a recycled pool of cards
+        self.results_view = resultlist.ResultList(self)
 
         self.scrollable_canvas.grid(row=0, column=0, sticky="nsew")
         self.scrollbar.grid(row=0, column=1, sticky="ns")
@@ -572,6 +582,15 @@ class HomeGui(ttk.Frame):
         for child in self.scrollable_frame.winfo_children():
             if hasattr(child, 'configure_width'):
                 child.configure_width(canvas_width - 20)  # 20 pixels margin
+        self.results_view.schedule_refresh()
+
+    def on_results_scrolled(self, first, last):
+        self.scrollbar.set(first, last)
+        self.results_view.schedule_refresh()
+
+    # Thumbnails of the results being replaced are not fetched anymore
+    def cancel_thumbnails(self):
+        thumbnails.get_thumbnail_service().cancel('search')
 
     def paste_from_clipboard(self):
         clipboard_text = self.parent.clipboard_get()
@@ -602,8 +621,8 @@ class HomeGui(ttk.Frame):
             return
 
         # Clear previous results
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        self.cancel_thumbnails()
+        self.results_view.clear()
         self.thumbnail_images.clear()
 
         # Reset search cancellation flag
@@ -679,106 +698,134 @@ class HomeGui(ttk.Frame):
     def search_youtube(self, query):
         if not query:
             return            
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy() #clear previously results
+        self.close_search_session()
+        self.cancel_thumbnails()
+        self.results_view.clear() #clear previously results
         self.thumbnail_images.clear()      
         self.parent.config(cursor="watch")  
         self.status_label.config(text="Searching...", foreground="blue")        
-        # Create a list to store captured output messages
-        captured_output = []
-        
-        def custom_output_hook(message):
-            captured_output.append(message)
-            if "Failed to resolve" in message or "Temporary failure in name resolution" in message or "Failed to connect" in message:
-                self.parent.after(0, lambda: self.show_network_error_popup(message))
-        
-        #configure yt-dlp to use the hook
-        def search():
-            ydl_opts = {
-                'extract_flat': True,
-                'quiet': False,  # Need this to be False to get output messages
-                'force_generic_extractor': True,
-                'progress_hooks': [self.yt_dlp_hook],
-                'verbose': True,  # Enable verbose output especially in terminal
-                'playlistend': 50,  # Increase the number of results (adjust as needed)
-            }
 
+        def search():
             try:
-                # Redirect stdout to capture yt-dlp output
-                original_stdout = sys.stdout
-                sys.stdout = io.StringIO()
-                
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    # This is for overriding ytd-lp's output methods to capture network errors
-                    original_to_screen = ydl.to_screen
-                    original_to_stderr = ydl.to_stderr
-                    
-                    def capture_output(message, *args, **kwargs):
-                        custom_output_hook(message)
-                        return original_to_screen(message, *args, **kwargs)
-                    
-                    def capture_stderr(message, *args, **kwargs):
-                        custom_output_hook(message)
-                        return original_to_stderr(message, *args, **kwargs)
-                    
-                    ydl.to_screen = capture_output
-                    ydl.to_stderr = capture_stderr
-                    search_results = ydl.extract_info(f"ytsearch50:{query}", download=False)
-
-                    # Restore original stdout and output methods
-                    sys.stdout = original_stdout
-                    ydl.to_screen = original_to_screen
-                    ydl.to_stderr = original_to_stderr
-
-                    if not search_results or 'entries' not in search_results:
-                        if self._search_active:  
-                            self.parent.after(0, lambda: self.status_label.config(
-                                text="No results found", 
-                                foreground="red"
-                            ))
-                            self.cancel_buttonn.config(state=tk.DISABLED)
-                        return
-                    
-                    self.parent.after(0, lambda: self.status_label.config(text=""))
-
-                    # Display a count of found videos
-                    self.parent.config(cursor="")
-                    video_count = len(search_results['entries'])
-                    if video_count > 0 and self._search_active:
-                        self.parent.after(0, lambda: self.status_label.config(
-                            text=f"Found {video_count} videos", 
-                            foreground="green"
-                        ))
-                        self.cancel_buttonn.config(state=tk.DISABLED)
-
-                    for i, video in enumerate(search_results['entries']):
-                        if not video or not self._search_active:  
-                            self.parent.after(0, lambda: self.status_label.config(
-                                text="Search Canceled", foreground="red"
-                            )) 
-                            return
-                        
-                        # Schedule UI updates in main thread
-                        self.parent.after(0, self.create_video_item, video, i)
-                        
-
+                # Repeated searches and searches already running share their results through the cache
+                results = searchcache.get_search_cache().results(query, self.search_source)
+                self.search_session = {'results': results, 'entries': iter(results), 'shown': 0}
+                self.load_search_page(self.search_session)
             except Exception as e:
-                if self._search_active:  
-                    error_msg = str(e)
-                    # Check for specific network error messages
-                    if "Failed to resolve" in error_msg or "Failed to connect" in error_msg or "Temporary failure in name resolution" in error_msg:
-                        self.parent.after(0, lambda: self.show_network_error_popup(error_msg))
-                    else:
-                        self.parent.after(0, lambda: self.status_label.config(
-                            text=(f"Error: {error_msg}"), 
-                            foreground="red"
-                        ))
+                self.report_search_error(e)
 
         # Start search in background thread
         self._search_active = True
         self.search_thread = threading.Thread(target=search, daemon=True)
         self.search_thread.start()
 
+    # Results of query from position start on, searchcache reads from here what it does not have yet.
+    # Nothing is fetched before the first entry is asked for
+    def search_source(self, query, start):
+        import yt_dlp
+        # yt-dlp reports to the logger instead of printing, the search threads never touch sys.stdout
+        ydl_opts = {
+            'extract_flat': True,
+            'quiet': True,
+            'no_warnings': True,
+            'logger': SearchLogger(self),
+            'force_generic_extractor': True,
+            'progress_hooks': [self.yt_dlp_hook],
+        }
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # Unprocessed, the entries are a generator that fetches result pages as it is read
+            search_results = ydl.extract_info(f"ytsearch{SEARCH_MAX_RESULTS}:{query}", download=False, process=False)
+            if search_results:
+                for entry in itertools.islice(search_results.get('entries') or [], start, None):
+                    yield entry
+
+    # Streams the next page of results into the list, every card is scheduled as soon as its entry arrives
+    # instead of after the whole page. Runs in a background thread
+    def load_search_page(self, session):
+        loaded = 0
+        for video in session['entries']:
+            if not self._search_active:  
+                self.parent.after(0, lambda: self.status_label.config(
+                    text="Search Canceled", foreground="red"
+                )) 
+                return
+            if session is not self.search_session:
+                return  # A newer search replaced this one
+            if not video:
+                continue
+            
+            # Schedule UI updates in main thread
+            self.parent.after(0, self.add_result, session, video)
+            session['shown'] += 1
+            loaded += 1
+            self.parent.after(0, lambda count=session['shown']: self.status_label.config(
+                text=f"Found {count} videos", 
+                foreground="green"
+            ))
+            if loaded >= SEARCH_PAGE_SIZE:
+                break
+        searchcache.get_search_cache().save(session['results'])
+        
+        if session is self.search_session:
+            more = loaded >= SEARCH_PAGE_SIZE and session['shown'] < SEARCH_MAX_RESULTS
+            self.parent.after(0, self.finish_search_page, session, more)
+
+    # Runs in the Tk thread, results of a search that was replaced in the meantime are dropped
+    def add_result(self, session, video):
+        if session is self.search_session:
+            self.results_view.append(video)
+
+    # Runs in the Tk thread after the cards of a page were scheduled
+    def finish_search_page(self, session, more):
+        if session is not self.search_session:
+            return
+        self.parent.config(cursor="")
+        self.cancel_buttonn.config(state=tk.DISABLED)
+        if not session['shown']:
+            self.status_label.config(text="No results found", foreground="red")
+        if more:
+            self.results_view.set_footer(ttk.Button(self.scrollable_frame, text="Load more results",
+                                                    command=lambda: self.load_more_results(session)))
+        else:
+            self.close_search_session()
+
+    # Fetch the next page of the current search on demand
+    def load_more_results(self, session):
+        if session is not self.search_session:
+            return
+        self.results_view.set_footer(None)
+        self._search_active = True
+        self.cancel_buttonn.config(state=tk.NORMAL)
+        self.parent.config(cursor="watch")
+        self.status_label.config(text="Loading more results...", foreground="blue")
+
+        def load():
+            try:
+                self.load_search_page(session)
+            except Exception as e:
+                self.report_search_error(e)
+
+        self.search_thread = threading.Thread(target=load, daemon=True)
+        self.search_thread.start()
+
+    # The results stay in the search cache, only this view of them ends
+    def close_search_session(self):
+        self.search_session = None
+
+    def report_search_error(self, e):
+        self.parent.after(0, lambda: self.parent.config(cursor=""))
+        if self._search_active:  
+            error_msg = str(e)
+            # Check for specific network error messages
+            if "Failed to resolve" in error_msg or "Failed to connect" in error_msg or "Temporary failure in name resolution" in error_msg:
+                self.parent.after(0, lambda: self.show_network_error_popup(error_msg))
+            else:
+                self.parent.after(0, lambda: self.status_label.config(
+                    text=(f"Error: {error_msg}"), 
+                    foreground="red"
+                ))
+
     #Display a network error popup
     def show_network_error_popup(self, _):
         import tkinter.messagebox as messagebox
@@ -786,186 +833,66 @@ class HomeGui(ttk.Frame):
         self.parent.config(cursor="")
         self.status_label.config(text="Network Error", foreground="red")
 
-    #Create a video result item in the UI
-    def create_video_item(self, video, index):
-        video_frame = ttk.Frame(self.scrollable_frame)
-        video_frame.pack(fill=tk.X, padx=5, pady=5)
-        if index > 0:
-            separator = ttk.Frame(self.scrollable_frame, height=1, relief=tk.SUNKEN, borderwidth=1)
-            separator.pack(fill=tk.X, pady=5)
-
-        # Main container (Thumbnail + Buttons + some Info)
-        container = ttk.Frame(video_frame)
-        container.pack(fill=tk.X, padx=5, pady=5)
-        thumbnail_label = ttk.Label(container, text="Loading...", width=15)
-        thumbnail_label.pack(side=tk.LEFT, padx=5, pady=5)
-        thumbnail_url = (video.get('thumbnail') or
-                        next((t['url'] for t in video.get('thumbnails', []) if t.get('url')), '')) #Best thumbnail url accoring to googling
-
-        # Start thumbnail download in background
-        threading.Thread(
-            target=self.download_thumbnail,
-            args=(thumbnail_url, thumbnail_label),
-            daemon=True
-        ).start()
-
-        # Button sections
-        button_frame = ttk.Frame(container)
-        button_frame.pack(side=tk.LEFT, padx=10, pady=5)
-
-        # Play button
-        play_button = ttk.Button(
-            button_frame,
-            text="▶ Play",
-            command=lambda url=video.get('url') or f"https://youtu.be/{video.get('id', '')}":
-                webbrowser.open(url)
-        )
-        play_button.pack(fill=tk.X, pady=2)
-
-        # Download button
-        download_button = ttk.Button(
-            button_frame,
-            text="↓ Download",
-            command=lambda v=video: self.create_download_button(v)
-        )
-        download_button.pack(fill=tk.X, pady=2)
-
-        # Share button
-        def copy_and_notify(url_data):
-            if isinstance(url_data, dict):
-                url_data = url_data.get('url', '')
-                print(f"Extracted valid URL: {url_data}")
-            
-            # Copy URL to clipboard
-            self.parent.clipboard_clear()
-            self.parent.clipboard_append(url_data)
-            
-            # Show notification popup
-            notification = tk.Toplevel(self.parent)
-            notification.overrideredirect(True)
-            notification.attributes('-topmost', True)
-            
-            # Position the popup near the sharing button
-            x = self.parent.winfo_pointerx()
-            y = self.parent.winfo_pointery()
-            notification.geometry(f"+{x+10}+{y+10}")
-            ttk.Label(notification, text="Link copied to clipboard!", padding=10).pack()
-            notification.after(2000, notification.destroy) #close after 2 seconds
-
-        share_button = ttk.Button(
-            button_frame,
-            text="↗ Share",
-            command=lambda url=video.get('url') or f"https://youtu.be/{video.get('id', '')}":
-                copy_and_notify(url)
-        )
-        share_button.pack(fill=tk.X, pady=2)
-
-        # Video info section
-        info_frame = ttk.Frame(container)
-        info_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
-
-        # Title section (truncated for long titles)
-        title = video.get('title', 'No title')[:60] + ('...' if len(video.get('title', '')) > 60 else '')
-        ttk.Label(info_frame, text=f"{title}", font=('Arial', 10, 'bold')).pack(anchor='w')
-        #ttk.Label(info_frame, text=f"Title: {title}", font=('Arial', 10, 'bold')).pack(anchor='w')
-
-        # Channel name
-        ttk.Label(info_frame, text=f"Channel: {video.get('uploader', 'Unknown channel')}").pack(anchor='w')
-
-        # Format view count with appropriate suffix (k, M, B) to keeo stuff cool! huh
-        view_count = video.get('view_count', 0)
-        if view_count >= 1_000_000_000:  # Billions
-            view_count_str = f"{view_count / 1_000_000_000:.1f}B"
-            view_count_str = view_count_str.replace('.0B', 'B')
-        elif view_count >= 1_000_000:  # Millions
-            view_count_str = f"{view_count / 1_000_000:.1f}M"
-            view_count_str = view_count_str.replace('.0M', 'M')
-        elif view_count >= 1_000:  # Thousands
-            view_count_str = f"{view_count / 1_000:.1f}k"
-            view_count_str = view_count_str.replace('.0k', 'k')
-        else:
-            view_count_str = f"{view_count}" if view_count else 'N/A'
-
-        # Duration section
-        duration = int(video.get('duration', 0)) if video.get('duration') else 0
-        if duration:
-            hours = duration // 3600
-            minutes = (duration % 3600) // 60
-            seconds = duration % 60
-            
-            if hours > 0:
-                duration_str = f"{hours}:{minutes:02d}:{seconds:02d}"
-            else:
-                duration_str = f"{minutes}:{seconds:02d}"
-        else:
-            duration_str = 'N/A'
+    # Copy a result link to the clipboard and confirm it next to the pointer
+    def copy_link(self, url_data):
+        if isinstance(url_data, dict):
+            url_data = url_data.get('url', '')
+            print(f"Extracted valid URL: {url_data}")
+        
+        # Copy URL to clipboard
+        self.parent.clipboard_clear()
+        self.parent.clipboard_append(url_data)
+        
+        # Show notification popup
+        notification = tk.Toplevel(self.parent)
+        notification.overrideredirect(True)
+        notification.attributes('-topmost', True)
+        
+        # Position the popup near the sharing button
+        x = self.parent.winfo_pointerx()
+        y = self.parent.winfo_pointery()
+        notification.geometry(f"+{x+10}+{y+10}")
+        ttk.Label(notification, text="Link copied to clipboard!", padding=10).pack()
+        notification.after(2000, notification.destroy) #close after 2 seconds
 
-        ttk.Label(info_frame, text=f"Duration: {duration_str}").pack(anchor='w')
-        ttk.Label(info_frame, text=f"Viewers: {view_count_str}").pack(anchor='w')
-        video_frame.video_data = video
     #Thumbanail, or bunner of the video, lets try to be faster when fetching
-    def download_thumbnail(self, thumbnail_url, label=None):
+    # show(label, image) runs in the Tk thread once the image is loaded, show_thumbnail if not given
+    def download_thumbnail(self, thumbnail_url, label=None, priority=thumbnails.HIDDEN, group=None, show=None):
         if label is None:
             label = self.thumbnail_label            
         if not thumbnail_url:
             self.parent.after(0, lambda: label.config(text="No thumbnail or unstable network", image=''))
-            return
-            
-        # Try medium quality format
-        if "hqdefault" in thumbnail_url:
-            thumbnail_url = thumbnail_url.replace("hqdefault", "mqdefault")
+            return None
                 
         if not thumbnail_url.startswith(('http://', 'https://')):
             self.parent.after(0, lambda: label.config(text="Invalid URL", image=''))
-            return            
-        
-        # Use a shorter timeout for faster response
-        timeout = 5
-        img_data = None
-        
-        # First attempt with requests usually it is much faster
-        try:
-            response = requests.get(thumbnail_url, stream=True, timeout=timeout)
-            if response.status_code == 200:
-                img_data = response.content
-        except:
-            pass
-        
-        # Only try the backup method if the first one failed
-        if img_data is None:
-            try:
-                with urllib.request.urlopen(thumbnail_url, timeout=timeout) as response:
-                    img_data = response.read()
-            except:
-                # If both methods fail with the medium quality, try the original URL
-                if "mqdefault" in thumbnail_url:
-                    original_url = thumbnail_url.replace("mqdefault", "hqdefault")
-                    try:
-                        response = requests.get(original_url, stream=True, timeout=timeout)
-                        if response.status_code == 200:
-                            img_data = response.content
-                    except:
-                        pass
-        
-        if img_data:
-            try:
-                img = Image.open(BytesIO(img_data))
-                img.thumbnail((280, 130), Image.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                
-                if hasattr(self, 'thumbnail_images'):
-                    self.thumbnail_images.append(photo)
-                else:
-                    self.thumbnail_image = photo
-                    
-                self.parent.after(0, lambda: label.config(image=photo, text=""))
-                return True
-            except:
-                pass
-        
-        # If we get here, we couldn't load the thumbnail
-        self.parent.after(0, lambda: label.config(text="No thumbnail or unstable network", image=''))
-        return False
+            return None
+
+        # Try medium quality format first, the original one if that fails
+        urls = [thumbnail_url]
+        if "hqdefault" in thumbnail_url:
+            urls.insert(0, thumbnail_url.replace("hqdefault", "mqdefault"))
+
+        def loaded(image):
+            self.parent.after(0, show or self.show_thumbnail, label, image)
+
+        return thumbnails.get_thumbnail_service().fetch(urls, (280, 130), loaded, priority, group)
+
+    # Runs in the Tk thread, PhotoImages are only created here
+    def show_thumbnail(self, label, image):
+        if not label.winfo_exists():
+            return
+        if image is None:
+            # If we get here, we couldn't load the thumbnail
+            label.config(text="No thumbnail or unstable network", image='')
+            return
+        from PIL import ImageTk
+        photo = ImageTk.PhotoImage(image)
+        if hasattr(self, 'thumbnail_images'):
+            self.thumbnail_images.append(photo)
+        else:
+            self.thumbnail_image = photo
+        label.config(image=photo, text="")
 
     #Hook to handle yt-dlp errors
     def yt_dlp_hook(self, d):
@@ -1029,6 +956,7 @@ class HomeGui(ttk.Frame):
         else:
             # Try to fetch title in background without blocking
             def fetch_title_thread():
+                import yt_dlp
                 try:
                     ydl_opts = {
                         'quiet': True,
@@ -1038,7 +966,8 @@ class HomeGui(ttk.Frame):
                     }
                     
                     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        info = ydl.extract_info(url, download=False)
+                        # Cached, so the download started from this popup does not extract again
+                        info = infocache.extract_info(ydl, url)
                         fetched_title = info.get('title', 'Unknown Title')
                         
                         # Update title label in main thread only if popup is still active
@@ -1423,6 +1352,7 @@ class HomeGui(ttk.Frame):
             self.progress.update_idletasks()
 
     def download_thread(self, url, format_string, output_path, resume=False):
+        import yt_dlp
         self.cancel_button.config(state=tk.NORMAL)
         try:
             # Use queues for thread-safe communication with UI
@@ -1500,12 +1430,18 @@ class HomeGui(ttk.Frame):
                         'data': copy.deepcopy(d)
                     })
             
+            # Where the file ends up once merged, converted and moved into place, for the content index
+            final_paths = []
+            def record_final_path(d):
+                if d.get('status') == 'finished' and d.get('postprocessor') == 'MoveFilesAfterDownload':
+                    final_paths.append(d['info_dict'].get('filepath'))
+            
             # Base options for yt-dlp - optimized configuration
             ydl_opts = {
                 'outtmpl': os.path.join(output_path, '%(title)s.%(ext)s'),
                 'verbose': True,
-                'progress_hooks': [throttled_progress_hook],
-                'postprocessor_hooks': [throttled_processing_hook],
+                'progress_hooks': [throttled_progress_hook, scheduler.get_scheduler().progress_hook()],
+                'postprocessor_hooks': [throttled_processing_hook, record_final_path],
                 'noprogress': False,
                 'quiet': False,
                 'buffersize': 4096,  # Larger buffer for better performance
@@ -1517,45 +1453,8 @@ class HomeGui(ttk.Frame):
             
             print(f"Download thread: Resume mode: {resume}")
             
-            # Set format-specific options with cleaner approach
-            if 'audio' in format_string:
-                # Extract the format specification
-                if format_string.startswith('-f '):
-                    format_spec = format_string[3:].split(' --')[0].strip()
-                else:
-                    format_spec = format_string.split(' --')[0].strip()
-                
-                ydl_opts['format'] = format_spec
-                
-                # Configure audio extraction based on format
-                if 'mp3' in format_string:
-                    quality = '320' if '320K' in format_string else '192' if '192K' in format_string else '128'
-                    ydl_opts['postprocessors'] = [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': quality,
-                    }]
-                    ydl_opts['extractaudio'] = True
-                elif 'm4a' in format_string:
-                    ydl_opts['postprocessors'] = [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'm4a',
-                        'preferredquality': '0',
-                    }]
-                    ydl_opts['extractaudio'] = True
-                elif 'vorbis' in format_string or 'ogg' in format_string.lower():
-                    ydl_opts['postprocessors'] = [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'vorbis',
-                        'preferredquality': '0',
-                    }]
-                    ydl_opts['extractaudio'] = True
-            else:
-                # For video formats
-                if format_string.startswith('-f '):
-                    ydl_opts['format'] = format_string[3:].strip()
-                else:
-                    ydl_opts['format'] = format_string.strip()
+            # Format selector and audio conversion compiled from the format choice, 320K included
+            ydl_opts.update(ydlopts.build_opts(format_string))
             
             print("Download thread: Final yt-dlp options:")
             print(ydl_opts)
@@ -1565,7 +1464,7 @@ class HomeGui(ttk.Frame):
             try:
                 # Create a separate YoutubeDL instance just for info extraction
                 with contextlib.closing(yt_dlp.YoutubeDL({'quiet': True, 'socket_timeout': 30})) as ydl:
-                    info_dict = ydl.extract_info(url, download=False)
+                    info_dict = infocache.extract_info(ydl, url)
                     video_title = info_dict.get('title', 'Unknown Title')
                     
                     # Mark download as started to cancel initialization timers
@@ -1612,26 +1511,37 @@ class HomeGui(ttk.Frame):
                     self.cancel_init_timers()
                     raise Exception("Download cancelled by user")
                 
-                # Create a cancellable context for yt-dlp
-                with contextlib.closing(yt_dlp.YoutubeDL(ydl_opts)) as ydl:
-                    # Add cancellation check
-                    original_report_error = ydl.report_error
+                # Wait for a free slot, the other tabs and playlists share the same download limits
+                waiting_status = {'type': 'status', 'text': "Waiting for another download to finish...", 'color': "black"}
+                with scheduler.get_scheduler().slot(scheduler.INTERACTIVE,
+                                                    lambda: getattr(self, 'cancel_requested', False),
+                                                    lambda: self.ui_update_queue.put(waiting_status)) as acquired:
+                    if not acquired:
+                        raise Exception("Download cancelled by user")
+
+                    # Create a cancellable context for yt-dlp
+                    with contextlib.closing(yt_dlp.YoutubeDL(ydl_opts)) as ydl:
+                        # Add cancellation check
+                        original_report_error = ydl.report_error
                     
-                    def cancellable_report_error(self, *args, **kwargs):
-                        # Check for cancellation during long operations
-                        if hasattr(self.params['_downloader'], 'cancel_requested') and self.params['_downloader'].cancel_requested:
-                            raise Exception("Download cancelled by user")
-                        return original_report_error(self, *args, **kwargs)
+                        def cancellable_report_error(self, *args, **kwargs):
+                            # Check for cancellation during long operations
+                            if hasattr(self.params['_downloader'], 'cancel_requested') and self.params['_downloader'].cancel_requested:
+                                raise Exception("Download cancelled by user")
+                            return original_report_error(self, *args, **kwargs)
                     
-                    # Monkey patch the report_error method to enable cancellation
-                    ydl.report_error = types.MethodType(cancellable_report_error, ydl)
-                    ydl.params['_downloader'] = self
+                        # Monkey patch the report_error method to enable cancellation
+                        ydl.report_error = types.MethodType(cancellable_report_error, ydl)
+                        ydl.params['_downloader'] = self
                     
-                    # Execute download
-                    download_result = ydl.download([url])
+                        # Execute download
+                        download_result = infocache.download(ydl, url)
                 
                 # Handle the download result
                 if download_result == 0:
+                    # Playlists and batches that contain this video later find it on disk
+                    if final_paths:
+                        contentindex.record(contentindex.video_id_from_url(url), format_string, None, final_paths[-1])
                     # Success - queue completion notification
                     self.ui_update_queue.put({
                         'type': 'complete'
@@ -2077,6 +1987,26 @@ class HomeGui(ttk.Frame):
         if url:
             webbrowser.open(url)
 
+# Logger of the search YoutubeDL, messages stay out of the terminal and network errors open a popup
+class SearchLogger:
+    NETWORK_ERRORS = ("Failed to resolve", "Temporary failure in name resolution", "Failed to connect")
+
+    def __init__(self, gui):
+        self.gui = gui
+
+    def debug(self, msg):
+        pass
+
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        self.error(msg)
+
+    def error(self, msg):
+        if any(error in msg for error in self.NETWORK_ERRORS):
+            self.gui.parent.after(0, lambda: self.gui.show_network_error_popup(msg))
+
 if __name__ == "__main__":
     parent = tk.Tk()
     parent.title("Home")
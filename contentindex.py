@@ -0,0 +1,167 @@
+#Content index, remembers which video was downloaded in which format and where the file ended up
+#Playlists overlap and the same video shows up in searches, so before an item is downloaded its id and
+#format are looked up here. A file that is still on disk (same size and checksum) is linked (or copied) into the new
+#output folder, or the item is skipped when it already is there, instead of downloading it again.
+import atexit
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import ydlopts
+
+INDEX_PATH = os.path.join(os.path.expanduser("~"), "Downloads", "yt-dlite", ".cache", "content.json")
+# The checksum covers the size and both ends of the file, hashing whole videos would cost more than it saves
+CHECKSUM_BLOCK = 64 * 1024
+# Changes are written out together this long after the first one, and when the process exits, a playlist
+# run looking up and adding hundreds of items rewrites the index a few times instead of once per item
+SAVE_DELAY = 2.0
+
+_VIDEO_ID_RE = re.compile(r'(?:[?&]v=|youtu\.be/|/shorts/)([0-9A-Za-z_-]{11})')
+
+def video_id_from_url(url):
+    match = _VIDEO_ID_RE.search(url or '')
+    return match.group(1) if match else None
+
+# Choices that produce the same file share a key, e.g. every tab's "MP3 320K" whatever source format it picks
+def format_key(format_string, item_type=None):
+    opts = ydlopts.compile_format(format_string, item_type)
+    for pp in opts.get('postprocessors', ()):
+        if pp['key'] == 'FFmpegExtractAudio':
+            return f"audio:{pp['preferredcodec']}:{pp['preferredquality']}"
+    return f"format:{opts['format']}:{opts.get('merge_output_format', '')}"
+
+def file_checksum(path):
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(CHECKSUM_BLOCK))
+        if size > CHECKSUM_BLOCK:
+            f.seek(max(CHECKSUM_BLOCK, size - CHECKSUM_BLOCK))
+            digest.update(f.read(CHECKSUM_BLOCK))
+    return digest.hexdigest()
+
+class ContentIndex:
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.timer = None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        atexit.register(self.flush)
+
+    def lookup(self, video_id, key):
+        """Entry of a file still on disk for video_id in format key, None if there is none"""
+        with self.lock:
+            entry = self.entries.get(f"{video_id} {key}")
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(entry['path'])
+            # Only files touched since they were indexed are hashed again
+            intact = stat.st_size == entry['size'] and (
+                stat.st_mtime == entry.get('mtime') or file_checksum(entry['path']) == entry['checksum'])
+        except OSError:
+            intact = False
+        if not intact:
+            with self.lock:
+                if self.entries.pop(f"{video_id} {key}", None) is not None:
+                    self._changed()
+            return None
+        return dict(entry)
+
+    def add(self, video_id, key, path):
+        try:
+            stat = os.stat(path)
+            entry = {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime,
+                     'checksum': file_checksum(path)}
+        except OSError:
+            return
+        with self.lock:
+            self.entries[f"{video_id} {key}"] = entry
+            self._changed()
+
+    def flush(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.dirty:
+                self.dirty = False
+                self._save()
+
+    # Caller must hold self.lock
+    def _changed(self):
+        self.dirty = True
+        if self.timer is None:
+            self.timer = threading.Timer(SAVE_DELAY, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    # Caller must hold self.lock
+    def _save(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save content index: {e}")
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_content_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ContentIndex()
+        return _index
+
+# Make an indexed file available in output_path, returns where it can be found or None if it has to be downloaded
+def place(entry, output_path):
+    source = entry['path']
+    if os.path.dirname(source) == os.path.abspath(output_path):
+        return source
+    target = os.path.join(output_path, os.path.basename(source))
+    if os.path.exists(target):
+        return target if os.path.getsize(target) == entry['size'] else None
+    try:
+        if not os.path.exists(output_path):
+            os.makedirs(output_path)
+        # A hard link costs no space, it only fails across drives or on file systems without links
+        os.link(source, target)
+        return target
+    except OSError:
+        pass
+    # Copying still beats downloading it twice, the file has to end up in the folder that was asked for
+    tmp_path = target + '.part'
+    try:
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, target)
+        return target
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return None
+
+# Look an item up and place it into output_path, the path it is available at or None
+def find_existing(video_id, format_string, item_type, output_path):
+    if not video_id:
+        return None
+    entry = get_content_index().lookup(video_id, format_key(format_string, item_type))
+    return place(entry, output_path) if entry else None
+
+def record(video_id, format_string, item_type, path):
+    if video_id and path:
+        get_content_index().add(video_id, format_key(format_string, item_type), path)
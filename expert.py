@@ -6,12 +6,12 @@ import subprocess
 import signal
 import shlex
 import re
-import yt_dlp
 import queue
 import time
 import platform
 import sys
 from io import StringIO
+import scheduler
 
 class RedirectText:
     def __init__(self, text_widget, queue):
@@ -461,6 +461,7 @@ class ExpertGui:
         self.download_thread.start()
 
     def run_command(self, command):
+        import yt_dlp
         try:
             # Extract URL from command
             url = None
@@ -529,7 +530,7 @@ class ExpertGui:
             # Create yt-dlp options with passthrough logger and progress hook
             # Set verbosity to True to ensure all output is passed to terminal, for debbuging
             ydl_opts = {
-                'progress_hooks': [progress_hook],
+                'progress_hooks': [progress_hook, scheduler.get_scheduler().progress_hook()],
                 'logger': PassthroughLogger(self),
                 'quiet': False,
                 'no_warnings': False,
@@ -555,7 +556,13 @@ class ExpertGui:
                     # Check if already cancelled
                     if not self.cancellation_requested:
                         try:
-                            ydl.download([url])
+                            # Same download slots and bandwidth cap as the other tabs
+                            with scheduler.get_scheduler().slot(scheduler.INTERACTIVE,
+                                                                lambda: self.cancellation_requested,
+                                                                lambda: print("Waiting for another download to finish...")) as acquired:
+                                if not acquired:
+                                    raise Exception("Download cancelled by user")
+                                ydl.download([url])
                             
                             # Only update UI if not cancelled
                             if not self.cancellation_requested:
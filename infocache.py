@@ -0,0 +1,257 @@
+#Metadata cache, keeps yt-dlp info dicts so fetching info and then downloading the same URL only extracts once
+#Entries are the unprocessed result of extract_info(url, process=False), every caller runs its own
+#format selection on top of it with ydl.process_ie_result. They live in memory and on disk as JSON files,
+#expire after a TTL or as soon as the signed media URLs inside them do, and the least recently used
+#entries are evicted once the cache grows past its byte budget. Entries are keyed by the URL and the ydl
+#options that change what gets extracted, a --no-playlist or logged in run never sees another run's entry.
+import collections
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), "Downloads", "yt-dlite", ".cache", "info")
+DEFAULT_TTL = 60 * 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Memory only holds the hot part of the cache, the rest stays on disk
+DEFAULT_MAX_MEMORY_BYTES = 16 * 1024 * 1024
+
+# Stop trusting signed URLs a bit before they actually expire, a download needs time to start
+_EXPIRY_MARGIN = 5 * 60
+# expire=1700000000 in the query (YouTube) or /expire/1700000000/ in the path
+_EXPIRE_RE = re.compile(r'[?&/]expire[=/](\d{9,11})')
+
+# ydl params that change the result of extract_info for the same URL
+EXTRACTION_PARAMS = (
+    'noplaylist', 'extract_flat', 'cookiefile', 'cookiesfrombrowser', 'username', 'usenetrc', 'videopassword',
+    'ap_mso', 'ap_username', 'extractor_args', 'age_limit', 'geo_bypass', 'geo_bypass_country',
+    'geo_bypass_ip_block', 'geo_verification_proxy', 'proxy', 'source_address', 'allowed_extractors',
+    'force_generic_extractor', 'compat_opts',
+)
+
+# Part of the cache key that stands for the extraction options of ydl, '' for a default configured one
+def extraction_variant(ydl):
+    params = {}
+    for key in EXTRACTION_PARAMS:
+        value = ydl.params.get(key)
+        # Unset, off and empty all mean the default, an age_limit of 0 does not
+        if value is None or value is False or (not value and value != 0):
+            continue
+        params[key] = sorted(value) if isinstance(value, (set, frozenset)) else value
+    if not params:
+        return ''
+    # Only a hash of the values is kept, passwords never end up in the cache files
+    text = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+# Earliest expiry timestamp of the signed URLs in an info dict, None if it has none
+def signed_url_expiry(info):
+    urls = [info.get('url'), info.get('manifest_url')]
+    for fmt in info.get('formats') or []:
+        urls.append(fmt.get('url'))
+        urls.append(fmt.get('manifest_url'))
+    expiry = None
+    for url in urls:
+        if not url or not isinstance(url, str):
+            continue
+        match = _EXPIRE_RE.search(url)
+        if match:
+            timestamp = int(match.group(1))
+            expiry = timestamp if expiry is None else min(expiry, timestamp)
+    return expiry
+
+class InfoCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES,
+                 max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.lock = threading.Lock()
+        # key -> (expires, json text), kept in least recently used order. Storing the text
+        # gives exact sizes for eviction and every get() hands out an independent copy
+        self.memory = collections.OrderedDict()
+        self.memory_bytes = 0
+
+    def _key(self, url, variant=''):
+        return hashlib.sha1(f"{url}\n{variant}".encode('utf-8') if variant else url.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, url, variant=''):
+        key = self._key(url, variant)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                expires, text = entry
+                if expires > now:
+                    self.memory.move_to_end(key)
+                    return json.loads(text)
+                self._drop(key)
+                return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if record.get('url') != url or record.get('variant', '') != variant or record.get('expires', 0) <= now:
+            self._remove_file(path)
+            return None
+        # Touch the file so disk eviction sees it as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        text = json.dumps(record['info'])
+        with self.lock:
+            self._remember(key, record['expires'], text)
+        return record['info']
+
+    def put(self, url, info, variant=''):
+        # Lazy playlist entries and other non JSON values cannot be cached, callers just extract again
+        try:
+            text = json.dumps(info)
+        except (TypeError, ValueError):
+            return False
+        now = time.time()
+        expires = now + self.ttl
+        signed_expiry = signed_url_expiry(info)
+        if signed_expiry is not None:
+            expires = min(expires, signed_expiry - _EXPIRY_MARGIN)
+        if expires <= now:
+            return False
+
+        key = self._key(url, variant)
+        with self.lock:
+            self._remember(key, expires, text)
+        try:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+            # Write then rename, a crash or a concurrent reader never sees half a file
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'url': url, 'variant': variant, 'expires': expires, 'info': json.loads(text)}))
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except OSError as e:
+            print(f"Could not write info cache: {e}")
+        return True
+
+    def invalidate(self, url, variant=''):
+        key = self._key(url, variant)
+        with self.lock:
+            self._drop(key)
+        self._remove_file(self._path(key))
+
+    # Caller must hold self.lock
+    def _remember(self, key, expires, text):
+        self._drop(key)
+        self.memory[key] = (expires, text)
+        self.memory_bytes += len(text)
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            _, (_, old_text) = self.memory.popitem(last=False)
+            self.memory_bytes -= len(old_text)
+
+    # Caller must hold self.lock
+    def _drop(self, key):
+        entry = self.memory.pop(key, None)
+        if entry is not None:
+            self.memory_bytes -= len(entry[1])
+
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        entries = []
+        total = 0
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # Entries older than the TTL are expired whatever their signed URLs say
+            if stat.st_mtime + self.ttl <= now:
+                self._remove_file(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove_file(path)
+            total -= size
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Process wide cache shared by the GUIs, the CLI and misc helpers
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = InfoCache()
+        return _cache
+
+# Drop-in for ydl.extract_info(url, download=False, process=False) that reuses a cached result.
+# Returns None when the media is already in the ydl's download archive, like yt-dlp does.
+def extract_info(ydl, url):
+    cache = get_cache()
+    variant = extraction_variant(ydl)
+    info = cache.get(url, variant)
+    if info is not None:
+        if ydl.params.get('download_archive') and ydl.in_download_archive(info):
+            return None
+        return info
+    info = ydl.extract_info(url, download=False, process=False)
+    if info is not None:
+        cache.put(url, info, variant)
+        # youtu.be/X, m.youtube.com and the like, the download that follows uses the canonical URL
+        webpage_url = info.get('webpage_url')
+        if webpage_url and webpage_url != url:
+            cache.put(webpage_url, info, variant)
+        # Parsing the cached text back gives the caller a copy the cache does not share
+        cached = cache.get(url, variant)
+        if cached is not None:
+            return cached
+    return info
+
+# Drop-in for ydl.extract_info(url, download=True), returns the processed info or None if archived
+def extract_and_download(ydl, url):
+    info = extract_info(ydl, url)
+    if info is None:
+        return None
+    return ydl.process_ie_result(info, download=True)
+
+# Drop-in for ydl.download([url]), the extraction comes from the cache when it can. Returns 0, or 1 if
+# yt-dlp reported an error it did not raise (ignoreerrors), like ydl.download() does.
+# fetch(ydl, url) replaces extract_and_download, e.g. for segmented downloads
+def download(ydl, url, fetch=None):
+    errors = []
+    trouble = ydl.trouble
+
+    # Every error yt-dlp reports goes through trouble(), raised or not
+    def count_trouble(*args, **kwargs):
+        errors.append(args[0] if args else kwargs.get('message'))
+        return trouble(*args, **kwargs)
+
+    ydl.trouble = count_trouble
+    try:
+        (fetch or extract_and_download)(ydl, url)
+    finally:
+        ydl.trouble = trouble
+    return 1 if errors else 0
@@ -0,0 +1,151 @@
+#Playlist run manifest, records every queued item of a playlist download and how far it got
+#It is rewritten atomically whenever an item changes status, so a run that was interrupted (app closed,
+#crash, power loss) can be resumed item by item. Finished items are checked by the size of their file,
+#nothing is extracted again for them, and only the items that did not finish are downloaded.
+import hashlib
+import json
+import os
+import threading
+import time
+
+MANIFEST_DIR = os.path.join(os.path.expanduser("~"), "Downloads", "yt-dlite", ".playlist_state")
+# Byte offsets of running items are written at most this often, status changes are written right away
+CHECKPOINT_INTERVAL = 2.0
+
+# Item statuses
+PENDING = 'pending'
+DOWNLOADING = 'downloading'
+DONE = 'done'
+FAILED = 'failed'
+
+def _path(url):
+    return os.path.join(MANIFEST_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+class PlaylistManifest:
+    def __init__(self, url, title=None, format_string=None, format_type=None, output_path=None,
+                 parallel=None, video_limit=None, new_only=False, data=None):
+        self.lock = threading.Lock()
+        self.last_checkpoint = 0
+        self.data = data or {
+            'url': url,
+            'title': title,
+            'format': format_string,
+            'type': format_type,
+            'output_path': output_path,
+            'parallel': parallel,
+            'video_limit': video_limit,
+            'new_only': new_only,
+            'queued_all': False,  # every item of the run is in the manifest
+            'created': time.time(),
+            'items': {},  # id -> {'index', 'title', 'url', 'status', 'path', 'size', 'offset'}
+        }
+        self.path = _path(url)
+
+    def add(self, item):
+        with self.lock:
+            self.data['items'].setdefault(item['id'], {
+                'index': len(self.data['items']),
+                'title': item.get('title'),
+                'url': item['url'],
+                'status': PENDING,
+            })
+            self._save()
+
+    def progress(self, item_id, offset):
+        # Called from the progress hooks, only written out every CHECKPOINT_INTERVAL
+        with self.lock:
+            entry = self.data['items'].get(item_id)
+            if entry is None:
+                return
+            entry['offset'] = offset
+            if time.time() - self.last_checkpoint >= CHECKPOINT_INTERVAL:
+                self._save()
+
+    def finished(self, item_id, ok, path=None):
+        size = None
+        if ok and path:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                path = None
+        if ok:
+            self.update(item_id, status=DONE, path=path, size=size, offset=size)
+        else:
+            self.update(item_id, status=FAILED)
+
+    def all_queued(self):
+        with self.lock:
+            self.data['queued_all'] = True
+            self._save()
+
+    def update(self, item_id, **fields):
+        with self.lock:
+            entry = self.data['items'].get(item_id)
+            if entry is None:
+                return
+            entry.update(fields)
+            self._save()
+
+    def verify(self):
+        """Marks finished items whose file is gone or has another size as pending again"""
+        with self.lock:
+            for entry in self.data['items'].values():
+                if entry['status'] != DONE or not entry.get('path'):
+                    continue
+                try:
+                    intact = os.path.getsize(entry['path']) == entry.get('size')
+                except OSError:
+                    intact = False
+                if not intact:
+                    entry['status'] = PENDING
+                    entry['offset'] = 0
+            self._save()
+
+    def unfinished_items(self):
+        # Download items for everything not done yet, in playlist order
+        with self.lock:
+            entries = sorted(self.data['items'].items(), key=lambda pair: pair[1]['index'])
+            return [{
+                'id': item_id,
+                'url': entry['url'],
+                'title': entry.get('title') or 'Unknown',
+                'format': self.data['format'],
+                'type': self.data['type'],
+            } for item_id, entry in entries if entry['status'] != DONE]
+
+    def counts(self):
+        # (done, total) of the items in the manifest
+        with self.lock:
+            items = self.data['items'].values()
+            return sum(1 for entry in items if entry['status'] == DONE), len(items)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    # Caller must hold self.lock
+    def _save(self):
+        self.data['updated'] = time.time()
+        try:
+            if not os.path.exists(MANIFEST_DIR):
+                os.makedirs(MANIFEST_DIR)
+            # Write then rename, an interrupted write leaves the previous manifest intact
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.path)
+            self.last_checkpoint = time.time()
+        except OSError as e:
+            print(f"Could not save playlist manifest: {e}")
+
+def load_manifest(url):
+    try:
+        with open(_path(url), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('url') != url:
+        return None
+    return PlaylistManifest(url, data=data)
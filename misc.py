@@ -1,15 +1,51 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import yt_dlp
+import itertools
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
 import os
+import queue
+import random
+import contentindex
+import infocache
+import manifest
+import playlistcache
+import progressbus
+import retry
+import segmented
+import sizeestimate
+import scheduler
+import ydlopts
+
+# Videos extracted to estimate the size of a playlist, and how many at once
+SIZE_SAMPLES = 8
+SIZE_SAMPLE_WORKERS = 4
+# Redirects followed before the entries of a playlist link, watch?v=X&list=Y takes one
+MAX_PLAYLIST_REDIRECTS = 5
 
 # Function to determine if URL is a playlist and process
 def is_playlist(url):
     return '&list=' in url or '?list=' in url or '/playlist?' in url
 
+# Unprocessed extraction of a playlist. Links like watch?v=X&list=Y and watch?list=Y come back as a
+# redirect to the playlist itself, yt-dlp only follows those while processing, so they are followed here
+def extract_playlist(ydl, url):
+    info = ydl.extract_info(url, download=False, process=False)
+    for _ in range(MAX_PLAYLIST_REDIRECTS):
+        if not info or info.get('_type') not in ('url', 'url_transparent'):
+            break
+        info = ydl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+    return info
+
 def process_playlist_url(root, url, log_func=None):
+    # An interrupted download of the same playlist can go on where it stopped instead of starting over
+    run = manifest.load_manifest(url)
+    if run is not None:
+        done, total = run.counts()
+        if done < total and messagebox.askyesno(
+                "Resume Playlist", f"The last download of this playlist stopped after {done} of {total} videos.\nResume it?"):
+            return resume_playlist(root, url, log_func, run)
     handler = PlaylistHandler(root, url, log_func)
     handler.fetch_playlist_info()
     if handler.playlist_info:
@@ -17,6 +53,15 @@ def process_playlist_url(root, url, log_func=None):
         return handler if handler.selected_format else None
     return None
 
+# Resume command for an interrupted playlist download, returns None when there is nothing to resume
+def resume_playlist(root, url, log_func=None, run=None):
+    run = run or manifest.load_manifest(url)
+    if run is None:
+        return None
+    handler = PlaylistHandler(root, url, log_func=log_func)
+    handler.resume(run)
+    return handler
+
 # Class to handle playlist operationss
 class PlaylistHandler:
     def __init__(self, root, url, parent=None, log_func=None):
@@ -31,6 +76,18 @@ class PlaylistHandler:
         self.fetch_cancelled = False
         self.size_calculation_thread = None
         self.parent = parent
+        self.parallel_downloads = 3  # Videos downloaded at the same time
+        # Entries stream in from a background thread, self.videos grows while it runs
+        self.entries_condition = threading.Condition()
+        self.entries_loading = False
+        self.enumeration_cancelled = False
+        self.video_limit = None  # None downloads every video
+        self.delta = playlistcache.PlaylistDelta()
+        self.new_only = False  # Download only the entries added since the last sync
+        self.sync_requested = False
+        self.manifest = None  # Record of the running download, what a resume picks up
+        self.skip_ids = set()  # Entries a resumed run already has in its manifest
+        self.resumed_items = 0  # Unfinished items a resumed run took from its manifest
      #setting output directory   
     def get_output_path(self):
         if self.parent and hasattr(self.parent, 'save_path_entry'):
@@ -45,8 +102,10 @@ class PlaylistHandler:
             
         return output_path
         
-    # Fetch playlist information
+    # Fetch playlist information, returns once the first page of entries is in and keeps
+    # loading the rest in the background so the dialog and the downloads can start early
     def fetch_playlist_info(self):
+        import yt_dlp
         # Set up yt-dlp options for playlist info extraction
         ydl_opts = {
             'quiet': True,
@@ -55,26 +114,115 @@ class PlaylistHandler:
         }
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                self.playlist_info = ydl.extract_info(self.url, download=False)
-
-                if self.playlist_info and 'entries' in self.playlist_info:
-                    self.videos = self.playlist_info['entries']
-                    self.log(f"Found {len(self.videos)} videos in playlist", "INFO")
-                    return True
-                else:
-                    self.log("No playlist information found", "ERROR")
-                    return False
+            ydl = yt_dlp.YoutubeDL(ydl_opts)
+            # Without processing, the entries come back as a lazy iterator that pages them in on demand
+            info = extract_playlist(ydl, self.url)
+            if not info or 'entries' not in info:
+                self.log("No playlist information found", "ERROR")
+                return False
+            entries = info.pop('entries')
+            self.playlist_info = info
+            self.videos = []
+            # Compared against the last sync of this playlist while the entries stream in
+            self.delta = playlistcache.PlaylistDelta(playlistcache.load_playlist(self.url), info.get('playlist_count'))
+            self.entries_loading = True
+            threading.Thread(target=self._stream_entries, args=(ydl, entries), daemon=True).start()
+            
+            with self.entries_condition:
+                while self.entries_loading and not self.videos:
+                    self.entries_condition.wait(0.5)
+            if not self.videos:
+                self.log("No playlist information found", "ERROR")
+                return False
+            self.log(f"Found {len(self.videos)} videos so far, loading the rest of the playlist in the background", "INFO")
+            return True
         except Exception as e:
             self.log(f"Error fetching playlist info: {str(e)}", "ERROR")
             messagebox.showerror("Network Error", "Connection failed. Try again.")
             return False
+
+    # Background thread, walks the lazy entries page by page and publishes them as they arrive
+    def _stream_entries(self, ydl, entries):
+        last_update = 0
+        try:
+            with ydl:
+                for entry in entries:
+                    if self.enumeration_cancelled:
+                        break
+                    if not entry:
+                        continue  # Unavailable videos come back empty
+                    with self.entries_condition:
+                        self.videos.append(entry)
+                        self.entries_condition.notify_all()
+                    if self.delta.add(entry):
+                        # The rest matches the last sync, take it from the cache instead of paging it in
+                        with self.entries_condition:
+                            self.videos.extend(self.delta.remaining())
+                            self.entries_condition.notify_all()
+                        self.log("Rest of the playlist is unchanged since the last sync, using cached entries", "INFO")
+                        break
+                    # Refresh the count a few times a second, not for every entry
+                    if time.time() - last_update > 0.5:
+                        last_update = time.time()
+                        self.root.after(0, self.on_entries_updated)
+        except Exception as e:
+            self.log(f"Error loading playlist entries: {str(e)}", "ERROR")
+        finally:
+            with self.entries_condition:
+                self.entries_loading = False
+                self.entries_condition.notify_all()
+            self.log(f"Found {len(self.videos)} videos in playlist", "INFO")
+            if self.delta.has_snapshot and not self.enumeration_cancelled:
+                self.log(f"Since the last sync: {len(self.delta.new)} new, {len(self.delta.removed())} removed", "INFO")
+            if self.sync_requested and not self.enumeration_cancelled:
+                self.save_snapshot()
+            self.root.after(0, self.on_entries_updated)
+
+    # Yield entries in playlist order, waiting for the ones that are still loading
+    def iter_videos(self):
+        index = 0
+        while True:
+            with self.entries_condition:
+                while index >= len(self.videos) and self.entries_loading and not self.enumeration_cancelled:
+                    self.entries_condition.wait(0.5)
+                if index >= len(self.videos):
+                    return
+                video = self.videos[index]
+            index += 1
+            yield video
+
+    # Remember the entries as the state of the last sync
+    def save_snapshot(self):
+        with self.entries_condition:
+            entries = list(self.videos)
+        playlistcache.save_playlist(self.url, self.playlist_info.get('title'), entries)
+
+    # Block until every entry is loaded
+    def wait_for_entries(self):
+        with self.entries_condition:
+            while self.entries_loading and not self.enumeration_cancelled:
+                self.entries_condition.wait(0.5)
+
+    # Runs in the Tk thread whenever more entries arrived
+    def on_entries_updated(self):
+        count = len(self.videos)
+        suffix = " (loading more...)" if self.entries_loading else ""
+        if getattr(self, 'videos_label', None) is not None and self.videos_label.winfo_exists():
+            self.videos_label.config(text=f"Videos: {count}{suffix}")
+            self.limit_spinbox.config(to=min(100, count))
+            if self.delta.has_snapshot:
+                self.new_only_check.config(text=f"Only videos new since the last sync ({len(self.delta.new)}{suffix and '+'})")
+        if getattr(self, 'size_label', None) is not None and self.size_label.winfo_exists():
+            self.refresh_size_label()
+        # Downloads started before the playlist finished loading learn their total now
+        if not self.entries_loading and getattr(self, 'progress_lock', None) is not None:
+            self.update_overall_progress()
         
         # Show dialog for format selection and create pop up, u can modify to make it more appealing
     def show_format_selection_dialog(self):
         self.format_dialog = tk.Toplevel(self.root)
         self.format_dialog.title("Playlist Download Options")
-        self.format_dialog.geometry("500x450")
+        self.format_dialog.geometry("500x490")
         self.format_dialog.resizable(False, False)
         self.format_dialog.transient(self.root)
         self.format_dialog.grab_set()
@@ -85,7 +233,8 @@ class PlaylistHandler:
         # Playlist info
         playlist_title = self.playlist_info.get('title', 'Unknown Playlist')
         ttk.Label(main_frame, text=f"Playlist: {playlist_title}", font=('Arial', 12, 'bold')).pack(anchor=tk.W, pady=(0, 10))
-        ttk.Label(main_frame, text=f"Videos: {len(self.videos)}").pack(anchor=tk.W, pady=(0, 10))
+        self.videos_label = ttk.Label(main_frame, text=f"Videos: {len(self.videos)}" + (" (loading more...)" if self.entries_loading else ""))
+        self.videos_label.pack(anchor=tk.W, pady=(0, 10))
         
         # Video limit selection
         ttk.Label(main_frame, text="Number of videos to download:", font=('Arial', 10, 'bold')).pack(anchor=tk.W, pady=(0, 5))
@@ -107,6 +256,21 @@ class PlaylistHandler:
         self.limit_spinbox.pack(side=tk.LEFT, padx=(0, 5))
         ttk.Label(limit_frame, text="videos").pack(side=tk.LEFT)
 
+        # How many videos download at the same time
+        parallel_frame = ttk.Frame(main_frame)
+        parallel_frame.pack(fill=tk.X, pady=(0, 10), anchor=tk.W)
+        ttk.Label(parallel_frame, text="Parallel downloads:").pack(side=tk.LEFT, padx=(0, 5))
+        self.parallel_var = tk.StringVar(value=str(min(self.parallel_downloads, self._max_parallel())))
+        # More than the scheduler lets run at once would only queue behind its background slots
+        ttk.Spinbox(parallel_frame, from_=1, to=self._max_parallel(), width=5, textvariable=self.parallel_var).pack(side=tk.LEFT)
+
+        # Playlists synced before can download just what was added since
+        self.new_only_var = tk.BooleanVar(value=False)
+        self.new_only_check = ttk.Checkbutton(main_frame, variable=self.new_only_var,
+                                              text=f"Only videos new since the last sync ({len(self.delta.new)}{'+' if self.entries_loading else ''})")
+        if self.delta.has_snapshot:
+            self.new_only_check.pack(anchor=tk.W, pady=(0, 10))
+
         ttk.Label(main_frame, text="Select Download Type:", font=('Arial', 10, 'bold')).pack(anchor=tk.W, pady=(10, 5))
         
         # Radio buttons for format type - Set default to audio u can change if u wish
@@ -231,6 +395,7 @@ class PlaylistHandler:
         self.selected_format = None
         self.selected_format_type = None
         self.fetch_cancelled = True  # Stop any ongoing calculations        
+        self.enumeration_cancelled = True  # And stop paging in the rest of the playlist
         self.format_dialog.destroy() # Close dialog
 
     # Handle Download button click
@@ -244,9 +409,14 @@ class PlaylistHandler:
             try:
                 self.video_limit = int(self.limit_var.get())
             except ValueError:
-                self.video_limit = len(self.videos)  # Default to all videos if invalid input
+                self.video_limit = None  # Default to all videos if invalid input
         else:
-            self.video_limit = len(self.videos)  # All videos
+            self.video_limit = None  # All videos, including the ones still loading
+        try:
+            self.parallel_downloads = max(1, min(self._max_parallel(), int(self.parallel_var.get())))
+        except ValueError:
+            pass  # Keep the default
+        self.new_only = self.delta.has_snapshot and self.new_only_var.get()
         
         self.fetch_cancelled = True  # Stop any ongoing calculations
         self.format_dialog.destroy() # Close dialog
@@ -256,26 +426,24 @@ class PlaylistHandler:
     def show_progress_dialog(self, total_videos):
         self.progress_window = tk.Toplevel(self.root)
         self.progress_window.title("Download Progress")
-        self.progress_window.geometry("400x150")
+        # One row per video downloading at the same time
+        self.progress_window.geometry(f"400x{150 + 45 * self.parallel_downloads}")
         
         # Create frame for progress info
         frame = ttk.Frame(self.progress_window, padding="10")
         frame.pack(fill=tk.BOTH, expand=True)
         
-        # Video info label (current video title)
-        self.video_label = ttk.Label(frame, text="")
-        self.video_label.pack(fill=tk.X)
-        
-        # Status label for percentage
+        # Status label for the playlist as a whole
         self.status_label = ttk.Label(frame, text="Preparing download...")
         self.status_label.pack(fill=tk.X)
         
-        # Current file progress bar
-        self.current_progress_bar = ttk.Progressbar(frame, orient="horizontal", length=380, mode="determinate")
-        self.current_progress_bar.pack(fill=tk.X, pady=5)
+        # Rows of the videos being downloaded right now, index -> (frame, label, progress bar)
+        self.rows_frame = ttk.Frame(frame)
+        self.rows_frame.pack(fill=tk.X)
+        self.progress_rows = {}
         
         # Overall progress label
-        self.overall_label = ttk.Label(frame, text=f"Overall progress: 0/{total_videos}")
+        self.overall_label = ttk.Label(frame, text=f"Overall progress: 0/{total_videos if total_videos is not None else '?'}")
         self.overall_label.pack(fill=tk.X)
         
         # Overall progress bar
@@ -286,66 +454,133 @@ class PlaylistHandler:
         cancel_btn = ttk.Button(frame, text="Cancel", command=self.cancel_download)
         cancel_btn.pack()
         
-        # Set up progress tracking variables
+        # Set up progress tracking variables, workers update the counters under the lock
         self.total_videos = total_videos
         self.completed_videos = 0
+        self.failed_videos = 0
+        self.skipped_videos = 0  # Found on disk through the content index
+        self.queued_videos = 0
+        self.waiting_retries = 0
+        self.retry_counts = {}  # index -> times the item was retried, for the final report
+        self.unfinished = 0  # items queued and not finished yet, the ones waiting to be retried included
+        self.progress_lock = threading.Lock()
+        self.items_finished = threading.Condition(self.progress_lock)
         self.download_cancelled = False
+        self.progress_window.protocol("WM_DELETE_WINDOW", self.cancel_download)
+        
+        # Progress of every item is applied at a fixed frame rate, however many items report how often
+        self.progress_bus = progressbus.ProgressBus(self.root, self.apply_progress,
+                                                    alive=lambda: self.progress_window.winfo_exists())
+        self.progress_bus.start()
 
-    def update_download_progress(self, d):
-        # Skip update if download was cancelled
-        if hasattr(self, 'download_cancelled') and self.download_cancelled:
+    # Runs in the Tk thread
+    def add_progress_row(self, index, title):
+        if not hasattr(self, 'progress_window') or not self.progress_window.winfo_exists():
             return
-        
-        # Check if progress window still exists
+        row = ttk.Frame(self.rows_frame)
+        row.pack(fill=tk.X, pady=2)
+        title_text = title if len(title) <= 50 else title[:47] + "..."
+        label = ttk.Label(row, text=f"{index + 1}. {title_text}")
+        label.pack(fill=tk.X)
+        bar = ttk.Progressbar(row, orient="horizontal", length=380, mode="determinate")
+        bar.pack(fill=tk.X)
+        self.progress_rows[index] = (row, label, bar)
+
+    # Runs in the Tk thread
+    def remove_progress_row(self, index):
+        row = self.progress_rows.pop(index, None)
+        if row and row[0].winfo_exists():
+            row[0].destroy()
+
+    # Runs in the Tk thread
+    def update_overall_progress(self):
         if not hasattr(self, 'progress_window') or not self.progress_window.winfo_exists():
             return
+        with self.progress_lock:
+            done, failed, queued = self.completed_videos, self.failed_videos, self.queued_videos
+            retrying = self.waiting_retries
+        if self.total_videos is None and not self.entries_loading:
+            self.total_videos = len(self.get_download_items_with_limit()) + self.resumed_items
+        # While the playlist is still loading, progress is measured against what is queued so far
+        total = self.total_videos or max(queued, 1)
+        text = f"Overall progress: {done}/{self.total_videos if self.total_videos is not None else str(queued) + '+'}"
+        if failed:
+            text += f" ({failed} failed)"
+        if retrying:
+            text += f" ({retrying} waiting to retry)"
+        self.overall_label['text'] = text
+        self.overall_progress_bar['value'] = (done / total) * 100
+
+    def update_download_progress(self, d, index=None):
+        # Cancel in-flight downloads cooperatively, yt-dlp stops when its hook raises
+        if hasattr(self, 'download_cancelled') and self.download_cancelled:
+            raise Exception("Download cancelled by user")
         
+        # Runs on the download thread, it only publishes to the progress bus and never touches Tk
         try:
             # Get status from yt-dlp dictionary by hookig
             status = d.get('status')
             
             if status == 'downloading':
-                # Update video info
-                filename = d.get('filename', '').split('/')[-1] if d.get('filename') else 'Unknown'
-                self.video_label['text'] = f"Downloading: {filename}"
-                
                 # Update percentage
+                text = None
+                percent = None
                 if d.get('downloaded_bytes') is not None and d.get('total_bytes') is not None:
                     percent = (d['downloaded_bytes'] / d['total_bytes']) * 100
                     speed = d.get('speed', 0)
                     speed_str = f"{speed/1024/1024:.2f} MB/s" if speed else "Unknown speed"
                     eta = d.get('eta', 0)
                     eta_str = f"{eta} sec" if eta else "Unknown"
-                    
-                    self.status_label['text'] = f"{percent:.1f}% | {speed_str} | ETA: {eta_str}"
-                    self.current_progress_bar['value'] = percent
+                    text = f"{percent:.1f}% | {speed_str} | ETA: {eta_str}"
                 elif d.get('downloaded_bytes') is not None and d.get('total_bytes_estimate') is not None:
                     percent = (d['downloaded_bytes'] / d['total_bytes_estimate']) * 100
-                    self.status_label['text'] = f"{percent:.1f}% (estimated)"
-                    self.current_progress_bar['value'] = percent
+                    text = f"{percent:.1f}% (estimated)"
+                if percent is not None:
+                    self.progress_bus.publish(index, (percent, text))
             
             elif status == 'finished':
-                # Update for completed video
-                self.completed_videos += 1
-                overall_progress = (self.completed_videos / self.total_videos) * 100
-                self.overall_label['text'] = f"Overall progress: {self.completed_videos}/{self.total_videos}"
-                self.overall_progress_bar['value'] = overall_progress
-                self.current_progress_bar['value'] = 100
-                self.status_label['text'] = "Completed current file"
-            
-            # Force UI update and handling error quitely to avoid breaking operations
-            self.progress_window.update()
+                # One item can finish several files (video and audio before a merge), the item
+                # itself is counted when its download returns
+                self.progress_bus.publish(index, (100, "Processing..."))
         except Exception as e:
             self.log(f"Error updating progress: {str(e)}", "ERROR")
 
+    # Runs in the Tk thread once per frame with the latest state of every row that changed
+    def apply_progress(self, key, state):
+        if key == 'overall':
+            self.update_overall_progress()
+        else:
+            self._set_row_progress(key, *state)
+
+    # Runs in the Tk thread
+    def _set_row_progress(self, index, percent, text):
+        row = self.progress_rows.get(index)
+        if row and row[0].winfo_exists():
+            row[2]['value'] = percent
+            if text:
+                title = row[1]['text'].split(' | ')[0]
+                row[1]['text'] = f"{title} | {text}"
+
     def cancel_download(self):
         self.download_cancelled = True
+        self.enumeration_cancelled = True
+        # Items that have not started yet are dropped right away
+        for future in getattr(self, 'download_futures', []):
+            future.cancel()
+        if hasattr(self, 'retry_queue'):
+            self.retry_queue.close()
         if hasattr(self.root, 'cancel_download'):
             self.root.cancel_download()
         self.progress_window.destroy()
 
+    # Videos downloaded at the same time can not go past the scheduler's limit on concurrent downloads
+    def _max_parallel(self):
+        return scheduler.get_scheduler().max_concurrent
+
     # Download and update progress using hook
-    def start_download(self):
+    def start_download(self, parallel=None):
+        if parallel is not None:
+            self.parallel_downloads = max(1, min(self._max_parallel(), parallel))
         output_path = self.get_output_path()        
         # If empty for some reason, set to default application folder
         if not output_path:
@@ -354,100 +589,246 @@ class PlaylistHandler:
             if not os.path.exists(output_path): #Create directory if does not exist
                 os.makedirs(output_path)
         
-        # Get download items with applied limit
-        items = self.get_download_items_with_limit()
-        if items:
+        # This download is the new sync point of the playlist
+        self.sync_requested = True
+        if not self.entries_loading:
+            self.save_snapshot()
+        
+        # A new run replaces whatever was left of the previous one
+        self.manifest = manifest.PlaylistManifest(
+            self.url, self.playlist_info.get('title'), self.selected_format, self.selected_format_type,
+            output_path, self.parallel_downloads, self.video_limit, self.new_only)
+        
+        # Get download items with applied limit, later pages are queued as they load
+        items = self.iter_download_items_with_limit()
+        first_item = next(items, None)
+        if first_item:
             try:
-                # Show progress dialog
-                self.show_progress_dialog(len(items))
+                # Show progress dialog, the total is only known once the playlist finished loading
+                total = None
+                if not self.entries_loading:
+                    total = len(self.get_download_items_with_limit())
+                self.show_progress_dialog(total)
                 
                 # Start download in a thread to keep UI responsive
                 download_thread = threading.Thread(
                     target=self._download_thread,
-                    args=(items, output_path)
+                    args=(itertools.chain([first_item], items), output_path)
                 )
                 download_thread.daemon = True
                 download_thread.start()
                 
-                self.log(f"Started downloading {len(items)} videos from playlist", "INFO")
+                self.log(f"Started downloading videos from playlist, {self.parallel_downloads} at a time", "INFO")
             except Exception as e:
                 self.log(f"Error starting download: {str(e)}", "ERROR")
                 messagebox.showerror("Error", f"Failed to start download: {str(e)}")
 
+    # Continue an interrupted run from its manifest. Finished files are checked by size instead of being
+    # extracted again, only the items that did not finish are downloaded
+    def resume(self, run):
+        self.manifest = run
+        self.selected_format = run.data['format']
+        self.selected_format_type = run.data['type']
+        self.parallel_downloads = min(self._max_parallel(), run.data.get('parallel') or self.parallel_downloads)
+        run.verify()
+        items = run.unfinished_items()
+        done, known = run.counts()
+        self.log(f"Resuming playlist download, {done} of {known} videos already done", "INFO")
+        
+        total = len(items)
+        if not run.data.get('queued_all') and not run.data.get('new_only'):
+            # The run stopped before every video was queued, the rest of the playlist is loaded again
+            self.fetch_playlist_info()
+            if self.playlist_info:
+                self.video_limit = run.data.get('video_limit')
+                self.skip_ids = set(run.data['items'])
+                self.resumed_items = len(items)
+                items = itertools.chain(items, self.iter_download_items_with_limit(False))
+                total = None
+        if total is not None:
+            run.all_queued()
+        
+        items = iter(items)
+        first_item = next(items, None)
+        if first_item is None:
+            self.log("Nothing left to download in this playlist", "INFO")
+            run.remove()
+            return
+        self.show_progress_dialog(total)
+        download_thread = threading.Thread(
+            target=self._download_thread,
+            args=(itertools.chain([first_item], items), run.data.get('output_path') or self.get_output_path())
+        )
+        download_thread.daemon = True
+        download_thread.start()
+
     def _download_thread(self, items, output_path):
-        for i, item in enumerate(items):
-            if hasattr(self, 'download_cancelled') and self.download_cancelled:
-                break
-                
-            self.log(f"Downloading ({i+1}/{len(items)}): {item['title']}", "INFO")
+        # Videos run on a bounded pool, the process wide scheduler may still hold some of them back.
+        # items can still be loading, only a few are queued ahead of the workers
+        self.download_futures = []
+        self.retry_queue = retry.RetryQueue()
+        slots = threading.BoundedSemaphore(self.parallel_downloads * 2)
+        with ThreadPoolExecutor(max_workers=self.parallel_downloads) as pool:
+            self.download_pool = pool
+            for i, item in enumerate(items):
+                slots.acquire()
+                if self.download_cancelled:
+                    break
+                with self.progress_lock:
+                    self.queued_videos += 1
+                    self.unfinished += 1
+                if self.manifest:
+                    self.manifest.add(item)
+                # The slot is freed after the first attempt, items waiting to be retried do not hold back new ones
+                future = pool.submit(self._download_item, i, item, output_path)
+                future.add_done_callback(lambda f: slots.release())
+                self.download_futures.append(future)
+            else:
+                if self.manifest:
+                    self.manifest.all_queued()
             
-            try:
-                # Get format from the item
-                format_string = item.get('format', 'best')
-                format_type = item.get('type', 'video')
-                
-                # Base options
-                ydl_opts = {
-                    'outtmpl': os.path.join(output_path, '%(title)s.%(ext)s'),
-                    'progress_hooks': [self.update_download_progress],
-                }
-                
-                # Set format-specific options
-                if format_type == 'audio':
-                    # Parse the format string for audio options
-                    format_parts = format_string.split(' --')
-                    format_selector = format_parts[0].replace('-f ', '')
-                    
-                    ydl_opts['format'] = format_selector
-                    
-                    # Apply audio extraction options based on format
-                    if any('mp3' in part for part in format_parts):
-                        ydl_opts['postprocessors'] = [{
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': 'mp3',
-                            'preferredquality': '192' if '192K' in format_string else '128',
-                        }]
-                        ydl_opts['extractaudio'] = True
-                        ydl_opts['audioformat'] = 'mp3'
-                        if 'prefer-ffmpeg' in format_string:
-                            ydl_opts['prefer_ffmpeg'] = True
-                            
-                    elif any('m4a' in part for part in format_parts):
-                        ydl_opts['postprocessors'] = [{
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': 'm4a',
-                            'preferredquality': '0',
-                        }]
-                        ydl_opts['extractaudio'] = True
-                        ydl_opts['audioformat'] = 'm4a'
-                        
-                    elif any('vorbis' in part for part in format_parts):
-                        ydl_opts['postprocessors'] = [{
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': 'vorbis',
-                            'preferredquality': '0',
-                        }]
-                        ydl_opts['extractaudio'] = True
-                        ydl_opts['audioformat'] = 'vorbis'
-                else:
-                    # For video, just use the format string directly
-                    ydl_opts['format'] = format_string
-                
-                # Download the video
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([item['url']])
-                    
-            except Exception as e:
-                self.log(f"Error downloading {item['title']}: {str(e)}", "ERROR")
+            # Retries are submitted after their delay, the pool stays open until every item is finished
+            with self.items_finished:
+                while self.unfinished and not self.download_cancelled:
+                    self.items_finished.wait(0.5)
+        self.retry_queue.close()
         
         # On completion, update UI
         if not hasattr(self, 'download_cancelled') or not self.download_cancelled:
-            self.on_download_complete()
+            self.root.after(0, self.on_download_complete)
+
+    def _download_item(self, index, item, output_path, retries=0):
+        import yt_dlp
+        ok = False
+        error = None
+        acquired = False
+        skipped = False
+        retrying = False
+        final_paths = []
+        downloads = scheduler.get_scheduler()
+        try:
+            if self.download_cancelled:
+                return
+            
+            # The same video in the same format may already be on disk from another playlist or a search
+            existing = contentindex.find_existing(item.get('id'), item.get('format', 'best'), item.get('type', 'video'), output_path)
+            if existing:
+                self.log(f"Already downloaded ({index+1}/{self.total_videos or '?'}): {item['title']} -> {existing}", "INFO")
+                if self.manifest and item.get('id'):
+                    self.manifest.finished(item['id'], True, existing)
+                ok = skipped = True
+                return
+            
+            self.log(f"Downloading ({index+1}/{self.total_videos or '?'}): {item['title']}", "INFO")
+            # Playlist items run in the background class, a download started from a tab goes first
+            acquired = downloads.acquire(scheduler.BACKGROUND, lambda: self.download_cancelled)
+            if not acquired:
+                return
+            self.root.after(0, lambda: self.add_progress_row(index, item['title']))
+            
+            # Options of the playlist's format are compiled once and reused for every item
+            ydl_opts = ydlopts.build_opts(
+                item.get('format', 'best'), item.get('type', 'video'),
+                outtmpl=os.path.join(output_path, '%(title)s.%(ext)s'),
+                progress_hooks=[lambda d: self.update_download_progress(d, index), downloads.progress_hook()],
+                # Several videos at once would interleave their console output
+                quiet=self.parallel_downloads > 1,
+            )
+            # The file is only final once yt-dlp moved it into place, after merging and conversion
+            ydl_opts['postprocessor_hooks'] = [
+                lambda d: final_paths.append(d['info_dict'].get('filepath'))
+                if d.get('status') == 'finished' and d.get('postprocessor') == 'MoveFilesAfterDownload' else None]
+            if self.manifest and item.get('id'):
+                self.manifest.update(item['id'], status=manifest.DOWNLOADING)
+                ydl_opts['progress_hooks'].append(
+                    lambda d: self.manifest.progress(item['id'], d.get('downloaded_bytes')) if d.get('status') == 'downloading' else None)
+            
+            # Download the video
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                # The sampled extractions of calculate_playlist_size are reused from the info cache
+                ok = infocache.download(ydl, item['url']) == 0
+                if not ok:
+                    error = "yt-dlp reported an error"
+            if ok and final_paths:
+                contentindex.record(item.get('id'), item.get('format', 'best'), item.get('type', 'video'), final_paths[-1])
+                
+        except Exception as e:
+            error = e
+            if not self.download_cancelled:
+                self.log(f"Error downloading {item['title']}: {str(e)}", "ERROR")
+        finally:
+            if acquired:
+                downloads.release()
+                retrying = not ok and not self.download_cancelled and self._schedule_retry(index, item, output_path, retries, error)
+                # A retried item stays downloading in the manifest until its last attempt
+                if self.manifest and item.get('id') and not self.download_cancelled and not retrying:
+                    self.manifest.finished(item['id'], ok, final_paths[-1] if final_paths else None)
+                self.root.after(0, lambda: self.remove_progress_row(index))
+            # Counted once per item, whatever number of files it produced and however often it was retried.
+            # Every way out ends the item, _download_thread waits for unfinished to reach 0
+            with self.progress_lock:
+                if not retrying:
+                    if acquired or skipped or error is not None:
+                        self.completed_videos += 1
+                        if skipped:
+                            self.skipped_videos += 1
+                        elif not ok:
+                            self.failed_videos += 1
+                    self.unfinished -= 1
+                    self.items_finished.notify_all()
+            self.progress_bus.publish('overall')
+
+    # Put a failed item on the delayed retry queue if its error is worth another try, False when the failure is final
+    def _schedule_retry(self, index, item, output_path, retries, error):
+        category = retry.classify(error)
+        delay = None
+        if category == retry.FORMAT_UNAVAILABLE:
+            # Straight back with a simpler format, waiting would not make the format appear
+            fallback = retry.fallback_format(item.get('format', 'best'), item.get('type', 'video'))
+            if fallback and retries < retry.MAX_RETRIES:
+                item = dict(item, format=fallback)
+                delay = 0
+        else:
+            delay = retry.next_delay(category, retries)
+        if delay is None:
+            return False
+        with self.progress_lock:
+            self.retry_counts[index] = retries + 1
+            self.waiting_retries += 1
+        if not self.retry_queue.schedule(delay, lambda: self._resubmit(index, item, output_path, retries + 1)):
+            with self.progress_lock:
+                self.waiting_retries -= 1
+            return False
+        self.log(f"Retrying {item['title']} in {delay:.1f}s ({category}, attempt {retries + 2})", "INFO")
+        return True
+
+    # Runs on the retry queue's thread once the backoff is over
+    def _resubmit(self, index, item, output_path, retries):
+        with self.progress_lock:
+            self.waiting_retries -= 1
+        if self.download_cancelled:
+            return
+        self.download_futures.append(self.download_pool.submit(self._download_item, index, item, output_path, retries))
 
     def on_download_complete(self):
+        if self.manifest:
+            done, total = self.manifest.counts()
+            if done == total and self.manifest.data['queued_all']:
+                self.manifest.remove()
+            else:
+                self.log(f"{total - done} videos did not finish, open the playlist again to resume them", "INFO")
         if hasattr(self, 'progress_window') and self.progress_window.winfo_exists():
-            self.status_label["text"] = "All downloads completed!"
-            self.current_progress_bar["value"] = 100
+            failed = getattr(self, 'failed_videos', 0)
+            retry_counts = getattr(self, 'retry_counts', {})
+            notes = []
+            if failed:
+                notes.append(f"{failed} failed")
+            if getattr(self, 'skipped_videos', 0):
+                notes.append(f"{self.skipped_videos} already on disk")
+            if retry_counts:
+                notes.append(f"{len(retry_counts)} retried, {sum(retry_counts.values())} retries")
+                self.log("Retries per video: " + ", ".join(f"#{index + 1}: {count}" for index, count in sorted(retry_counts.items())), "INFO")
+            self.status_label["text"] = f"All downloads completed! ({', '.join(notes)})" if notes else "All downloads completed!"
             self.overall_progress_bar["value"] = 100
             
             # Change cancel button to close the pop up
@@ -462,37 +843,48 @@ class PlaylistHandler:
             self.root.on_download_complete()
 
     #Download according to selected to selected format and download playlist limit
-    def get_download_items_with_limit(self):
+    #Yields items as soon as their entry is loaded, waiting for later pages when needed.
+    #With new_only (or self.new_only) only entries added since the last sync are returned
+    def iter_download_items_with_limit(self, new_only=None):
         if not self.playlist_info or not self.selected_format:
-            return []
-        
-        items = []# Format items for download with the selected format
+            return
+        if new_only is None:
+            new_only = self.new_only
+        videos = self.iter_videos()
+        if new_only:
+            # Anything not in the snapshot of the last sync is new, known entries are skipped as they stream
+            videos = (video for video in videos if video.get('id') not in self.delta.positions)
         
         # Apply the video limit
-        video_count = min(self.video_limit, len(self.videos)) if hasattr(self, 'video_limit') else len(self.videos)        
-        for i, video in enumerate(self.videos):
-            if i >= video_count:
+        for i, video in enumerate(videos):
+            if self.video_limit is not None and i >= self.video_limit:
                 break
                 
-            if video.get('id'):
-                items.append({
+            if video.get('id') and video['id'] not in self.skip_ids:
+                yield {
+                    'id': video['id'],
                     'url': f"https://www.youtube.com/watch?v={video['id']}",
                     'title': video.get('title', 'Unknown'),
                     'format': self.selected_format,
                     'type': self.selected_format_type
-                })
-        return items
+                }
+
+    def get_download_items_with_limit(self, new_only=None):
+        # Format items for download with the selected format
+        return list(self.iter_download_items_with_limit(new_only))
         
     def get_download_items(self):
         # Return list of videos with selected format info
         if not self.playlist_info or not self.selected_format:
             return []
             
-        # Format items for download with the selected format
+        # Format items for download with the selected format, every entry has to be loaded first
+        self.wait_for_entries()
         items = []
         for video in self.videos:
             if video.get('id'):
                 items.append({
+                    'id': video['id'],
                     'url': f"https://www.youtube.com/watch?v={video['id']}",
                     'title': video.get('title', 'Unknown'),
                     'format': self.selected_format,
@@ -500,84 +892,95 @@ class PlaylistHandler:
                 })
         return items
 ######################End of the block
-    # Calculate approximate size of playlist with selected format
+    # Calculate approximate size of playlist with selected format. A few videos picked at random are
+    # extracted in parallel, the estimate and its 95% prediction range tighten as each one comes back
     def calculate_playlist_size(self):
+        import yt_dlp
         if not hasattr(self, 'size_label') or not self.playlist_info or not self.videos:
             return
             
         # Skip calculation if the dialog is closed
         if not hasattr(self, 'format_dialog') or not self.format_dialog.winfo_exists():
             return
+
+        # A newer calculation (format changed) makes this one stale
+        self.size_generation = getattr(self, 'size_generation', 0) + 1
+        generation = self.size_generation
+        def stale():
+            return self.fetch_cancelled or generation != self.size_generation
             
         try:
-            # Get the first video to estimate size
-            if not self.videos[0].get('id') or self.fetch_cancelled:
+            format_display = self.format_var.get()
+            if not format_display or stale():
                 return
-                
-            video_url = f"https://www.youtube.com/watch?v={self.videos[0]['id']}"
+            full_format = self.format_values.get(format_display, "")
             format_type = self.format_type_var.get()
-            format_display = self.format_var.get()
+            # Only the format selector matters for info extraction
+            format_string = ydlopts.compile_format(full_format, format_type)['format']
             
-            if not format_display or self.fetch_cancelled:
-                return
-                
-            # Update label to show we're calculating and we not just quite chilling
-            if hasattr(self, 'size_label') and self.size_label.winfo_exists():
-                self.size_label.config(text="Estimated Size: Calculating...")
-            else:
-                return
+            estimator = sizeestimate.PlaylistSizeEstimator(full_format, sizeestimate.target_audio_bitrate(full_format, format_type))
+            self.size_estimator = estimator
+            # Earlier observations of this format may already give an estimate
+            self.root.after(0, self.refresh_size_label)
             
-            # Get format string but remove any extra options for info extraction
-            format_string = self.format_values.get(format_display, "").split(" --")[0]
+            with self.entries_condition:
+                candidates = [video for video in self.videos if video.get('id')]
+            samples = random.sample(candidates, min(SIZE_SAMPLES, len(candidates)))
             
-            # Get info for the first video
             ydl_opts = {
                 'quiet': True,
                 'format': format_string,
                 'no_warnings': True,
             }
             
-            # Check if calculation should be cancelled
-            if self.fetch_cancelled:
-                return                
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=False)
-                if self.fetch_cancelled or not info:
-                    return                    
-                # Get filesize from the selected format
-                filesize = 0
-                for fmt in info.get('formats', []):
-                    if fmt.get('format_id') == info.get('format_id'):
-                        filesize = fmt.get('filesize', 0)
-                        break                
-                # If we fail lets try the general filesize
-                if not filesize:
-                    filesize = info.get('filesize', 0)                
-                # If we fail, we can use estimation based on duration
-                if not filesize and info.get('duration'):
-                    if format_type == "video":
-                        if "720p" in format_display:
-                            filesize = info.get('duration', 0) * 350000  # ~350KB/s for 720p
-                        else:
-                            filesize = info.get('duration', 0) * 200000  # ~200KB/s for 360p
-                    else:  # audio
-                        if "192kbps" in format_display:
-                            filesize = info.get('duration', 0) * 24000  # ~24KB/s for 192kbps
-                        else:
-                            filesize = info.get('duration', 0) * 16000  # ~16KB/s for 128kbps
-                
-                # Calculate total size for all videos
-                total_size = filesize * len(self.videos)
-                
-                # Update size label if it still exists
-                if hasattr(self, 'size_label') and self.size_label.winfo_exists() and not self.fetch_cancelled:
-                    self.size_label.config(text=f"Estimated Size: {format_size(total_size)}")
+            def sample(video):
+                if stale():
+                    return
+                video_url = f"https://www.youtube.com/watch?v={video['id']}"
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    # Cached, a video sampled here does not need a second extraction when it is downloaded
+                    info = ydl.process_ie_result(infocache.extract_info(ydl, video_url), download=False)
+                size = sizeestimate.selected_size(info) if info else None
+                if size and not stale():
+                    estimator.add_sample(size, info.get('duration') or video.get('duration'))
+                    self.root.after(0, self.refresh_size_label)
+            
+            with ThreadPoolExecutor(max_workers=SIZE_SAMPLE_WORKERS) as pool:
+                for future in [pool.submit(sample, video) for video in samples]:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.log(f"Size sample failed: {str(e)}", "DEBUG")
+            
+            if not stale() and estimator.sample_count == 0 and not estimator.fixed_bitrate:
+                self.root.after(0, lambda: self.size_label.config(text="Size: Estimation failed") if self.size_label.winfo_exists() else None)
                     
         except Exception as e:
             # Update label if it still exists, i mean if not canceled previusly
-            if hasattr(self, 'size_label') and self.size_label.winfo_exists() and not self.fetch_cancelled:
-                self.size_label.config(text="Size: Estimation failed")
+            if hasattr(self, 'size_label') and self.size_label.winfo_exists() and not stale():
+                self.root.after(0, lambda: self.size_label.config(text="Size: Estimation failed"))
                 self.log(f"Size calculation error: {str(e)}", "ERROR")
+
+    # Runs in the Tk thread, estimate for the videos known so far
+    def refresh_size_label(self):
+        estimator = getattr(self, 'size_estimator', None)
+        if estimator is None or self.fetch_cancelled or not self.size_label.winfo_exists():
+            return
+        with self.entries_condition:
+            durations = [video.get('duration') for video in self.videos if video.get('id')]
+        estimate = estimator.estimate(durations)
+        if estimate is None:
+            self.size_label.config(text="Estimated Size: Calculating...")
+            return
+        total, low, high = estimate
+        text = f"Estimated Size: {format_size(total)}"
+        if low is not None and high - low > 1024:
+            text += f" ({format_size(low)} - {format_size(high)})"
+        if estimator.sample_count:
+            text += f", {estimator.sample_count} sampled"
+        if self.entries_loading:
+            text += ", more loading"
+        self.size_label.config(text=text)
 ###########im just confused,so i take a nap
 # Function to format file size in human-readable form
 def format_size(bytes_size):
@@ -587,8 +990,40 @@ def format_size(bytes_size):
         bytes_size /= 1024.0
     return f"{bytes_size:.2f} TB"
 
+# Final path of a downloaded item, after merging and postprocessing renamed it
+def _final_path(ydl, info):
+    downloads = info.get('requested_downloads')
+    if downloads and downloads[-1].get('filepath'):
+        return downloads[-1]['filepath']
+    return info.get('filepath') or ydl.prepare_filename(info)
+
+# Result record of download_item, compact ones leave out the info dict to keep big batches small
+def _download_result(ydl, info, item, started, compact):
+    path = _final_path(ydl, info)
+    if path and os.path.exists(path):
+        contentindex.record(info.get('id'), item.get('format', 'best'), item.get('type', 'video'), path)
+    if compact:
+        return {
+            'success': True,
+            'id': info.get('id'),
+            'title': info.get('title', 'Unknown'),
+            'path': path,
+            'size': os.path.getsize(path) if path and os.path.exists(path) else None,
+            'elapsed': round(time.time() - started, 3),
+        }
+    return {
+        'success': True,
+        'title': info.get('title', 'Unknown'),
+        'filename': ydl.prepare_filename(info),
+        'path': path,
+        'elapsed': round(time.time() - started, 3),
+        'info': info
+    }
+
 # Helper function to perform the download process
-def download_item(item, output_path=None, progress_callback=None, log_func=None):
+def download_item(item, output_path=None, progress_callback=None, log_func=None, archive=None, segments=1, compact=False):
+    import yt_dlp
+    started = time.time()
     # Set default output path if None is provided
     if output_path is None:
         downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
@@ -601,130 +1036,170 @@ def download_item(item, output_path=None, progress_callback=None, log_func=None)
     format_string = item.get('format', 'best')
     item_type = item.get('type', 'video')
     
+    # Logging function
+    log = log_func if log_func else lambda msg, level: None
+    
+    # Skip what is already on disk in this format, from any earlier playlist, batch or search download
+    video_id = item.get('id') or contentindex.video_id_from_url(url)
+    existing = contentindex.find_existing(video_id, format_string, item_type, output_path)
+    if existing:
+        log(f"Already downloaded, skipped: {item.get('title', url)} -> {existing}", "INFO")
+        result = {
+            'success': True,
+            'skipped': True,
+            'title': item.get('title', 'Unknown'),
+            'path': existing,
+            'elapsed': round(time.time() - started, 3),
+        }
+        if compact:
+            result.update(id=video_id, size=os.path.getsize(existing))
+        return result
+    
     # Set up output template
     output_template = f"{output_path}/%(title)s.%(ext)s"
     
-    # Base options
-    ydl_opts = {
-        'quiet': True,
-        'no_warnings': True,
-        'outtmpl': output_template,
-    }
-        
-        # For audio downloads, ensure we're extracting and converting properly
-    if item_type == 'audio':
-        # Parse the format string to extract options
-        format_parts = format_string.split(' --')
-        
-        # Get just the format selector (remove -f if present)
-        format_selector = format_parts[0].replace('-f ', '')
-        
-        # Set up base options for audio download
-        ydl_opts['format'] = format_selector
-        
-        # Apply specific audio format and quality if specified
-        if any('mp3' in part for part in format_parts):
-            ydl_opts['postprocessors'] = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192' if '192K' in format_string else '128',
-            }]
-            ydl_opts['extractaudio'] = True
-            ydl_opts['audioformat'] = 'mp3'
-            if 'prefer-ffmpeg' in format_string:
-                ydl_opts['prefer_ffmpeg'] = True
-                
-        elif any('m4a' in part for part in format_parts):
-            ydl_opts['postprocessors'] = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'm4a',
-                'preferredquality': '0',
-            }]
-            ydl_opts['extractaudio'] = True
-            ydl_opts['audioformat'] = 'm4a'
-            
-        elif any('vorbis' in part for part in format_parts):
-            ydl_opts['postprocessors'] = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'vorbis',
-                'preferredquality': '0',
-            }]
-            ydl_opts['extractaudio'] = True
-            ydl_opts['audioformat'] = 'vorbis'
-    else:
-        # For video downloads, just use the format string
-        ydl_opts['format'] = format_string
+    # Options compiled from the format choice, audio conversion included
+    ydl_opts = ydlopts.build_opts(format_string, item_type, quiet=True, no_warnings=True, outtmpl=output_template)
     
     # Add progress hooks if callback provided
     if progress_callback:
         ydl_opts['progress_hooks'] = [
             lambda d: progress_callback(d)
         ]
-    
-    # Logging function
-    log = log_func if log_func else lambda msg, level: None
+
+    # Already archived items are skipped by yt-dlp before extraction
+    if archive is not None:
+        ydl_opts['download_archive'] = archive
+
+    # Several connections per file, direct files use byte ranges and DASH/HLS fragments download concurrently
+    if segments > 1:
+        ydl_opts['concurrent_fragment_downloads'] = segments
     
     try:
         # Download the video/audio
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
+            info = segmented.extract_and_download(ydl, url, segments)
+            if info is None and archive is not None:
+                log(f"Already in download archive, skipped: {item.get('title', url)}", "INFO")
+                return {
+                    'success': True,
+                    'skipped': True,
+                    'title': item.get('title', 'Unknown'),
+                }
             log(f"Download completed: {info.get('title', 'Unknown')}", "INFO")
-            return {
-                'success': True,
-                'title': info.get('title', 'Unknown'),
-                'filename': ydl.prepare_filename(info),
-                'info': info
-            }
+            return _download_result(ydl, info, item, started, compact)
     except Exception as e:
         error_msg = str(e)
         log(f"Download error: {error_msg}", "ERROR")
         
-        # Try fallback options for common errors
-        if "Requested format is not available" in error_msg and item_type == 'audio':
-            log("Trying fallback format for audio download", "INFO")
-            # Fallback to simpler format string
-            ydl_opts['format'] = 'bestaudio/best'
+        category = retry.classify(error_msg)
+        
+        # An unavailable format is retried right away with a simpler one
+        fallback = retry.FALLBACK_FORMATS.get(item_type, retry.FALLBACK_FORMATS['video'])
+        if category == retry.FORMAT_UNAVAILABLE and ydl_opts['format'] != fallback:
+            log(f"Trying fallback format for {item_type} download", "INFO")
+            ydl_opts['format'] = fallback
             
             try:
                 with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=True)
+                    # The extraction from the first attempt is still cached, only the format selection runs again
+                    info = segmented.extract_and_download(ydl, url, segments)
                     log(f"Download completed with fallback format: {info.get('title', 'Unknown')}", "INFO")
-                    return {
-                        'success': True,
-                        'title': info.get('title', 'Unknown'),
-                        'filename': ydl.prepare_filename(info),
-                        'info': info
-                    }
+                    result = _download_result(ydl, info, item, started, compact)
+                    result['retries'] = 1
+                    return result
             except Exception as e2:
                 log(f"Fallback download failed: {str(e2)}", "ERROR")
-                return {
-                    'success': False,
-                    'error': str(e2)
-                }
+                error_msg = str(e2)
+                category = retry.classify(error_msg)
+                # Still no format after the fallback, another try cannot help
+                if category == retry.FORMAT_UNAVAILABLE:
+                    category = retry.PERMANENT
         
         return {
             'success': False,
-            'error': error_msg
+            'title': item.get('title', 'Unknown'),
+            'error': error_msg,
+            'category': category,
+            'elapsed': round(time.time() - started, 3),
         }
 
+# Yield the result of every item as soon as it is done, items can be any iterable (a generator over a
+# huge batch file too) and only the items in flight are held in memory. Results come in completion order,
+# each one carries the item it belongs to under 'item' and how often it was retried under 'retries'.
+# Failed items are retried with backoff on a delayed queue, the workers go on with other items meanwhile.
+def iter_download_items(items, output_path=None, progress_callback=None, log_func=None, archive=None, segments=1,
+                        compact=False, workers=1, max_retries=retry.MAX_RETRIES):
+    total = len(items) if hasattr(items, '__len__') else None
+    log = log_func if log_func else lambda msg, level: None
+    workers = max(1, workers)
+    # Finished attempts and retries that are due, both handled on the generator's thread
+    events = queue.Queue()
+    delayed = retry.RetryQueue()
+    retries = {}
+
+    def run(i, item):
+        if progress_callback:
+            progress_callback(i, total, "Preparing...")
+        try:
+            result = download_item(item, output_path,
+                                   lambda d: progress_callback(i, total, d.get('status', 'downloading'), d) if progress_callback else None,
+                                   log_func, archive, segments, compact)
+        except Exception as e:
+            result = {'success': False, 'title': item.get('title', 'Unknown'), 'error': str(e), 'category': retry.classify(e)}
+        events.put(('done', i, item, result))
+
+    pending = enumerate(items)
+    exhausted = False
+    running = 0
+    waiting = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                # Keep a couple of items queued per worker, never the whole batch
+                while not exhausted and running < workers * 2:
+                    entry = next(pending, None)
+                    if entry is None:
+                        exhausted = True
+                        break
+                    pool.submit(run, *entry)
+                    running += 1
+                if not running and not waiting:
+                    break
+                event, i, item, result = events.get()
+                if event == 'retry':
+                    waiting -= 1
+                    running += 1
+                    pool.submit(run, i, item)
+                    continue
+                running -= 1
+                result['retries'] = retries.get(i, 0) + result.get('retries', 0)
+                if not result['success']:
+                    delay = retry.next_delay(result.get('category'), retries.get(i, 0), max_retries)
+                    if delay is not None:
+                        retries[i] = retries.get(i, 0) + 1
+                        log(f"Retrying {item.get('title', 'item')} in {delay:.1f}s ({result['category']}, attempt {retries[i] + 1})", "INFO")
+                        delayed.schedule(delay, lambda i=i, item=item: events.put(('retry', i, item, None)))
+                        waiting += 1
+                        continue
+                retries.pop(i, None)
+                result['item'] = item
+                yield result
+    finally:
+        delayed.close()
+
 # Function to handle downloading a list of items, this is incomplete but it send update to the main GUI,like playlist it supposed to show download progress etc
-def download_items(items, output_path=".", progress_callback=None, completion_callback=None, log_func=None):
+# result_callback gets each result as it finishes, completion_callback the full list at the end (only kept when it is set)
+def download_items(items, output_path=".", progress_callback=None, completion_callback=None, log_func=None, archive=None, segments=1,
+                   compact=False, workers=1, result_callback=None):
     # Create a thread to handle downloads
     def download_thread():
-        results = []
-        total = len(items)
-        
-        for i, item in enumerate(items):
-            # Update progress
-            if progress_callback:
-                progress_callback(i, total, "Preparing...")
-            
-            # Download the item
-            result = download_item(item, output_path, 
-                                  lambda d: progress_callback(i, total, d.get('status', 'downloading'), d) if progress_callback else None,
-                                  log_func)
-            
-            results.append(result)
+        results = [] if completion_callback else None
+        for result in iter_download_items(items, output_path, progress_callback, log_func, archive, segments, compact, workers):
+            if result_callback:
+                result_callback(result)
+            if results is not None:
+                results.append(result)
         
         # Call completion callback
         if completion_callback:
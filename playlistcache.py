@@ -0,0 +1,93 @@
+#Playlist metadata cache, remembers the entries of every playlist that was synced so the next sync only pages
+#in what changed. Entries are compared while they stream in, once a run of already known entries shows up the
+#rest of the playlist is taken from the cache instead of the network. New and removed entries are reported.
+import hashlib
+import json
+import os
+import time
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), "Downloads", "yt-dlite", ".cache", "playlists")
+# Consecutive known entries after which the rest of the playlist is assumed unchanged
+STOP_AFTER_KNOWN = 30
+
+def _path(url):
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+# Only what is needed to list and download an entry is kept
+def _compact(entry):
+    return {key: entry.get(key) for key in ('id', 'title', 'duration', 'url') if entry.get(key) is not None}
+
+def load_playlist(url):
+    try:
+        with open(_path(url), 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return snapshot if snapshot.get('url') == url else None
+
+def save_playlist(url, title, entries):
+    snapshot = {
+        'url': url,
+        'title': title,
+        'updated': time.time(),
+        'entries': [_compact(entry) for entry in entries if entry.get('id')],
+    }
+    try:
+        if not os.path.exists(CACHE_DIR):
+            os.makedirs(CACHE_DIR)
+        tmp_path = _path(url) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, _path(url))
+    except OSError as e:
+        print(f"Could not save playlist cache: {e}")
+
+class PlaylistDelta:
+    # Compares entries streaming in against the cached snapshot of the same playlist
+    def __init__(self, snapshot=None, playlist_count=None):
+        self.cached = snapshot['entries'] if snapshot else []
+        self.positions = {entry['id']: i for i, entry in enumerate(self.cached)}
+        self.playlist_count = playlist_count
+        self.seen = set()
+        self.new = []
+        self.known_run = 0
+        self.last_matched = -1
+        self.stopped_early = False
+
+    @property
+    def has_snapshot(self):
+        return bool(self.cached)
+
+    def add(self, entry):
+        """Record one streamed entry, True when the rest can be taken from the cache"""
+        entry_id = entry.get('id')
+        if entry_id is None:
+            return False
+        self.seen.add(entry_id)
+        position = self.positions.get(entry_id)
+        if position is None:
+            self.new.append(entry)
+            self.known_run = 0
+            return False
+        self.known_run += 1
+        self.last_matched = max(self.last_matched, position)
+        # Only checked every STOP_AFTER_KNOWN known entries in a row, remaining() walks the cache
+        if self.known_run % STOP_AFTER_KNOWN:
+            return False
+        # Videos added at the end of a playlist would be missed, so trust the reported count when there is one
+        if self.playlist_count and len(self.seen) + len(self.remaining()) < self.playlist_count:
+            return False
+        self.stopped_early = True
+        return True
+
+    def remaining(self):
+        # Cached entries after the last one matched, in their cached order
+        return [entry for entry in self.cached[self.last_matched + 1:] if entry['id'] not in self.seen]
+
+    def removed(self):
+        # Cached entries that should have streamed in by now but did not
+        if self.stopped_early:
+            candidates = self.cached[:self.last_matched + 1]
+        else:
+            candidates = self.cached
+        return [entry for entry in candidates if entry['id'] not in self.seen]
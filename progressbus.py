@@ -0,0 +1,51 @@
+#Progress bus, download threads publish progress here and the Tk thread applies it at a fixed frame rate
+#Publishing only appends to a deque, the worker never touches Tk. Once per frame the Tk side drains what
+#was published and keeps the latest state per key, so the UI does the same work every frame however many
+#downloads run at once and however often yt-dlp reports progress.
+import collections
+
+FRAME_INTERVAL_MS = 100
+
+class ProgressBus:
+    # apply(key, state) runs in the Tk thread for every key that changed since the last frame,
+    # alive() is asked before every frame and stops the bus once it returns False
+    def __init__(self, root, apply, interval=FRAME_INTERVAL_MS, alive=None):
+        self.root = root
+        self.apply = apply
+        self.interval = interval
+        self.alive = alive
+        # append and popleft are atomic, publishers never wait for a lock
+        self.events = collections.deque()
+        self.running = False
+
+    def publish(self, key, state=None):
+        self.events.append((key, state))
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.root.after(self.interval, self._drain)
+
+    def stop(self):
+        self.running = False
+
+    # Runs in the Tk thread
+    def _drain(self):
+        if not self.running:
+            return
+        if self.alive is not None and not self.alive():
+            self.running = False
+            return
+        latest = {}
+        while True:
+            try:
+                key, state = self.events.popleft()
+            except IndexError:
+                break
+            latest[key] = state
+        for key, state in latest.items():
+            try:
+                self.apply(key, state)
+            except Exception as e:
+                print(f"Progress update failed: {e}")
+        self.root.after(self.interval, self._drain)
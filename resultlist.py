@@ -0,0 +1,197 @@
+#Virtualized search result list, only the result cards in view exist as widgets
+#Cards have a fixed height and are placed at index * CARD_HEIGHT on HomeGui's scrollable frame. The cards in
+#view plus BUFFER_CARDS above and below are bound to a result, the others go back to a pool and are bound to
+#other results while scrolling. The pool is kept across searches, so the widget count and the layout cost
+#stay the same however many results a search loads.
+import webbrowser
+import tkinter as tk
+from tkinter import ttk
+import thumbnails
+
+CARD_HEIGHT = 175
+BUFFER_CARDS = 3
+FOOTER_HEIGHT = 50
+
+# Format view count with appropriate suffix (k, M, B) to keeo stuff cool! huh
+def format_views(view_count):
+    view_count = view_count or 0
+    if view_count >= 1_000_000_000:  # Billions
+        return f"{view_count / 1_000_000_000:.1f}B".replace('.0B', 'B')
+    if view_count >= 1_000_000:  # Millions
+        return f"{view_count / 1_000_000:.1f}M".replace('.0M', 'M')
+    if view_count >= 1_000:  # Thousands
+        return f"{view_count / 1_000:.1f}k".replace('.0k', 'k')
+    return f"{view_count}" if view_count else 'N/A'
+
+def format_duration(duration):
+    duration = int(duration) if duration else 0
+    if not duration:
+        return 'N/A'
+    hours = duration // 3600
+    minutes = (duration % 3600) // 60
+    seconds = duration % 60
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+def video_url(video):
+    return video.get('url') or f"https://youtu.be/{video.get('id', '')}"
+
+class ResultCard(ttk.Frame):
+    # One result (Thumbnail + Buttons + some Info), built once and bound to different videos
+    def __init__(self, master, gui):
+        super().__init__(master)
+        self.gui = gui
+        self.video = None
+        self.photo = None  # Keep a reference to prevent garbage collection
+        self.request = None
+
+        self.separator = ttk.Frame(self, height=1, relief=tk.SUNKEN, borderwidth=1)
+        self.container = ttk.Frame(self)
+        self.container.pack(fill=tk.X, padx=10, pady=10)
+        self.thumbnail_label = ttk.Label(self.container, text="Loading...", width=15)
+        self.thumbnail_label.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Button sections
+        button_frame = ttk.Frame(self.container)
+        button_frame.pack(side=tk.LEFT, padx=10, pady=5)
+        ttk.Button(button_frame, text="▶ Play", command=lambda: webbrowser.open(video_url(self.video))).pack(fill=tk.X, pady=2)
+        ttk.Button(button_frame, text="↓ Download", command=lambda: self.gui.create_download_button(self.video)).pack(fill=tk.X, pady=2)
+        ttk.Button(button_frame, text="↗ Share", command=lambda: self.gui.copy_link(video_url(self.video))).pack(fill=tk.X, pady=2)
+
+        # Video info section
+        info_frame = ttk.Frame(self.container)
+        info_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.title_label = ttk.Label(info_frame, font=('Arial', 10, 'bold'))
+        self.title_label.pack(anchor='w')
+        self.channel_label = ttk.Label(info_frame)
+        self.channel_label.pack(anchor='w')
+        self.duration_label = ttk.Label(info_frame)
+        self.duration_label.pack(anchor='w')
+        self.views_label = ttk.Label(info_frame)
+        self.views_label.pack(anchor='w')
+
+    def bind_video(self, video, index, priority=thumbnails.HIDDEN):
+        self.unbind_video()
+        self.video = video
+        if index > 0:
+            self.separator.pack(fill=tk.X, pady=(5, 0), before=self.container)
+        else:
+            self.separator.pack_forget()
+
+        # Title section (truncated for long titles)
+        title = video.get('title') or 'No title'
+        self.title_label.config(text=title[:60] + ('...' if len(title) > 60 else ''))
+        self.channel_label.config(text=f"Channel: {video.get('uploader', 'Unknown channel')}")
+        self.duration_label.config(text=f"Duration: {format_duration(video.get('duration'))}")
+        self.views_label.config(text=f"Viewers: {format_views(video.get('view_count'))}")
+
+        self.thumbnail_label.config(image='', text="Loading...")
+        thumbnail_url = (video.get('thumbnail') or
+                        next((t['url'] for t in video.get('thumbnails', []) if t.get('url')), '')) #Best thumbnail url accoring to googling
+        self.request = self.gui.download_thumbnail(
+            thumbnail_url, self.thumbnail_label, priority, group='search',
+            show=lambda label, image, video=video: self.show_thumbnail(video, image))
+
+    def unbind_video(self):
+        if self.request is not None:
+            self.request.cancel()
+            self.request = None
+        self.video = None
+        self.photo = None
+        self.thumbnail_label.config(image='')
+
+    # Runs in the Tk thread, a thumbnail arriving after the card moved on to another video is dropped
+    def show_thumbnail(self, video, image):
+        if video is not self.video:
+            return
+        if image is None:
+            self.thumbnail_label.config(text="No thumbnail or unstable network", image='')
+            return
+        from PIL import ImageTk
+        self.photo = ImageTk.PhotoImage(image)
+        self.thumbnail_label.config(image=self.photo, text="")
+
+class ResultList:
+    def __init__(self, gui):
+        self.gui = gui
+        self.canvas = gui.scrollable_canvas
+        self.frame = gui.scrollable_frame
+        self.videos = []
+        self.cards = {}  # index -> card bound to that result
+        self.free = []  # cards not bound to any result
+        self.footer = None
+        self.refresh_pending = False
+
+    def __len__(self):
+        return len(self.videos)
+
+    def clear(self):
+        # Everything else on the frame (welcome screen, footer) is destroyed, the cards stay for the next search
+        for card in self.cards.values():
+            card.unbind_video()
+            card.place_forget()
+            self.free.append(card)
+        self.cards = {}
+        for widget in self.frame.winfo_children():
+            if widget not in self.free:
+                widget.destroy()
+        self.footer = None
+        self.videos = []
+        self._update_height()
+        self.canvas.yview_moveto(0)
+
+    def append(self, video):
+        self.videos.append(video)
+        self._update_height()
+        self.schedule_refresh()
+
+    # A widget below the last card, e.g. the "Load more results" button. None destroys the current one
+    def set_footer(self, widget):
+        if self.footer is not None and self.footer is not widget:
+            self.footer.destroy()
+        self.footer = widget
+        self._update_height()
+
+    def _update_height(self):
+        height = len(self.videos) * CARD_HEIGHT
+        if self.footer is not None:
+            self.footer.place(relx=0.5, y=height + 10, anchor='n')
+            height += FOOTER_HEIGHT
+        # The frame has no packed children to size it, the canvas window gets the height of all cards
+        self.canvas.itemconfig(self.gui.canvas_window, height=max(height, 1))
+
+    def schedule_refresh(self):
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.canvas.after_idle(self.refresh)
+
+    # Binds the cards to the results in view and returns the others to the pool
+    def refresh(self):
+        self.refresh_pending = False
+        top = self.canvas.canvasy(0)
+        bottom = top + max(self.canvas.winfo_height(), CARD_HEIGHT)
+        visible_first = int(top // CARD_HEIGHT)
+        visible_last = int(bottom // CARD_HEIGHT) + 1
+        first = max(0, visible_first - BUFFER_CARDS)
+        last = min(len(self.videos), visible_last + BUFFER_CARDS)
+
+        for index in [index for index in self.cards if not first <= index < last]:
+            card = self.cards.pop(index)
+            card.unbind_video()
+            card.place_forget()
+            self.free.append(card)
+
+        service = thumbnails.get_thumbnail_service()
+        for index in range(first, last):
+            priority = thumbnails.VISIBLE if visible_first <= index < visible_last else thumbnails.HIDDEN
+            card = self.cards.get(index)
+            if card is not None:
+                # Thumbnails of buffered cards that scrolled into view move up the queue
+                if card.request is not None:
+                    service.prioritize(card.request, priority)
+                continue
+            card = self.free.pop() if self.free else ResultCard(self.frame, self.gui)
+            card.bind_video(self.videos[index], index, priority)
+            card.place(x=0, y=index * CARD_HEIGHT, relwidth=1, height=CARD_HEIGHT)
+            self.cards[index] = card
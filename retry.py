@@ -0,0 +1,117 @@
+#Retry policy for playlist and batch items, sorts download errors into a few classes and decides when to try again
+#Network hiccups are retried after a short jittered exponential backoff, throttling (HTTP 429/403) after a much
+#longer one, an unavailable format is retried once right away with a fallback format. Errors that match no
+#known pattern get a single retry, known permanent ones none.
+#Waiting items sit on a delayed queue served by one timer thread, the download workers stay free meanwhile.
+import heapq
+import itertools
+import random
+import re
+import socket
+import threading
+import time
+
+# Failure classes
+TRANSIENT = 'transient'
+THROTTLED = 'throttled'
+FORMAT_UNAVAILABLE = 'format unavailable'
+UNKNOWN = 'unknown'
+PERMANENT = 'permanent'
+
+MAX_RETRIES = 3
+# Backoff before the first retry of each class, doubled for every further attempt
+BASE_DELAY = {TRANSIENT: 2.0, THROTTLED: 30.0, UNKNOWN: 2.0}
+# Retries of errors nobody has seen before, they are more likely a bug or a bad item than a hiccup
+UNKNOWN_RETRIES = 1
+MAX_DELAY = 300.0
+
+# Format selectors tried when the selected one is not available, the options after it are kept
+FALLBACK_FORMATS = {'audio': 'bestaudio/best', 'video': 'bestvideo+bestaudio/best'}
+
+_THROTTLED_RE = re.compile(r'HTTP Error (429|403)|Too Many Requests|rate.?limit', re.IGNORECASE)
+_FORMAT_RE = re.compile(r'Requested format is not available|No video formats found', re.IGNORECASE)
+_PERMANENT_RE = re.compile(
+    r'Video unavailable|Private video|This video is (not available|unavailable)|has been removed|'
+    r'members-only|Sign in to confirm your age|copyright|Unsupported URL|is not a valid URL|HTTP Error 404|'
+    r'Premieres in|This live event will begin', re.IGNORECASE)
+_TRANSIENT_RE = re.compile(
+    r'HTTP Error 5\d\d|timed? ?out|Connection (reset|refused|aborted)|Remote end closed|Broken pipe|'
+    r'Temporary failure in name resolution|Failed to resolve|getaddrinfo failed|Name or service not known|'
+    r'Network is unreachable|No route to host|IncompleteRead|EOF occurred|SSL: |Unable to download (webpage|JSON)|'
+    r'urlopen error|Got error: ', re.IGNORECASE)
+
+def classify(error):
+    """Failure class of an exception or error message"""
+    message = str(error)
+    if _THROTTLED_RE.search(message):
+        return THROTTLED
+    if _FORMAT_RE.search(message):
+        return FORMAT_UNAVAILABLE
+    if _PERMANENT_RE.search(message):
+        return PERMANENT
+    if isinstance(error, (socket.timeout, ConnectionError)) or _TRANSIENT_RE.search(message):
+        return TRANSIENT
+    return UNKNOWN
+
+def next_delay(category, retries, max_retries=MAX_RETRIES):
+    """Seconds to wait before retry number retries + 1, None when the item should not be retried"""
+    if category == UNKNOWN:
+        max_retries = min(max_retries, UNKNOWN_RETRIES)
+    if category not in BASE_DELAY or retries >= max_retries:
+        return None
+    # Full jitter, workers that failed together do not all come back at the same moment
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY[category] * 2 ** retries))
+
+def fallback_format(format_string, item_type='video'):
+    # Swap the format selector, keep options like --audio-format that follow it
+    parts = format_string.split(' --')
+    fallback = FALLBACK_FORMATS.get(item_type, FALLBACK_FORMATS['video'])
+    if parts[0].startswith('-f '):
+        fallback = '-f ' + fallback
+    if parts[0] == fallback:
+        return None
+    return ' --'.join([fallback] + parts[1:])
+
+class RetryQueue:
+    # Runs callbacks once their delay has passed, on a single timer thread started with the first one
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.waiting = []  # heap of (due, ticket, callback)
+        self.tickets = itertools.count()
+        self.closed = False
+        self.thread = None
+
+    def schedule(self, delay, callback):
+        with self.condition:
+            if self.closed:
+                return False
+            heapq.heappush(self.waiting, (time.monotonic() + delay, next(self.tickets), callback))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.condition.notify()
+            return True
+
+    def __len__(self):
+        with self.condition:
+            return len(self.waiting)
+
+    def close(self):
+        # Drops the callbacks still waiting
+        with self.condition:
+            self.closed = True
+            self.waiting = []
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.closed and (not self.waiting or self.waiting[0][0] > time.monotonic()):
+                    self.condition.wait(self.waiting[0][0] - time.monotonic() if self.waiting else None)
+                if self.closed:
+                    return
+                _, _, callback = heapq.heappop(self.waiting)
+            try:
+                callback()
+            except Exception as e:
+                print(f"Retry callback failed: {e}")
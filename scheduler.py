@@ -0,0 +1,138 @@
+#Process wide download scheduler, every tab and the playlist downloader start their downloads through it
+#It limits how many downloads run at once, hands free slots to interactive downloads before background
+#playlist items, and caps the combined bandwidth with a token bucket fed from the yt-dlp progress hooks.
+#Limits are read from ~/Downloads/yt-dlite/.settings.json and can be changed at runtime with configure().
+import contextlib
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+# Priority classes, lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+SETTINGS_PATH = os.path.join(os.path.expanduser("~"), "Downloads", "yt-dlite", ".settings.json")
+DEFAULT_MAX_CONCURRENT = 3
+
+class TokenBucket:
+    # rate in bytes per second, None means unlimited. One second worth of burst is allowed
+    def __init__(self, rate=None):
+        self.lock = threading.Lock()
+        self.rate = rate
+        self.tokens = rate or 0
+        self.last = time.monotonic()
+
+    def set_rate(self, rate):
+        with self.lock:
+            self.rate = rate
+            self.tokens = min(self.tokens, rate or 0)
+
+    def consume(self, amount):
+        # Blocks the calling download thread until its bytes fit under the rate
+        while amount > 0:
+            with self.lock:
+                if not self.rate:
+                    return
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                taken = min(amount, self.tokens)
+                self.tokens -= taken
+                amount -= taken
+                wait = min(amount, self.rate) / self.rate if amount else 0
+            if wait:
+                time.sleep(wait)
+
+class DownloadScheduler:
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT, rate_limit=None):
+        self.condition = threading.Condition()
+        self.max_concurrent = max(1, max_concurrent)
+        self.active = 0
+        self.waiting = []  # heap of (priority, ticket)
+        self.tickets = itertools.count()
+        self.bucket = TokenBucket(rate_limit)
+
+    def configure(self, max_concurrent=None, rate_limit=None):
+        # rate_limit 0 removes the bandwidth cap
+        with self.condition:
+            if max_concurrent is not None:
+                self.max_concurrent = max(1, max_concurrent)
+            self.condition.notify_all()
+        if rate_limit is not None:
+            self.bucket.set_rate(rate_limit or None)
+
+    def acquire(self, priority=INTERACTIVE, cancelled=None, on_wait=None):
+        """Wait for a download slot, returns False if cancelled() became true while waiting"""
+        with self.condition:
+            entry = (priority, next(self.tickets))
+            heapq.heappush(self.waiting, entry)
+            notified = False
+            try:
+                while self.waiting[0] != entry or self.active >= self.max_concurrent:
+                    if cancelled and cancelled():
+                        return False
+                    if on_wait and not notified:
+                        notified = True
+                        on_wait()
+                    # Wake up now and then to notice cancellation
+                    self.condition.wait(0.5)
+                self.active += 1
+                return True
+            finally:
+                self.waiting.remove(entry)
+                heapq.heapify(self.waiting)
+                self.condition.notify_all()
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, priority=INTERACTIVE, cancelled=None, on_wait=None):
+        """with scheduler.slot(...) as ok: runs the body holding a slot, ok is False if it was cancelled"""
+        acquired = self.acquire(priority, cancelled, on_wait)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release()
+
+    def progress_hook(self):
+        # New hook per download, it feeds the bytes downloaded since its last call into the bandwidth cap
+        seen = {}
+        def hook(d):
+            if d.get('status') != 'downloading':
+                return
+            key = d.get('tmpfilename') or d.get('filename')
+            downloaded = d.get('downloaded_bytes') or 0
+            # The first call only sets the baseline, resumed bytes were not downloaded now
+            previous = seen.setdefault(key, downloaded)
+            if downloaded > previous:
+                seen[key] = downloaded
+                self.bucket.consume(downloaded - previous)
+        return hook
+
+def load_settings(path=SETTINGS_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            settings = json.load(f)
+    except (OSError, ValueError):
+        settings = {}
+    return {
+        'max_concurrent': int(settings.get('max_concurrent_downloads') or DEFAULT_MAX_CONCURRENT),
+        'rate_limit': int(settings.get('bandwidth_limit') or 0) or None,  # bytes per second
+    }
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = DownloadScheduler(**load_settings())
+        return _scheduler
@@ -0,0 +1,194 @@
+#Search cache, keeps the results of recent searches so repeating a search or going back to one is instant
+#Queries are normalized (case and spacing) before the lookup. Results stay fresh for a TTL, after that they
+#are still shown right away but fetched again in the background, and results older than MAX_AGE are dropped.
+#The results of a query are one shared lazy list: searches of the same query running at the same time read
+#the same list and only one of them talks to YouTube for each page.
+import collections
+import itertools
+import json
+import os
+import threading
+import time
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), "Downloads", "yt-dlite", ".cache", "searches.json")
+TTL = 30 * 60
+MAX_AGE = 7 * 24 * 60 * 60
+# Queries kept on disk, and queries kept in memory together with their open search
+MAX_QUERIES = 100
+MAX_MEMORY_QUERIES = 20
+# Only what a result card needs is written to disk
+ENTRY_FIELDS = ('id', 'url', 'title', 'uploader', 'duration', 'view_count', 'thumbnail')
+
+def normalize_query(query):
+    return ' '.join(query.lower().split())
+
+def _compact(entry):
+    compact = {key: entry.get(key) for key in ENTRY_FIELDS if entry.get(key) is not None}
+    if 'thumbnail' not in compact:
+        thumbnail = next((t['url'] for t in entry.get('thumbnails') or [] if t.get('url')), None)
+        if thumbnail:
+            compact['thumbnail'] = thumbnail
+    return compact
+
+class SearchResults:
+    # Entries of one query, read from source(query, start) only as far as somebody iterates.
+    # source returns an iterator over the results from position start on, the search is opened
+    # again at the current position if it failed or was closed.
+    def __init__(self, query, source, entries=None, fetched=None, exhausted=False):
+        self.query = query
+        self.source = source
+        self.entries = list(entries or [])
+        self.fetched = fetched or time.time()
+        # Held while an entry is pulled from the source, readers of the same query wait here
+        self.lock = threading.Lock()
+        self.iterator = None
+        self.exhausted = exhausted  # the source has no entries past self.entries
+
+    def __iter__(self):
+        i = 0
+        while True:
+            if i < len(self.entries):
+                yield self.entries[i]
+                i += 1
+                continue
+            with self.lock:
+                if i < len(self.entries):
+                    continue
+                if self.exhausted:
+                    return
+                if self.iterator is None:
+                    self.iterator = iter(self.source(self.query, len(self.entries)))
+                try:
+                    entry = next(self.iterator)
+                except StopIteration:
+                    self.exhausted = True
+                    self.iterator = None
+                    return
+                except Exception:
+                    self.iterator = None
+                    raise
+                self.entries.append(entry)
+
+    def close(self):
+        # Ends the open search, the entries read so far stay usable
+        with self.lock:
+            iterator = self.iterator
+            self.iterator = None
+        if iterator is not None and hasattr(iterator, 'close'):
+            iterator.close()
+
+class SearchCache:
+    def __init__(self, path=CACHE_PATH, ttl=TTL, max_age=MAX_AGE, max_queries=MAX_QUERIES,
+                 max_memory_queries=MAX_MEMORY_QUERIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_queries = max_queries
+        self.max_memory_queries = max_memory_queries
+        self.lock = threading.Lock()
+        # query -> SearchResults, least recently used first
+        self.memory = collections.OrderedDict()
+        self.refreshing = set()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.stored = json.load(f)  # query -> {'fetched', 'exhausted', 'entries'}
+        except (OSError, ValueError):
+            self.stored = {}
+
+    def results(self, query, source):
+        """Shared SearchResults of query, cached entries first and source(query, start) for the rest"""
+        key = normalize_query(query)
+        now = time.time()
+        closing = []
+        with self.lock:
+            results = self.memory.get(key)
+            if results is not None and now - results.fetched > self.max_age:
+                closing.extend(self._forget(key))
+                results = None
+            if results is None:
+                record = self.stored.get(key)
+                if record and now - record['fetched'] <= self.max_age:
+                    results = SearchResults(key, source, record['entries'], record['fetched'], record.get('exhausted', False))
+                else:
+                    results = SearchResults(key, source)
+                closing.extend(self._remember(key, results))
+            else:
+                self.memory.move_to_end(key)
+            stale = bool(results.entries) and now - results.fetched > self.ttl and key not in self.refreshing
+            if stale:
+                self.refreshing.add(key)
+        for old in closing:
+            old.close()
+        if stale:
+            threading.Thread(target=self._refresh, args=(key, source, len(results.entries)), daemon=True).start()
+        return results
+
+    def save(self, results):
+        # Writes the entries read so far, called once a page of results was shown
+        record = {
+            'fetched': results.fetched,
+            'exhausted': results.exhausted,
+            'entries': [_compact(entry) for entry in list(results.entries)],
+        }
+        if not record['entries']:
+            return
+        with self.lock:
+            self.stored[results.query] = record
+            if len(self.stored) > self.max_queries:
+                oldest = sorted(self.stored, key=lambda query: self.stored[query]['fetched'])
+                for query in oldest[:len(self.stored) - self.max_queries]:
+                    del self.stored[query]
+            try:
+                directory = os.path.dirname(self.path)
+                if not os.path.exists(directory):
+                    os.makedirs(directory)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.stored, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Could not save search cache: {e}")
+
+    # Fetches as many results as were cached again and swaps them in for the stale ones
+    def _refresh(self, key, source, count):
+        fresh = SearchResults(key, source)
+        try:
+            entries = list(itertools.islice(fresh, count))
+        except Exception as e:
+            print(f"Could not refresh search '{key}': {e}")
+            entries = []
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+        if not entries:
+            fresh.close()
+            return
+        with self.lock:
+            closing = self._remember(key, fresh)
+        for old in closing:
+            old.close()
+        self.save(fresh)
+
+    # Caller must hold self.lock. Both return the results that left memory, the caller closes them
+    # once the lock is released. A search still showing them keeps working, close() only ends the
+    # open connection and the next read opens a new one
+    def _remember(self, key, results):
+        closing = self._forget(key)
+        self.memory[key] = results
+        while len(self.memory) > self.max_memory_queries:
+            closing.append(self.memory.popitem(last=False)[1])
+        return closing
+
+    def _forget(self, key):
+        old = self.memory.pop(key, None)
+        return [old] if old is not None else []
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_search_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache()
+        return _cache
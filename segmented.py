@@ -0,0 +1,349 @@
+#Segmented downloader, fetches one direct media URL as many byte ranges over several connections at once
+#yt-dlp's own HTTP downloader uses a single stream, which cannot fill a fast link with high latency.
+#Only plain http(s) formats are handled here, including the parts of a merged video+audio download. They are
+#fetched under the names yt-dlp would use before it processes the URL, yt-dlp then finds them already downloaded
+#and runs its usual merge, postprocessing, archive and move steps. DASH/HLS and playlists are left to yt-dlp,
+#so are downloads through a proxy other than a plain http one. The ydl proxy and cookies are used for every request.
+import base64
+import copy
+import http.client
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import infocache
+
+# Ranges smaller than this are not worth another request
+MIN_SEGMENT_SIZE = 1024 * 1024
+# Chunks per connection, idle connections take over the work of slow ones
+CHUNKS_PER_CONNECTION = 4
+SEGMENT_RETRIES = 3
+READ_SIZE = 64 * 1024
+# How often the resume state is written while downloading
+CHECKPOINT_INTERVAL = 1.0
+# Seconds to wait before the first retry of a failed range, multiplied by the attempt number
+RETRY_DELAY = 1.0
+
+_CONTENT_RANGE_RE = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+
+class SegmentedDownloadError(Exception):
+    pass
+
+class SegmentedDownloader:
+    # proxy works like the yt-dlp option: None uses the environment, '' connects directly.
+    # cookiejar is an http.cookiejar.CookieJar, e.g. ydl.cookiejar
+    def __init__(self, url, path, headers=None, connections=4, progress_hooks=None, info_dict=None,
+                 proxy=None, cookiejar=None):
+        self.url = url
+        self.path = path
+        self.headers = dict(headers or {})
+        self.connections = max(1, connections)
+        self.progress_hooks = progress_hooks or []
+        self.info_dict = info_dict or {}
+        self.proxy = proxy
+        self.cookiejar = cookiejar
+        # Data goes to a working file next to the target, yt-dlp must never see it as a finished or .part file
+        self.work_path = path + '.seg'
+        self.state_path = path + '.seg.json'
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.open_connections = []  # every worker's connection, closed when download() returns
+        self.downloaded = 0
+        self.total = None
+        self.started = None
+        self.last_checkpoint = 0
+
+    def _proxy_for(self, parsed):
+        if self.proxy is not None:
+            return self.proxy or None
+        if urllib.request.proxy_bypass(parsed.hostname or ''):
+            return None
+        return urllib.request.getproxies().get(parsed.scheme)
+
+    # http.client only speaks to plain http proxies, socks and https proxies are left to yt-dlp
+    def supported(self):
+        proxy = self._proxy_for(urllib.parse.urlsplit(self.url))
+        return proxy is None or urllib.parse.urlsplit(proxy).scheme == 'http'
+
+    def _headers(self, url, **extra):
+        headers = dict(self.headers, **extra)
+        if self.cookiejar is not None:
+            request = urllib.request.Request(url)
+            self.cookiejar.add_cookie_header(request)
+            cookie = request.get_header('Cookie')
+            if cookie:
+                headers['Cookie'] = cookie
+        return headers
+
+    # Ask for the first byte to learn the size, whether ranges work and where redirects end up
+    def probe(self):
+        handlers = []
+        if self.proxy is not None:
+            handlers.append(urllib.request.ProxyHandler({'http': self.proxy, 'https': self.proxy} if self.proxy else {}))
+        if self.cookiejar is not None:
+            # Also keeps cookies set by redirects
+            handlers.append(urllib.request.HTTPCookieProcessor(self.cookiejar))
+        opener = urllib.request.build_opener(*handlers)
+        request = urllib.request.Request(self.url, headers=dict(self.headers, Range='bytes=0-0'))
+        with opener.open(request, timeout=30) as response:
+            final_url = response.geturl()
+            content_range = response.headers.get('Content-Range', '')
+            if response.status != 206 or '/' not in content_range:
+                return final_url, None
+            total = content_range.rsplit('/', 1)[1]
+            return final_url, int(total) if total.isdigit() else None
+
+    def _plan(self):
+        # [start, end, done] per chunk, end inclusive like the Range header
+        chunk_count = max(1, min(self.connections * CHUNKS_PER_CONNECTION, self.total // MIN_SEGMENT_SIZE))
+        chunk_size = -(-self.total // chunk_count)
+        return [[start, min(start + chunk_size, self.total) - 1, 0] for start in range(0, self.total, chunk_size)]
+
+    def _load_state(self):
+        # Resume only when the previous run was for the same file size and its data is still there
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('total') != self.total or not os.path.exists(self.work_path):
+            return None
+        if os.path.getsize(self.work_path) != self.total:
+            return None
+        return state.get('segments')
+
+    def _save_state(self, segments):
+        # Caller must hold self.lock
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'url': self.url, 'total': self.total, 'segments': segments}, f)
+        os.replace(tmp_path, self.state_path)
+        self.last_checkpoint = time.time()
+
+    def _connection(self, parsed):
+        # One keep-alive connection per worker thread, reused for every chunk it fetches
+        key = (parsed.scheme, parsed.netloc)
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.key != key:
+            if connection is not None:
+                connection.close()
+            connection = self._open_connection(parsed)
+            with self.lock:
+                self.open_connections.append(connection)
+            self.local.connection = connection
+            self.local.key = key
+        return connection
+
+    def _open_connection(self, parsed):
+        connection_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        proxy = self._proxy_for(parsed)
+        if proxy is None:
+            return connection_class(parsed.netloc, timeout=30)
+        proxy_parsed = urllib.parse.urlsplit(proxy)
+        if parsed.scheme == 'https':
+            # CONNECT through the proxy, TLS runs end to end with the media host
+            connection = http.client.HTTPSConnection(proxy_parsed.hostname, proxy_parsed.port or 80, timeout=30)
+            connection.set_tunnel(parsed.hostname, parsed.port or 443, headers=self._proxy_headers(proxy_parsed))
+            return connection
+        return http.client.HTTPConnection(proxy_parsed.hostname, proxy_parsed.port or 80, timeout=30)
+
+    def _proxy_headers(self, proxy_parsed):
+        if proxy_parsed.username is None:
+            return {}
+        credentials = f"{urllib.parse.unquote(proxy_parsed.username)}:{urllib.parse.unquote(proxy_parsed.password or '')}"
+        return {'Proxy-Authorization': 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')}
+
+    def _request(self, parsed, url):
+        # Path and headers of a GET, plain http through a proxy asks the proxy for the absolute URL
+        headers = {}
+        proxy = self._proxy_for(parsed)
+        if proxy is not None and parsed.scheme == 'http':
+            headers = self._proxy_headers(urllib.parse.urlsplit(proxy))
+            return url, headers
+        return parsed.path + ('?' + parsed.query if parsed.query else ''), headers
+
+    def _drop_connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+        self.local.connection = None
+
+    def _close_connections(self):
+        with self.lock:
+            connections, self.open_connections = self.open_connections, []
+        for connection in connections:
+            connection.close()
+        self.local = threading.local()
+
+    def _fetch(self, segment, segments, url):
+        parsed = urllib.parse.urlsplit(url)
+        target, proxy_headers = self._request(parsed, url)
+        attempt = 0
+        # Unbuffered, a checkpoint must never count bytes still sitting in another thread's buffer
+        with open(self.work_path, 'r+b', buffering=0) as f:
+            while segment[0] + segment[2] <= segment[1]:
+                offset = segment[0] + segment[2]
+                try:
+                    connection = self._connection(parsed)
+                    headers = self._headers(url, Range=f'bytes={offset}-{segment[1]}', **proxy_headers)
+                    connection.request('GET', target, headers=headers)
+                    response = connection.getresponse()
+                    if response.status != 206:
+                        response.read()
+                        raise SegmentedDownloadError(f"Server answered {response.status} to a range request")
+                    # A server that answers with another range than the one asked for would corrupt the file
+                    match = _CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+                    if not match or int(match.group(1)) != offset:
+                        self._drop_connection()
+                        raise SegmentedDownloadError(f"Server sent range {response.headers.get('Content-Range')} for {offset}-{segment[1]}")
+                    f.seek(offset)
+                    received = 0
+                    while True:
+                        remaining = segment[1] + 1 - (segment[0] + segment[2])
+                        if remaining <= 0:
+                            break
+                        data = response.read(min(READ_SIZE, remaining))
+                        if not data:
+                            break
+                        f.write(data)
+                        received += len(data)
+                        with self.lock:
+                            segment[2] += len(data)
+                            self.downloaded += len(data)
+                            if time.time() - self.last_checkpoint >= CHECKPOINT_INTERVAL:
+                                self._save_state(segments)
+                        self._report('downloading')
+                    if not response.isclosed():
+                        # More data than asked for, the connection is out of step
+                        self._drop_connection()
+                    # http.client ends a body cut short without an error. Whatever arrived is kept and
+                    # the rest asked for again, a response that brought nothing counts as a failed attempt
+                    if not received:
+                        raise SegmentedDownloadError("Connection closed before any data arrived")
+                    attempt = 0
+                except (OSError, http.client.HTTPException, SegmentedDownloadError) as e:
+                    # A short read keeps what arrived, the next request continues after it
+                    self._drop_connection()
+                    attempt += 1
+                    if attempt > SEGMENT_RETRIES:
+                        raise SegmentedDownloadError(f"Range {offset}-{segment[1]} failed: {e}")
+                    time.sleep(attempt * RETRY_DELAY)
+
+    def _report(self, status):
+        if not self.progress_hooks:
+            return
+        elapsed = time.time() - self.started
+        speed = self.downloaded / elapsed if elapsed > 0 else None
+        d = {
+            'status': status,
+            'filename': self.path,
+            'tmpfilename': self.work_path,
+            'downloaded_bytes': self.downloaded,
+            'total_bytes': self.total,
+            'speed': speed,
+            'eta': (self.total - self.downloaded) / speed if speed else None,
+            'elapsed': elapsed,
+            'info_dict': self.info_dict,
+        }
+        for hook in self.progress_hooks:
+            hook(d)
+
+    # Returns False when the server cannot serve ranges, the caller should use a normal download then
+    def download(self):
+        if not self.supported():
+            return False
+        url, self.total = self.probe()
+        if not self.total or self.total < 2 * MIN_SEGMENT_SIZE:
+            return False
+
+        segments = self._load_state()
+        if segments is None:
+            # Preallocate the whole file so every chunk can be written at its offset right away
+            with open(self.work_path, 'wb') as f:
+                f.truncate(self.total)
+            segments = self._plan()
+        self.downloaded = sum(segment[2] for segment in segments)
+        self.started = time.time()
+        with self.lock:
+            self._save_state(segments)
+
+        pending = [segment for segment in segments if segment[0] + segment[2] <= segment[1]]
+        try:
+            with ThreadPoolExecutor(max_workers=self.connections) as pool:
+                # Every worker opens its own connection, list() re-raises the first failed chunk
+                list(pool.map(lambda segment: self._fetch(segment, segments, url), pending))
+        finally:
+            with self.lock:
+                self._save_state(segments)
+            self._close_connections()
+
+        os.replace(self.work_path, self.path)
+        os.remove(self.state_path)
+        # yt-dlp reports 'finished' itself when it picks up the file
+        return True
+
+    # Removes the partial file and its state, for when yt-dlp downloads the file itself instead
+    def discard(self):
+        for path in (self.work_path, self.state_path, self.state_path + '.tmp'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# Fetch the formats selected for an unprocessed info dict if they are plain files over http(s).
+# False when yt-dlp has to download (the rest of) them itself, also when a range request failed
+def prefetch(ydl, info, connections=4):
+    # yt-dlp would delete or re-download the prefetched files with these options
+    if ydl.params.get('overwrites') or not ydl.params.get('continuedl', True) or ydl.params.get('nopart'):
+        return False
+    if info.get('_type', 'video') != 'video':
+        return False
+    selected = ydl.process_ie_result(copy.deepcopy(info), download=False)
+    if not selected:
+        return False
+    filename = ydl.prepare_filename(selected, 'temp')
+    if os.path.exists(filename):
+        return True
+    parts = selected.get('requested_formats') or [selected]
+    if any(part.get('protocol') not in ('http', 'https') or not part.get('url') for part in parts):
+        return False
+    directory = os.path.dirname(filename)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    for part in parts:
+        part_filename = filename
+        if selected.get('requested_formats'):
+            # yt-dlp names the parts of a merge "<name>.f<format_id>.<ext>" before merging them
+            part_filename = f"{os.path.splitext(filename)[0]}.f{part['format_id']}.{part['ext']}"
+        if os.path.exists(part_filename):
+            continue
+        part_info = dict(selected, **part)
+        downloader = SegmentedDownloader(part['url'], part_filename, part.get('http_headers') or selected.get('http_headers'),
+                                         connections, ydl.params.get('progress_hooks'), part_info,
+                                         proxy=ydl.params.get('proxy'), cookiejar=getattr(ydl, 'cookiejar', None))
+        try:
+            if not downloader.download():
+                return False
+        except (OSError, http.client.HTTPException, SegmentedDownloadError) as e:
+            # urllib's HTTPError and URLError are OSErrors too
+            ydl.report_warning(f"Segmented download failed, downloading with one connection instead: {e}")
+            downloader.discard()
+            return False
+    return True
+
+# Same as infocache.extract_and_download with the media fetched over several connections when possible
+def extract_and_download(ydl, url, connections=4):
+    info = infocache.extract_info(ydl, url)
+    if info is None:
+        return None
+    if connections > 1:
+        prefetch(ydl, info, connections)
+    return ydl.process_ie_result(info, download=True)
+
+# Same as infocache.download with the media fetched over several connections when possible
+def download(ydl, url, connections=4):
+    return infocache.download(ydl, url, lambda ydl, url: extract_and_download(ydl, url, connections))
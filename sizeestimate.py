@@ -0,0 +1,159 @@
+#Playlist size estimation, samples a few videos of a playlist and scales their bitrate by the playlist durations
+#Flat playlist entries usually carry the duration of every video, so the only unknown is how many bytes per
+#second the chosen format takes. That is measured on a random sample, the spread of the samples gives a 95%
+#prediction interval for the playlist total (where the total itself is expected to land, not just the mean
+#bitrate), and every measurement is kept per format so the next playlist starts with an estimate.
+import json
+import math
+import os
+import threading
+import ydlopts
+
+BITRATE_CACHE_PATH = os.path.join(os.path.expanduser("~"), "Downloads", "yt-dlite", ".cache", "bitrates.json")
+# Observations kept per format, the oldest are dropped first
+MAX_OBSERVATIONS = 50
+# Two-sided 95% Student t quantiles by degrees of freedom, small samples get the wide interval they deserve
+T_95 = {1: 12.71, 2: 4.30, 3: 3.18, 4: 2.78, 5: 2.57, 6: 2.45, 7: 2.36, 8: 2.31, 9: 2.26, 10: 2.23,
+        15: 2.13, 20: 2.09, 30: 2.04, 60: 2.00}
+Z_95 = 1.96
+
+def t_quantile(dof):
+    if dof > max(T_95):
+        return Z_95
+    return T_95[max(k for k in T_95 if k <= dof)]
+
+class BitrateCache:
+    def __init__(self, path=BITRATE_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.observations = json.load(f)
+        except (OSError, ValueError):
+            self.observations = {}
+
+    def get(self, format_key):
+        with self.lock:
+            return list(self.observations.get(format_key, []))
+
+    def add(self, format_key, bytes_per_second):
+        with self.lock:
+            values = self.observations.setdefault(format_key, [])
+            values.append(bytes_per_second)
+            del values[:-MAX_OBSERVATIONS]
+            try:
+                directory = os.path.dirname(self.path)
+                if not os.path.exists(directory):
+                    os.makedirs(directory)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.observations, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass  # The estimate still works, it just starts cold next time
+
+_bitrate_cache = None
+_bitrate_cache_lock = threading.Lock()
+
+def get_bitrate_cache():
+    global _bitrate_cache
+    with _bitrate_cache_lock:
+        if _bitrate_cache is None:
+            _bitrate_cache = BitrateCache()
+        return _bitrate_cache
+
+# Audio converted to a fixed bitrate has a known size per second, no sampling needed
+def target_audio_bitrate(format_string, item_type=None):
+    for pp in ydlopts.compile_format(format_string, item_type).get('postprocessors', ()):
+        quality = pp['preferredquality']
+        # 0-9 are VBR levels, anything above is kbps
+        if pp['preferredcodec'] == 'mp3' and quality.isdigit() and int(quality) > 9:
+            return int(quality) * 1000 / 8
+    return None
+
+def _mean_and_variance(values):
+    # Mean and sample variance, None for the variance until there are two values
+    mean = sum(values) / len(values)
+    if len(values) < 2:
+        return mean, None
+    return mean, sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+
+# Size in bytes of the format yt-dlp selected for a processed info dict, None when unknown
+def selected_size(info):
+    total = 0
+    for fmt in info.get('requested_formats') or [info]:
+        size = fmt.get('filesize') or fmt.get('filesize_approx')
+        if not size:
+            return None
+        total += size
+    return total
+
+class PlaylistSizeEstimator:
+    def __init__(self, format_key, fixed_bitrate=None):
+        self.format_key = format_key
+        self.fixed_bitrate = fixed_bitrate
+        self.lock = threading.Lock()
+        self.sizes = []  # bytes per sampled video
+        self.bitrates = []  # bytes per second of sampled videos with a duration
+        self.cached_bitrates = [] if fixed_bitrate else get_bitrate_cache().get(format_key)
+
+    def add_sample(self, size, duration=None):
+        with self.lock:
+            self.sizes.append(size)
+            if duration:
+                self.bitrates.append(size / duration)
+        if duration and not self.fixed_bitrate:
+            get_bitrate_cache().add(self.format_key, size / duration)
+
+    @property
+    def sample_count(self):
+        with self.lock:
+            return len(self.sizes)
+
+    def estimate(self, durations):
+        """durations of every known video, None where unknown. Returns (total, low, high) or None,
+        low and high bound a 95% prediction interval for the playlist total"""
+        with self.lock:
+            sizes = list(self.sizes)
+            # Fresh samples describe this playlist better than older observations of the format
+            bitrates = list(self.bitrates) or list(self.cached_bitrates)
+        known = [d for d in durations if d]
+        unknown_count = len(durations) - len(known)
+
+        # Every video varies around the mean on its own, and the mean itself is only estimated, the
+        # variance of the total has a term for each: var * (sum of squared weights + (sum of weights)^2 / n)
+        total = 0
+        variance = 0
+        dofs = []
+        interval = True
+        if known:
+            if self.fixed_bitrate:
+                total += self.fixed_bitrate * sum(known)
+            elif bitrates:
+                mean, bitrate_variance = _mean_and_variance(bitrates)
+                total += mean * sum(known)
+                if bitrate_variance is None:
+                    interval = False
+                else:
+                    variance += bitrate_variance * (sum(d * d for d in known) + sum(known) ** 2 / len(bitrates))
+                    dofs.append(len(bitrates) - 1)
+            else:
+                return None
+        if unknown_count:
+            # Videos without a duration are counted at the average sampled size
+            if sizes:
+                mean, size_variance = _mean_and_variance(sizes)
+            elif known and total:
+                mean, size_variance = total / len(known), None
+            else:
+                return None
+            total += mean * unknown_count
+            if size_variance is None:
+                interval = False
+            else:
+                variance += size_variance * (unknown_count + unknown_count ** 2 / len(sizes))
+                dofs.append(len(sizes) - 1)
+        if not interval:
+            return total, None, None
+        half_width = (t_quantile(min(dofs)) if dofs else Z_95) * math.sqrt(variance)
+        return total, max(0, total - half_width), total + half_width
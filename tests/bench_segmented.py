@@ -0,0 +1,60 @@
+#Benchmark of the segmented downloader against one plain stream, run as a script: python tests/bench_segmented.py
+#The local server adds latency to every response and limits every connection to a fixed rate, as a media
+#CDN throttling single connections does. Not collected by pytest (no test_ prefix).
+import argparse
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import segmented
+from rangeserver import RangeServer
+
+def single_stream(server, path):
+    with urllib.request.urlopen(server.url) as response, open(path, 'wb') as f:
+        while True:
+            data = response.read(segmented.READ_SIZE)
+            if not data:
+                break
+            f.write(data)
+
+def segmented_download(server, path, connections):
+    if not segmented.SegmentedDownloader(server.url, path, connections=connections, proxy='').download():
+        raise RuntimeError("Segmented download fell back")
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Single stream vs segmented download against a throttled local server")
+    parser.add_argument('--size', type=int, default=32, help="Size of the file in MB")
+    parser.add_argument('--rate', type=float, default=4, help="MB/s per connection")
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds before every response")
+    parser.add_argument('--connections', type=int, nargs='+', default=[2, 4, 8])
+    args = parser.parse_args()
+
+    data = os.urandom(args.size * 1024 * 1024)
+    server = RangeServer(data).start()
+    server.rate = args.rate * 1024 * 1024
+    server.latency = args.latency
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'single.bin')
+            base = timed(single_stream, server, path)
+            print(f"single stream      {base:6.2f}s  {args.size / base:6.1f} MB/s")
+            for connections in args.connections:
+                path = os.path.join(tmp, f"segmented-{connections}.bin")
+                seconds = timed(segmented_download, server, path, connections)
+                with open(path, 'rb') as f:
+                    if f.read() != data:
+                        raise RuntimeError("Segmented download is corrupt")
+                print(f"{connections} connections      {seconds:6.2f}s  {args.size / seconds:6.1f} MB/s  x{base / seconds:.1f}")
+    finally:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#Local HTTP server for the segmented downloader tests and benchmark, serves one blob with or without Range support
+#Failures are scripted on the server object: cut the next responses off after a few bytes, cap the bytes of
+#every range response, add latency or a per connection rate limit. Requests with an absolute URL are served
+#as if the server were an http proxy in front of the real host.
+import http.server
+import re
+import threading
+import time
+import urllib.parse
+
+_RANGE_RE = re.compile(r'bytes=(\d+)-(\d*)')
+
+class RangeServer:
+    def __init__(self, data, ranges=True):
+        self.data = data
+        self.ranges = ranges
+        self.cut_requests = 0  # the next range responses that are cut off
+        self.cut_after = 0  # bytes sent before such a response is cut
+        self.budget = None  # range bytes sent before every further range response is cut off right away
+        self.max_response = None  # bytes per range response, the client has to ask again for the rest
+        self.latency = 0  # seconds before every response
+        self.rate = None  # bytes per second per connection
+        self.lock = threading.Lock()
+        self.requests = []  # dict per request: range, bytes, port, proxied, cookie
+        self.open_connections = 0
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self.httpd.daemon_threads = True
+        # Clients hanging up in the middle of a response is what the tests are about
+        self.httpd.handle_error = lambda request, client_address: None
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/media.bin"
+
+    @property
+    def proxy(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def bytes_sent(self):
+        with self.lock:
+            return sum(request['bytes'] for request in self.requests)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+
+            def setup(self):
+                super().setup()
+                with server.lock:
+                    server.open_connections += 1
+
+            def finish(self):
+                super().finish()
+                with server.lock:
+                    server.open_connections -= 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                proxied = self.path.startswith('http://')
+                path = urllib.parse.urlsplit(self.path).path if proxied else self.path
+                if path != '/media.bin':
+                    self.send_error(404)
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                data = server.data
+                match = _RANGE_RE.match(self.headers.get('Range', ''))
+                record = {'range': self.headers.get('Range'), 'bytes': 0, 'port': self.client_address[1],
+                          'proxied': proxied, 'cookie': self.headers.get('Cookie')}
+                with server.lock:
+                    sent = sum(request['bytes'] for request in server.requests)
+                    server.requests.append(record)
+                    cut = False
+                    cut_after = server.cut_after
+                    if match and server.ranges and server.cut_requests:
+                        server.cut_requests -= 1
+                        cut = True
+                    elif match and server.ranges and server.budget is not None and sent >= server.budget:
+                        cut = True
+                        cut_after = 0
+
+                if not match or not server.ranges:
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self._send(data, record)
+                    return
+
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else len(data) - 1
+                end = min(end, len(data) - 1)
+                if server.max_response:
+                    end = min(end, start + server.max_response - 1)
+                body = data[start:end + 1]
+                self.send_response(206)
+                self.send_header('Content-Range', f"bytes {start}-{end}/{len(data)}")
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if cut:
+                    # Promise the whole range, send part of it and hang up
+                    self._send(body[:cut_after], record)
+                    self.close_connection = True
+                    return
+                self._send(body, record)
+
+            def _send(self, body, record):
+                step = 16 * 1024
+                for i in range(0, len(body), step):
+                    chunk = body[i:i + step]
+                    self.wfile.write(chunk)
+                    with server.lock:
+                        record['bytes'] += len(chunk)
+                    if server.rate:
+                        time.sleep(len(chunk) / server.rate)
+
+        return Handler
@@ -0,0 +1,95 @@
+import dbm.dumb
+
+import archive
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def test_make_archive_id():
+    assert archive.make_archive_id({'extractor_key': 'Youtube', 'id': 'abc'}) == 'youtube abc'
+    assert archive.make_archive_id({'ie_key': 'Vimeo', 'id': '1'}) == 'vimeo 1'
+    assert archive.make_archive_id({'id': 'abc'}) is None
+
+def test_entries_are_logged_in_ytdlp_format_and_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'archive.txt')
+    first = archive.DownloadArchive(path)
+    first.add('youtube abc')
+    first.add('youtube abc')
+    first.add('vimeo 1')
+    first.close()
+    assert _read(path) == 'youtube abc\nvimeo 1\n'
+
+    second = archive.DownloadArchive(path)
+    assert 'youtube abc' in second
+    assert 'vimeo 1' in second
+    assert 'youtube other' not in second
+    second.close()
+
+def test_lines_written_by_another_process_are_picked_up(tmp_path):
+    path = str(tmp_path / 'archive.txt')
+    downloads = archive.DownloadArchive(path)
+    downloads.add('youtube abc')
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('youtube def\nyoutube unfinished')
+    downloads.add('youtube ghi')
+    assert 'youtube def' in downloads
+    assert 'youtube unfinished' not in downloads
+    downloads.close()
+    # The cut off line is ended before the new one, they do not run together
+    with open(path, 'r', encoding='utf-8') as f:
+        assert f.read().splitlines() == ['youtube abc', 'youtube def', 'youtube unfinished', 'youtube ghi']
+    downloads = archive.DownloadArchive(path)
+    assert 'youtube unfinished' in downloads
+    assert 'youtube ghi' in downloads
+    downloads.close()
+
+def test_truncated_log_rebuilds_the_index(tmp_path):
+    path = str(tmp_path / 'archive.txt')
+    downloads = archive.DownloadArchive(path)
+    downloads.add('youtube abc')
+    downloads.add('youtube def')
+    downloads.close()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('youtube x\n')
+    downloads = archive.DownloadArchive(path)
+    assert 'youtube x' in downloads
+    assert 'youtube abc' not in downloads
+    downloads.close()
+
+def test_dumb_dbm_index_is_not_used(tmp_path):
+    # dbm.dumb takes no lock, two instances writing it would corrupt it
+    path = str(tmp_path / 'archive.txt')
+    index = dbm.dumb.open(path + '.idx', 'c')
+    index.close()
+    downloads = archive.DownloadArchive(path)
+    assert isinstance(downloads.index, dict)
+    downloads.add('youtube abc')
+    assert 'youtube abc' in downloads
+    downloads.close()
+    assert 'youtube abc' in archive.DownloadArchive(path)
+
+def test_transaction_commits_only_on_commit(tmp_path):
+    downloads = archive.DownloadArchive(str(tmp_path / 'archive.txt'))
+    downloads.add('youtube old')
+    transaction = archive.ArchiveTransaction(downloads)
+    assert 'youtube old' in transaction
+    transaction.add('youtube abc')
+    assert 'youtube abc' not in downloads
+    transaction.commit()
+    assert 'youtube abc' in downloads
+    downloads.close()
+
+def test_transaction_rollback_drops_pending(tmp_path):
+    downloads = archive.DownloadArchive(str(tmp_path / 'archive.txt'))
+    transaction = archive.ArchiveTransaction(downloads)
+    transaction.add('youtube abc')
+    transaction.rollback()
+    transaction.commit()
+    assert 'youtube abc' not in downloads
+    downloads.close()
+
+def test_open_archive_is_shared_per_file(tmp_path):
+    path = str(tmp_path / 'archive.txt')
+    assert archive.open_archive(path) is archive.open_archive(path)
+    archive.open_archive(path).close()
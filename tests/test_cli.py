@@ -0,0 +1,99 @@
+import importlib.util
+import io
+import os
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope='module')
+def cli():
+    spec = importlib.util.spec_from_file_location('yt_dlitec', os.path.join(ROOT, 'yt-dlitec.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_strip_cli_options(cli):
+    args = ['--jobs', '4', '-f', 'best', '--segments=8', '--json', '--batch-file', 'urls.txt', '--no-playlist', 'u']
+    assert cli.strip_cli_options(args) == ['-f', 'best', '--no-playlist', 'u']
+
+def test_cli_options_do_not_reach_yt_dlp(cli):
+    assert cli.parse_yt_dlp_args(cli.strip_cli_options(['--jobs', '4', '--download-archive', 'a.txt'])) == {}
+
+class FakeDownloads:
+    # Stands in for segmented.download, records how many downloads ran at once
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.most = 0
+
+    def __call__(self, ydl, url, segments=1):
+        with self.lock:
+            self.running += 1
+            self.most = max(self.most, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        if url == 'raises':
+            raise ValueError('unsupported URL')
+        return 1 if url in self.failing else 0
+
+def test_parallel_download_runs_jobs_at_once_and_returns_failures(cli, monkeypatch):
+    import segmented
+    downloads = FakeDownloads(failing={'bad'})
+    monkeypatch.setattr(segmented, 'download', downloads)
+    urls = ['u1', 'bad', 'u2', 'raises', 'u3', 'u4']
+    failed = cli.parallel_yt_dlp_download(urls, jobs=3)
+    assert failed == {'bad': (1, 'yt-dlp returned error code: 1'), 'raises': (1, 'unsupported URL')}
+    assert 1 < downloads.most <= 3
+
+def test_parallel_download_reads_lazy_urls(cli, monkeypatch):
+    import segmented
+    monkeypatch.setattr(segmented, 'download', FakeDownloads())
+    read = []
+    def urls():
+        for i in range(10):
+            read.append(i)
+            yield f"u{i}"
+    assert cli.parallel_yt_dlp_download(urls(), jobs=2) == {}
+    assert read == list(range(10))
+
+def test_batch_progress_counts(cli, capsys):
+    progress = cli.BatchProgress(3)
+    for url, ok in (('a', True), ('b', False)):
+        progress.start(url)
+        progress.hook(url)({'status': 'downloading', 'downloaded_bytes': 100, 'speed': 10})
+        progress.finish(url, ok)
+    assert (progress.done, progress.failed, progress.finished_bytes, progress.active) == (2, 1, 200, {})
+
+def test_batch_file_skips_blank_and_comment_lines(cli, tmp_path):
+    path = tmp_path / 'urls.txt'
+    path.write_text('u1\n\n  # comment\n; note\n] other\n  u2  \nu3', encoding='utf-8')
+    assert list(cli.read_batch_file(str(path))) == ['u1', 'u2', 'u3']
+
+def test_batch_file_is_read_lazily(cli, tmp_path):
+    path = tmp_path / 'urls.txt'
+    path.write_text('u1\nu2\n', encoding='utf-8')
+    urls = cli.read_batch_file(str(path))
+    assert next(urls) == 'u1'
+    # Lines appended while the queue runs are still picked up
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('u3\n')
+    assert list(urls) == ['u2', 'u3']
+
+def test_batch_file_from_stdin(cli, monkeypatch):
+    monkeypatch.setattr(cli.sys, 'stdin', io.StringIO('u1\n#u2\nu3\n'))
+    assert list(cli.read_batch_file('-')) == ['u1', 'u3']
+    assert not cli.sys.stdin.closed
+
+def test_batch_urls_stream_into_the_downloader(cli, tmp_path, monkeypatch):
+    import segmented
+    downloaded = []
+    monkeypatch.setattr(segmented, 'download', lambda ydl, url, segments=1: downloaded.append(url) or 0)
+    path = tmp_path / 'urls.txt'
+    path.write_text('u1\n# skipped\nu2\n', encoding='utf-8')
+    assert cli.direct_yt_dlp_download(cli.read_batch_file(str(path)))
+    assert downloaded == ['u1', 'u2']
@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+import contentindex
+
+KEY = 'format:best:'
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = contentindex.ContentIndex(str(tmp_path / 'cache' / 'content.json'))
+    monkeypatch.setattr(contentindex, '_index', index)
+    yield index
+    index.flush()
+
+def _file(path, size=1000):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(os.urandom(size))
+    return str(path)
+
+def test_video_id_from_url():
+    assert contentindex.video_id_from_url('https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=1') == 'dQw4w9WgXcQ'
+    assert contentindex.video_id_from_url('https://youtu.be/dQw4w9WgXcQ') == 'dQw4w9WgXcQ'
+    assert contentindex.video_id_from_url('https://www.youtube.com/shorts/dQw4w9WgXcQ') == 'dQw4w9WgXcQ'
+    assert contentindex.video_id_from_url('https://example.com/video') is None
+    assert contentindex.video_id_from_url(None) is None
+
+def test_format_key_ignores_options_that_give_the_same_file():
+    mp3 = contentindex.format_key('bestaudio/best -x --audio-format mp3 --audio-quality 320K --embed-thumbnail')
+    assert mp3 == contentindex.format_key('bestaudio -x --audio-format mp3 --audio-quality 320K') == 'audio:mp3:320'
+    assert contentindex.format_key('-f 137+140 --merge-output-format mkv') == 'format:137+140:mkv'
+    assert contentindex.format_key('137+140') != contentindex.format_key('-f 137+140 --merge-output-format mkv')
+
+def test_lookup_finds_intact_files(index, tmp_path):
+    path = _file(tmp_path / 'a' / 'v.mp4')
+    index.add('abc', KEY, path)
+    assert index.lookup('abc', KEY)['path'] == path
+    assert index.lookup('abc', 'audio:mp3:320') is None
+    assert index.lookup('other', KEY) is None
+
+def test_changed_or_missing_files_are_dropped(index, tmp_path):
+    path = _file(tmp_path / 'a' / 'v.mp4', 3 * contentindex.CHECKSUM_BLOCK)
+    index.add('abc', KEY, path)
+    # Same size and a new mtime, only the checksum tells the content changed
+    with open(path, 'r+b') as f:
+        f.write(b'changed')
+    os.utime(path, (1, 1))
+    assert index.lookup('abc', KEY) is None
+    assert index.entries == {}
+    index.add('abc', KEY, path)
+    os.remove(path)
+    assert index.lookup('abc', KEY) is None
+
+def test_touched_file_with_the_same_content_is_kept(index, tmp_path):
+    path = _file(tmp_path / 'a' / 'v.mp4')
+    index.add('abc', KEY, path)
+    os.utime(path, (1, 1))
+    assert index.lookup('abc', KEY) is not None
+
+def test_writes_are_batched_until_flush(index, tmp_path):
+    for i in range(3):
+        index.add(f"v{i}", KEY, _file(tmp_path / 'a' / f"v{i}.mp4"))
+    assert not os.path.exists(index.path)
+    assert index.timer is not None
+    index.flush()
+    with open(index.path, 'r', encoding='utf-8') as f:
+        assert len(json.load(f)) == 3
+    assert index.timer is None and not index.dirty
+    assert len(contentindex.ContentIndex(index.path).entries) == 3
+
+def test_place_links_or_copies_into_the_output_folder(index, tmp_path):
+    path = _file(tmp_path / 'a' / 'v.mp4')
+    index.add('abc', KEY, path)
+    entry = index.lookup('abc', KEY)
+    # Already where it was asked for
+    assert contentindex.place(entry, str(tmp_path / 'a')) == path
+    target = contentindex.place(entry, str(tmp_path / 'b'))
+    assert target == str(tmp_path / 'b' / 'v.mp4')
+    with open(target, 'rb') as placed, open(path, 'rb') as source:
+        assert placed.read() == source.read()
+
+def test_place_copies_when_links_fail(index, tmp_path, monkeypatch):
+    path = _file(tmp_path / 'a' / 'v.mp4')
+    index.add('abc', KEY, path)
+    def no_links(source, target):
+        raise OSError('cross-device link')
+    monkeypatch.setattr(contentindex.os, 'link', no_links)
+    target = contentindex.place(index.lookup('abc', KEY), str(tmp_path / 'b'))
+    assert os.path.getsize(target) == 1000
+    assert not os.path.exists(target + '.part')
+
+def test_place_does_not_overwrite_another_file(index, tmp_path):
+    path = _file(tmp_path / 'a' / 'v.mp4')
+    _file(tmp_path / 'b' / 'v.mp4', 10)
+    index.add('abc', KEY, path)
+    assert contentindex.place(index.lookup('abc', KEY), str(tmp_path / 'b')) is None
+
+def test_find_existing_and_record(index, tmp_path):
+    path = _file(tmp_path / 'a' / 'v.mp3')
+    mp3 = 'bestaudio -x --audio-format mp3 --audio-quality 320K'
+    assert contentindex.find_existing('abc', mp3, 'audio', str(tmp_path / 'b')) is None
+    contentindex.record('abc', mp3, 'audio', path)
+    assert contentindex.find_existing('abc', mp3, 'audio', str(tmp_path / 'b')) == str(tmp_path / 'b' / 'v.mp3')
+    assert contentindex.find_existing(None, mp3, 'audio', str(tmp_path / 'b')) is None
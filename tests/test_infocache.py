@@ -0,0 +1,140 @@
+import os
+import time
+
+import pytest
+
+import infocache
+
+def _cache(tmp_path, **kwargs):
+    return infocache.InfoCache(str(tmp_path / 'info'), **kwargs)
+
+def _info(video_id, size=0, url=None):
+    info = {'id': video_id, 'title': 'x' * size, 'webpage_url': f"https://www.youtube.com/watch?v={video_id}"}
+    if url:
+        info['formats'] = [{'format_id': '18', 'url': url}]
+    return info
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(time.time())
+    monkeypatch.setattr(infocache.time, 'time', clock)
+    return clock
+
+class FakeYDL:
+    # Stands in for YoutubeDL, counts the extractions that actually ran
+    def __init__(self, params=None, info=None):
+        self.params = params or {}
+        self.info = info
+        self.extracted = []
+
+    def extract_info(self, url, download=True, process=True):
+        self.extracted.append(url)
+        return dict(self.info)
+
+    def in_download_archive(self, info):
+        return False
+
+def test_entries_come_back_as_copies(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.put('u', _info('a'))
+    first = cache.get('u')
+    first['title'] = 'changed'
+    assert cache.get('u')['title'] == ''
+
+def test_entries_survive_a_restart(tmp_path):
+    _cache(tmp_path).put('u', _info('a'))
+    assert _cache(tmp_path).get('u')['id'] == 'a'
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = _cache(tmp_path, ttl=60)
+    cache.put('u', _info('a'))
+    clock.now += 59
+    assert cache.get('u') is not None
+    clock.now += 2
+    assert cache.get('u') is None
+    # Gone from disk too, a new process does not pick it up
+    assert _cache(tmp_path, ttl=60).get('u') is None
+
+def test_signed_urls_shorten_the_lifetime(tmp_path, clock):
+    cache = _cache(tmp_path, ttl=24 * 60 * 60)
+    expire = int(clock.now) + 60 * 60
+    cache.put('u', _info('a', url=f"https://r1.googlevideo.com/videoplayback?expire={expire}&sig=x"))
+    # Dropped a few minutes before the media URL stops working, not after the TTL
+    clock.now = expire - infocache._EXPIRY_MARGIN - 1
+    assert cache.get('u') is not None
+    clock.now += 2
+    assert cache.get('u') is None
+
+def test_almost_expired_signed_urls_are_not_cached(tmp_path, clock):
+    cache = _cache(tmp_path)
+    expire = int(clock.now) + 60
+    assert not cache.put('u', _info('a', url=f"https://example.com/expire/{expire}/video.mp4"))
+    assert cache.get('u') is None
+
+def test_signed_url_expiry_takes_the_earliest_url():
+    info = {'url': 'https://a/?expire=1700000500', 'formats': [{'url': 'https://b/?expire=1700000100'},
+                                                               {'manifest_url': 'https://c/expire/1700000300/'},
+                                                               {'url': 'https://d/plain.mp4'}]}
+    assert infocache.signed_url_expiry(info) == 1700000100
+    assert infocache.signed_url_expiry({'formats': [{'url': 'https://d/plain.mp4'}]}) is None
+
+def test_memory_keeps_the_most_recently_used_entries(tmp_path):
+    cache = _cache(tmp_path, max_memory_bytes=2500)
+    cache.put('a', _info('a', 1000))
+    cache.put('b', _info('b', 1000))
+    cache.get('a')
+    cache.put('c', _info('c', 1000))
+    assert cache.memory_bytes <= 2500
+    assert list(cache.memory) == [cache._key('a'), cache._key('c')]
+    # Evicted from memory only, the disk copy still serves it
+    assert cache.get('b')['id'] == 'b'
+
+def test_disk_evicts_least_recently_used_past_the_byte_cap(tmp_path):
+    cache = _cache(tmp_path, max_bytes=2500)
+    for age, key in enumerate(('a', 'b')):
+        cache.put(key, _info(key, 1000))
+        stamp = time.time() - 100 + age
+        os.utime(cache._path(cache._key(key)), (stamp, stamp))
+    cache.put('c', _info('c', 1000))
+    names = set(os.listdir(cache.directory))
+    assert cache._key('a') + '.json' not in names
+    assert {cache._key('b') + '.json', cache._key('c') + '.json'} <= names
+
+def test_variants_do_not_share_entries(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put('u', _info('playlist'), variant='v1')
+    assert cache.get('u') is None
+    assert cache.get('u', 'v2') is None
+    assert cache.get('u', 'v1')['id'] == 'playlist'
+    assert cache._key('u') != cache._key('u', 'v1')
+
+def test_extraction_variant():
+    assert infocache.extraction_variant(FakeYDL()) == ''
+    # Off and empty mean the default
+    assert infocache.extraction_variant(FakeYDL({'noplaylist': False, 'cookiefile': None, 'proxy': ''})) == ''
+    # Options that do not change the extraction are ignored
+    assert infocache.extraction_variant(FakeYDL({'format': 'best', 'outtmpl': 'x'})) == ''
+    no_playlist = infocache.extraction_variant(FakeYDL({'noplaylist': True}))
+    assert no_playlist and no_playlist != infocache.extraction_variant(FakeYDL({'proxy': 'socks5://h'}))
+    # Only a hash ends up in the key, never the values
+    assert 'secret' not in infocache.extraction_variant(FakeYDL({'videopassword': 'secret'}))
+
+def test_extract_info_caches_under_the_canonical_url(tmp_path, monkeypatch):
+    monkeypatch.setattr(infocache, '_cache', _cache(tmp_path))
+    ydl = FakeYDL(info=_info('abc'))
+    assert infocache.extract_info(ydl, 'https://youtu.be/abc')['id'] == 'abc'
+    # The download goes through webpage_url, which must not extract again
+    assert infocache.extract_info(ydl, 'https://www.youtube.com/watch?v=abc')['id'] == 'abc'
+    assert infocache.extract_info(ydl, 'https://youtu.be/abc')['id'] == 'abc'
+    assert ydl.extracted == ['https://youtu.be/abc']
+    # Another variant extracts again
+    other = FakeYDL({'noplaylist': True}, info=_info('abc'))
+    infocache.extract_info(other, 'https://www.youtube.com/watch?v=abc')
+    assert other.extracted == ['https://www.youtube.com/watch?v=abc']
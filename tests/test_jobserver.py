@@ -0,0 +1,87 @@
+import http.client
+import importlib.util
+import json
+import os
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope='module')
+def cli():
+    spec = importlib.util.spec_from_file_location('yt_dlitec', os.path.join(ROOT, 'yt-dlitec.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class FakeJobQueue:
+    def __init__(self, root):
+        self.root = root
+        self.submitted = []
+
+    def resolve_output(self, output):
+        return os.path.join(self.root, output) if not os.path.isabs(output) else None
+
+    def submit(self, url, format=None, output=None):
+        self.submitted.append((url, format, output))
+        return str(len(self.submitted))
+
+    def list(self):
+        return [{'id': str(i + 1), 'url': url} for i, (url, _, _) in enumerate(self.submitted)]
+
+    def get(self, job_id):
+        return next((job for job in self.list() if job['id'] == job_id), None)
+
+@pytest.fixture
+def server(cli, tmp_path):
+    server = cli.job_server(FakeJobQueue(str(tmp_path)), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _request(server, method, path, body=None, **headers):
+    port = server.server_address[1]
+    headers.setdefault('Host', f"127.0.0.1:{port}")
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    connection.putrequest(method, path, skip_host=True)
+    for name, value in headers.items():
+        connection.putheader(name.replace('_', '-'), value)
+    data = json.dumps(body).encode('utf-8') if body is not None else b''
+    connection.putheader('Content-Length', str(len(data)))
+    connection.endheaders(data)
+    response = connection.getresponse()
+    payload = json.loads(response.read().decode('utf-8'))
+    connection.close()
+    return response.status, payload
+
+def test_json_jobs_are_queued(server):
+    status, payload = _request(server, 'POST', '/jobs', {'url': 'https://youtu.be/x', 'output': 'music'},
+                               Content_Type='application/json; charset=utf-8')
+    assert status == 201
+    assert payload == {'id': '1'}
+    assert _request(server, 'GET', '/jobs/1') == (200, {'id': '1', 'url': 'https://youtu.be/x'})
+    port = server.server_address[1]
+    assert _request(server, 'GET', '/jobs', Host=f"localhost:{port}", Origin=f"http://localhost:{port}")[0] == 200
+
+def test_simple_cross_site_post_is_refused(server):
+    # What a web page can send without a CORS preflight
+    status, _ = _request(server, 'POST', '/jobs', {'url': 'https://youtu.be/x'}, Content_Type='text/plain')
+    assert status == 415
+    status, _ = _request(server, 'POST', '/jobs', {'url': 'https://youtu.be/x'},
+                         Content_Type='application/json', Origin='https://evil.example')
+    assert status == 403
+    assert server.job_queue.submitted == []
+
+def test_foreign_host_is_refused(server):
+    # DNS rebinding: the page's own host name resolves to 127.0.0.1
+    assert _request(server, 'GET', '/jobs', Host='evil.example:8765')[0] == 403
+    assert _request(server, 'GET', '/jobs', Host='127.0.0.1')[0] == 403
+
+def test_output_outside_the_root_is_refused(server):
+    status, _ = _request(server, 'POST', '/jobs', {'url': 'https://youtu.be/x', 'output': '/etc'},
+                         Content_Type='application/json')
+    assert status == 400
+    assert server.job_queue.submitted == []
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import manifest
+
+URL = 'https://www.youtube.com/playlist?list=PL1'
+
+@pytest.fixture(autouse=True)
+def manifest_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest, 'MANIFEST_DIR', str(tmp_path / 'state'))
+    return tmp_path
+
+def _run(**kwargs):
+    run = manifest.PlaylistManifest(URL, 'Mix', 'best', 'video', '/out', parallel=2, **kwargs)
+    for i in range(3):
+        run.add({'id': f"v{i}", 'url': f"https://youtu.be/v{i}", 'title': f"Video {i}"})
+    return run
+
+def test_round_trip(manifest_dir):
+    run = _run(video_limit=10)
+    path = manifest_dir / 'v0.mp4'
+    path.write_bytes(b'x' * 100)
+    run.finished('v0', True, str(path))
+    run.finished('v1', False)
+    run.all_queued()
+
+    loaded = manifest.load_manifest(URL)
+    assert loaded.data == run.data
+    assert loaded.data['queued_all'] and loaded.data['video_limit'] == 10
+    assert loaded.data['items']['v0'] == {'index': 0, 'title': 'Video 0', 'url': 'https://youtu.be/v0',
+                                          'status': manifest.DONE, 'path': str(path), 'size': 100, 'offset': 100}
+    assert loaded.counts() == (1, 3)
+    assert [item['id'] for item in loaded.unfinished_items()] == ['v1', 'v2']
+    assert loaded.unfinished_items()[0] == {'id': 'v1', 'url': 'https://youtu.be/v1', 'title': 'Video 1',
+                                            'format': 'best', 'type': 'video'}
+
+def test_adding_an_item_twice_keeps_its_status():
+    run = _run()
+    run.update('v2', status=manifest.DONE)
+    run.add({'id': 'v2', 'url': 'https://youtu.be/v2'})
+    assert manifest.load_manifest(URL).data['items']['v2']['status'] == manifest.DONE
+
+def test_progress_is_checkpointed(monkeypatch):
+    run = _run()
+    run.progress('v0', 50)
+    # Written again only after CHECKPOINT_INTERVAL
+    assert 'offset' not in manifest.load_manifest(URL).data['items']['v0']
+    monkeypatch.setattr(manifest, 'CHECKPOINT_INTERVAL', 0)
+    run.progress('v0', 60)
+    assert manifest.load_manifest(URL).data['items']['v0']['offset'] == 60
+
+def test_verify_requeues_missing_and_changed_files(manifest_dir):
+    run = _run()
+    for item_id in ('v0', 'v1'):
+        path = manifest_dir / f"{item_id}.mp4"
+        path.write_bytes(b'x' * 100)
+        run.finished(item_id, True, str(path))
+    os.remove(manifest_dir / 'v0.mp4')
+    loaded = manifest.load_manifest(URL)
+    loaded.verify()
+    assert loaded.data['items']['v0']['status'] == manifest.PENDING
+    assert loaded.data['items']['v1']['status'] == manifest.DONE
+    (manifest_dir / 'v1.mp4').write_bytes(b'x' * 10)
+    loaded.verify()
+    assert loaded.counts() == (0, 3)
+
+def test_unknown_or_unreadable_manifests_are_ignored(manifest_dir):
+    assert manifest.load_manifest(URL) is None
+    run = _run()
+    with open(run.path, 'w', encoding='utf-8') as f:
+        f.write('{"url": ')
+    assert manifest.load_manifest(URL) is None
+    run.remove()
+    assert not os.path.exists(run.path)
@@ -0,0 +1,146 @@
+import pytest
+
+pytest.importorskip('tkinter')
+import misc
+
+class RedirectingYDL:
+    # Answers like YoutubeTabIE: a link to a video in a playlist redirects to the playlist
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def extract_info(self, url, download=True, process=True, ie_key=None):
+        assert not download and not process
+        self.calls.append((url, ie_key))
+        return self.results[url]
+
+PLAYLIST = 'https://www.youtube.com/playlist?list=PL1'
+
+def test_playlist_redirects_are_followed():
+    ydl = RedirectingYDL({
+        'https://www.youtube.com/watch?v=abc&list=PL1': {'_type': 'url', 'url': PLAYLIST, 'ie_key': 'YoutubeTab'},
+        PLAYLIST: {'_type': 'playlist', 'title': 'Mix', 'entries': iter([{'id': 'abc'}])},
+    })
+    info = misc.extract_playlist(ydl, 'https://www.youtube.com/watch?v=abc&list=PL1')
+    assert info['title'] == 'Mix'
+    assert [entry['id'] for entry in info['entries']] == ['abc']
+    assert ydl.calls == [('https://www.youtube.com/watch?v=abc&list=PL1', None), (PLAYLIST, 'YoutubeTab')]
+
+def test_playlist_without_redirect_is_extracted_once():
+    ydl = RedirectingYDL({PLAYLIST: {'_type': 'playlist', 'entries': iter([])}})
+    assert 'entries' in misc.extract_playlist(ydl, PLAYLIST)
+    assert len(ydl.calls) == 1
+
+def test_redirect_loops_end():
+    ydl = RedirectingYDL({'a': {'_type': 'url_transparent', 'url': 'b'}, 'b': {'_type': 'url', 'url': 'a'}})
+    info = misc.extract_playlist(ydl, 'a')
+    assert 'entries' not in info
+    assert len(ydl.calls) == misc.MAX_PLAYLIST_REDIRECTS + 1
+
+class FakeBus:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, key):
+        self.published.append(key)
+
+def _handler():
+    # Only the state _download_item touches, no Tk window
+    handler = misc.PlaylistHandler.__new__(misc.PlaylistHandler)
+    handler.download_cancelled = False
+    handler.manifest = None
+    handler.total_videos = 1
+    handler.log = lambda message, level="INFO": None
+    handler.progress_lock = misc.threading.Lock()
+    handler.items_finished = misc.threading.Condition(handler.progress_lock)
+    handler.progress_bus = FakeBus()
+    handler.completed_videos = handler.skipped_videos = handler.failed_videos = 0
+    handler.unfinished = 1
+    return handler
+
+def test_item_is_finished_when_the_content_index_fails(monkeypatch):
+    def broken(*args):
+        raise OSError('index unreadable')
+    monkeypatch.setattr(misc.contentindex, 'find_existing', broken)
+    handler = _handler()
+    handler._download_item(0, {'id': 'abc', 'title': 'A', 'url': 'u'}, '/tmp')
+    assert handler.unfinished == 0
+    assert (handler.completed_videos, handler.failed_videos) == (1, 1)
+    assert handler.progress_bus.published == ['overall']
+
+def test_item_already_on_disk_is_skipped(monkeypatch):
+    monkeypatch.setattr(misc.contentindex, 'find_existing', lambda *args: '/tmp/A.mp4')
+    handler = _handler()
+    handler._download_item(0, {'id': 'abc', 'title': 'A', 'url': 'u'}, '/tmp')
+    assert handler.unfinished == 0
+    assert (handler.completed_videos, handler.skipped_videos, handler.failed_videos) == (1, 1, 0)
+
+def test_parallel_downloads_stay_within_the_scheduler_limit(monkeypatch):
+    monkeypatch.setattr(misc.scheduler, '_scheduler', misc.scheduler.DownloadScheduler(max_concurrent=2))
+    handler = misc.PlaylistHandler.__new__(misc.PlaylistHandler)
+    assert handler._max_parallel() == 2
+
+class FakeDownloadItem:
+    # Stands in for misc.download_item, items fail as often as asked and then succeed
+    def __init__(self, failures=None, delays=None):
+        self.failures = dict(failures or {})
+        self.delays = delays or {}
+        self.lock = misc.threading.Lock()
+        self.running = 0
+        self.most = 0
+        self.calls = []
+
+    def __call__(self, item, output_path=None, progress_callback=None, log_func=None, archive=None, segments=1,
+                 compact=False):
+        with self.lock:
+            self.calls.append(item['id'])
+            self.running += 1
+            self.most = max(self.most, self.running)
+        misc.time.sleep(self.delays.get(item['id'], 0.01))
+        with self.lock:
+            self.running -= 1
+            failure = self.failures.get(item['id'])
+            if failure and failure[1] > 0:
+                self.failures[item['id']] = (failure[0], failure[1] - 1)
+                raise failure[0]
+        return {'success': True, 'title': item['id'], 'compact': compact}
+
+def _items(count):
+    return [{'id': f"v{i}", 'url': f"u{i}"} for i in range(count)]
+
+def test_results_come_in_completion_order(monkeypatch):
+    monkeypatch.setattr(misc, 'download_item', FakeDownloadItem(delays={'v0': 0.2}))
+    results = list(misc.iter_download_items(_items(3), workers=3, compact=True))
+    assert [result['item']['id'] for result in results] == ['v1', 'v2', 'v0']
+    assert all(result['success'] and result['compact'] and result['retries'] == 0 for result in results)
+
+def test_only_a_few_items_are_in_flight(monkeypatch):
+    fake = FakeDownloadItem()
+    monkeypatch.setattr(misc, 'download_item', fake)
+    read = []
+    def items():
+        for item in _items(20):
+            read.append(item['id'])
+            yield item
+    results = misc.iter_download_items(items(), workers=2)
+    next(results)
+    # Workers * 2 items are queued ahead, the rest of the iterable is not read yet
+    assert len(read) <= 5
+    assert len(list(results)) == 19
+    assert fake.most <= 2
+
+def test_transient_failures_are_retried(monkeypatch):
+    monkeypatch.setitem(misc.retry.BASE_DELAY, misc.retry.TRANSIENT, 0.01)
+    fake = FakeDownloadItem({'v1': (OSError('Connection reset by peer'), 2)})
+    monkeypatch.setattr(misc, 'download_item', fake)
+    results = {result['item']['id']: result for result in misc.iter_download_items(_items(2), workers=2)}
+    assert results['v1']['success'] and results['v1']['retries'] == 2
+    assert fake.calls.count('v1') == 3
+
+def test_permanent_failures_are_yielded(monkeypatch):
+    fake = FakeDownloadItem({'v0': (ValueError('Video unavailable. This video is private'), 5)})
+    monkeypatch.setattr(misc, 'download_item', fake)
+    result, = misc.iter_download_items(_items(1))
+    assert not result['success'] and result['retries'] == 0
+    assert result['category'] == misc.retry.PERMANENT
+    assert fake.calls == ['v0']
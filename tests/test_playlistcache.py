@@ -0,0 +1,68 @@
+import pytest
+
+import playlistcache
+
+def _entries(ids):
+    return [{'id': video_id, 'title': f"Video {video_id}", 'url': f"https://youtu.be/{video_id}"} for video_id in ids]
+
+def _snapshot(ids):
+    return {'url': 'https://www.youtube.com/playlist?list=PL1', 'entries': _entries(ids)}
+
+@pytest.fixture(autouse=True)
+def short_runs(monkeypatch):
+    monkeypatch.setattr(playlistcache, 'STOP_AFTER_KNOWN', 3)
+
+def _stream(delta, ids):
+    for entry in _entries(ids):
+        if delta.add(entry):
+            return True
+    return False
+
+def test_without_snapshot_everything_is_new():
+    delta = playlistcache.PlaylistDelta()
+    assert not delta.has_snapshot
+    assert not _stream(delta, ['a', 'b', 'c', 'd'])
+    assert [entry['id'] for entry in delta.new] == ['a', 'b', 'c', 'd']
+    assert delta.removed() == []
+
+def test_new_entries_at_the_top_stop_after_a_known_run():
+    delta = playlistcache.PlaylistDelta(_snapshot(['c', 'd', 'e', 'f', 'g', 'h']))
+    assert _stream(delta, ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h'])
+    assert delta.stopped_early
+    assert [entry['id'] for entry in delta.new] == ['a', 'b']
+    assert [entry['id'] for entry in delta.remaining()] == ['f', 'g', 'h']
+    assert delta.removed() == []
+
+def test_removed_entries_are_reported():
+    delta = playlistcache.PlaylistDelta(_snapshot(['a', 'b', 'c', 'd', 'e', 'f', 'g']))
+    assert _stream(delta, ['a', 'c', 'd', 'e', 'f'])
+    assert [entry['id'] for entry in delta.removed()] == ['b']
+    # The third known entry in a row ends the stream, the rest comes from the snapshot
+    assert [entry['id'] for entry in delta.remaining()] == ['e', 'f', 'g']
+
+def test_reported_count_keeps_streaming_for_entries_added_at_the_end():
+    # 8 entries online, the snapshot knows 6: stopping early would miss the 2 at the end
+    delta = playlistcache.PlaylistDelta(_snapshot(['a', 'b', 'c', 'd', 'e', 'f']), playlist_count=8)
+    assert not _stream(delta, ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h'])
+    assert not delta.stopped_early
+    assert [entry['id'] for entry in delta.new] == ['g', 'h']
+    assert delta.remaining() == []
+
+def test_full_stream_reports_every_missing_entry():
+    delta = playlistcache.PlaylistDelta(_snapshot(['a', 'b', 'c']))
+    assert not _stream(delta, ['a', 'c'])
+    assert [entry['id'] for entry in delta.removed()] == ['b']
+
+def test_entries_without_id_are_ignored():
+    delta = playlistcache.PlaylistDelta(_snapshot(['a']))
+    assert not delta.add({'title': 'no id'})
+    assert delta.new == []
+
+def test_snapshot_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(playlistcache, 'CACHE_DIR', str(tmp_path))
+    url = 'https://www.youtube.com/playlist?list=PL1'
+    playlistcache.save_playlist(url, 'Mix', _entries(['a', 'b']) + [{'title': 'no id'}])
+    snapshot = playlistcache.load_playlist(url)
+    assert snapshot['title'] == 'Mix'
+    assert [entry['id'] for entry in snapshot['entries']] == ['a', 'b']
+    assert playlistcache.load_playlist(url + 'x') is None
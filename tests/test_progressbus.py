@@ -0,0 +1,89 @@
+import threading
+
+import progressbus
+
+class FakeRoot:
+    # Collects the after() callbacks instead of running a Tk main loop, frame() runs the due one
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append((ms, callback))
+
+    def frame(self):
+        _, callback = self.scheduled.pop(0)
+        callback()
+
+def _bus(**kwargs):
+    root = FakeRoot()
+    applied = []
+    bus = progressbus.ProgressBus(root, lambda key, state: applied.append((key, state)), **kwargs)
+    return root, bus, applied
+
+def test_only_the_latest_state_per_key_is_applied():
+    root, bus, applied = _bus()
+    bus.start()
+    for percent in range(100):
+        bus.publish(1, percent)
+        bus.publish(2, -percent)
+    bus.publish('overall')
+    root.frame()
+    assert applied == [(1, 99), (2, -99), ('overall', None)]
+    # Nothing published, nothing applied, the bus keeps running
+    root.frame()
+    assert len(applied) == 3
+    assert root.scheduled == [(progressbus.FRAME_INTERVAL_MS, bus._drain)]
+
+def test_many_publishers_are_coalesced():
+    root, bus, applied = _bus(interval=50)
+    bus.start()
+    def publish(key):
+        for percent in range(10000):
+            bus.publish(key, percent)
+    threads = [threading.Thread(target=publish, args=(key,)) for key in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    root.frame()
+    assert sorted(applied) == [(key, 9999) for key in range(8)]
+    assert root.scheduled[0][0] == 50
+
+def test_start_twice_schedules_one_frame():
+    root, bus, _ = _bus()
+    bus.start()
+    bus.start()
+    assert len(root.scheduled) == 1
+
+def test_stop_and_dead_window_end_the_frames():
+    root, bus, applied = _bus()
+    bus.start()
+    bus.stop()
+    bus.publish(1, 1)
+    root.frame()
+    assert applied == [] and root.scheduled == []
+
+    alive = [True]
+    root, bus, applied = _bus(alive=lambda: alive[0])
+    bus.start()
+    root.frame()
+    alive[0] = False
+    bus.publish(1, 1)
+    root.frame()
+    assert applied == [] and root.scheduled == [] and not bus.running
+
+def test_failing_update_does_not_stop_the_bus(capsys):
+    root = FakeRoot()
+    applied = []
+    def apply(key, state):
+        if key == 'broken':
+            raise RuntimeError('window closed')
+        applied.append(key)
+    bus = progressbus.ProgressBus(root, apply)
+    bus.start()
+    bus.publish('broken')
+    bus.publish('ok')
+    root.frame()
+    assert applied == ['ok']
+    assert 'window closed' in capsys.readouterr().out
+    assert len(root.scheduled) == 1
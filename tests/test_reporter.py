@@ -0,0 +1,86 @@
+import importlib.util
+import io
+import json
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope='module')
+def cli():
+    spec = importlib.util.spec_from_file_location('yt_dlitec', os.path.join(ROOT, 'yt-dlitec.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+def _progress(video_id, status='downloading', **info):
+    info.setdefault('webpage_url', f"https://www.youtube.com/watch?v={video_id}")
+    return {'status': status, 'total_bytes': 1000, 'downloaded_bytes': 1000, 'info_dict': dict(info, id=video_id)}
+
+def test_ndjson_writes_a_line_per_record(cli):
+    stream = io.StringIO()
+    reporter = cli.ResultReporter('ndjson', stream)
+    reporter.emit(reporter.format_record({'format_id': '18', 'ext': 'mp4', 'filesize_approx': 5}))
+    reporter.error('u', ValueError('boom'))
+    reporter.close()
+    assert _records(stream) == [
+        {'type': 'format', 'id': '18', 'ext': 'mp4', 'resolution': None, 'filesize': 5, 'vcodec': None,
+         'acodec': None, 'note': None},
+        {'type': 'download', 'status': 'error', 'url': 'u', 'error': 'boom'},
+    ]
+
+def test_json_writes_one_array_on_close(cli):
+    stream = io.StringIO()
+    reporter = cli.ResultReporter('json', stream)
+    reporter.error('a', 'x')
+    reporter.error('b', 'y', record_type='format')
+    assert stream.getvalue() == ''
+    reporter.close()
+    assert [(r['type'], r['url']) for r in json.loads(stream.getvalue())] == [('download', 'a'), ('format', 'b')]
+
+def test_finished_record_adds_up_merged_formats(cli, tmp_path):
+    stream = io.StringIO()
+    reporter = cli.ResultReporter('ndjson', stream)
+    path = tmp_path / 'a.mp4'
+    path.write_bytes(b'x' * 1500)
+    reporter.progress_hook(_progress('a'))
+    reporter.progress_hook(_progress('a', 'finished'))
+    reporter.progress_hook(_progress('a', 'finished'))
+    reporter.postprocessor_hook({'status': 'finished', 'postprocessor': 'MoveFilesAfterDownload',
+                                 'info_dict': {'id': 'a', 'webpage_url': 'u', 'ext': 'mp4', 'filepath': str(path)}})
+    record, = _records(stream)
+    assert (record['status'], record['url'], record['bytes'], record['filesize']) == ('finished', 'u', 2000, 1500)
+    assert reporter.downloads == {}
+
+def test_failed_downloads_are_forgotten(cli):
+    reporter = cli.ResultReporter('ndjson', io.StringIO())
+    reporter.progress_hook(_progress('a', original_url='https://youtu.be/a'))
+    reporter.progress_hook(_progress('b', playlist_webpage_url='https://www.youtube.com/playlist?list=PL'))
+    reporter.forget('https://youtu.be/a')
+    assert list(reporter.downloads) == ['b']
+    reporter.forget('https://www.youtube.com/playlist?list=PL')
+    assert reporter.downloads == {}
+
+def test_error_return_code_is_reported(cli, monkeypatch):
+    import segmented
+    monkeypatch.setattr(segmented, 'download', lambda ydl, url, segments=1: 0 if url == 'good' else 1)
+    stream = io.StringIO()
+    reporter = cli.ResultReporter('ndjson', stream)
+    assert not cli.direct_yt_dlp_download(['good', 'bad'], reporter=reporter)
+    assert _records(stream) == [{'type': 'download', 'status': 'error', 'url': 'bad',
+                                 'error': 'yt-dlp returned error code: 1'}]
+
+def test_list_formats_failure_is_reported(cli, monkeypatch):
+    import infocache
+    def broken(ydl, url):
+        raise ValueError('unsupported URL')
+    monkeypatch.setattr(infocache, 'extract_info', broken)
+    stream = io.StringIO()
+    reporter = cli.ResultReporter('ndjson', stream)
+    with pytest.raises(SystemExit):
+        cli.list_formats('u', reporter=reporter)
+    assert _records(stream) == [{'type': 'format', 'status': 'error', 'url': 'u', 'error': 'unsupported URL'}]
@@ -0,0 +1,62 @@
+import random
+import threading
+
+import pytest
+
+import retry
+
+@pytest.mark.parametrize('message, category', [
+    ("ERROR: unable to download video data: HTTP Error 429: Too Many Requests", retry.THROTTLED),
+    ("HTTP Error 403: Forbidden", retry.THROTTLED),
+    ("ERROR: [youtube] abc: Requested format is not available", retry.FORMAT_UNAVAILABLE),
+    ("ERROR: [youtube] abc: Private video. Sign in if you've been granted access", retry.PERMANENT),
+    ("ERROR: [youtube] abc: Video unavailable", retry.PERMANENT),
+    ("HTTP Error 404: Not Found", retry.PERMANENT),
+    ("HTTP Error 503: Service Unavailable", retry.TRANSIENT),
+    ("<urlopen error [Errno -3] Temporary failure in name resolution>", retry.TRANSIENT),
+    ("The read operation timed out", retry.TRANSIENT),
+    ("Connection reset by peer", retry.TRANSIENT),
+    ("KeyError: 'formats'", retry.UNKNOWN),
+    ("yt-dlp reported an error", retry.UNKNOWN),
+])
+def test_classify(message, category):
+    assert retry.classify(message) == category
+    assert retry.classify(Exception(message)) == category
+
+def test_classify_network_exceptions():
+    assert retry.classify(ConnectionResetError()) == retry.TRANSIENT
+    assert retry.classify(TimeoutError()) == retry.TRANSIENT
+
+def test_next_delay_backs_off_within_bounds():
+    random.seed(1)
+    for retries in range(retry.MAX_RETRIES):
+        for _ in range(20):
+            delay = retry.next_delay(retry.TRANSIENT, retries)
+            assert 0 <= delay <= retry.BASE_DELAY[retry.TRANSIENT] * 2 ** retries
+    assert retry.next_delay(retry.TRANSIENT, retry.MAX_RETRIES) is None
+    assert retry.next_delay(retry.THROTTLED, 10, max_retries=20) <= retry.MAX_DELAY
+
+def test_next_delay_final_classes():
+    assert retry.next_delay(retry.PERMANENT, 0) is None
+    assert retry.next_delay(retry.FORMAT_UNAVAILABLE, 0) is None
+
+def test_unknown_errors_are_retried_once():
+    assert retry.next_delay(retry.UNKNOWN, 0) is not None
+    assert retry.next_delay(retry.UNKNOWN, 1) is None
+    assert retry.next_delay(retry.UNKNOWN, 1, max_retries=10) is None
+
+def test_fallback_format_keeps_options():
+    assert retry.fallback_format('bestaudio[ext=m4a] --audio-format mp3', 'audio') == 'bestaudio/best --audio-format mp3'
+    assert retry.fallback_format('-f 137+140', 'video') == '-f bestvideo+bestaudio/best'
+    assert retry.fallback_format('bestaudio/best', 'audio') is None
+
+def test_retry_queue_runs_due_callbacks_in_order():
+    queue = retry.RetryQueue()
+    done = threading.Event()
+    calls = []
+    queue.schedule(0.05, lambda: (calls.append('late'), done.set()))
+    queue.schedule(0, lambda: calls.append('now'))
+    assert done.wait(5)
+    assert calls == ['now', 'late']
+    queue.close()
+    assert not queue.schedule(0, lambda: None)
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+import searchcache
+
+def _cache(tmp_path, **kwargs):
+    return searchcache.SearchCache(str(tmp_path / 'searches.json'), **kwargs)
+
+class Source:
+    # Fake search, every call records the start position it was opened at
+    def __init__(self, count=10, prefix='v'):
+        self.count = count
+        self.prefix = prefix
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, query, start):
+        with self.lock:
+            self.calls.append(start)
+        for i in range(start, self.count):
+            yield {'id': f"{self.prefix}{i}", 'title': f"{query} {i}", 'thumbnails': [{'url': f"http://t/{i}.jpg"}],
+                   'formats': ['not stored']}
+
+def _ids(results, count=None):
+    ids = []
+    for entry in results:
+        ids.append(entry['id'])
+        if count is not None and len(ids) == count:
+            break
+    return ids
+
+def test_normalize_query():
+    assert searchcache.normalize_query('  Lo-Fi   BEATS ') == 'lo-fi beats'
+
+def test_results_are_read_lazily_and_shared(tmp_path):
+    cache = _cache(tmp_path)
+    source = Source()
+    results = cache.results('music', source)
+    assert source.calls == []
+    assert _ids(results, 3) == ['v0', 'v1', 'v2']
+    # The same query, however it is spelled, continues on the same search
+    again = cache.results(' MUSIC ', source)
+    assert again is results
+    assert _ids(again) == [f"v{i}" for i in range(10)]
+    assert source.calls == [0]
+
+def test_saved_results_are_compact_and_served_from_disk(tmp_path):
+    cache = _cache(tmp_path)
+    results = cache.results('music', Source())
+    _ids(results, 4)
+    cache.save(results)
+    source = Source()
+    restarted = _cache(tmp_path).results('music', source)
+    assert restarted.entries[0] == {'id': 'v0', 'title': 'music 0', 'thumbnail': 'http://t/0.jpg'}
+    assert _ids(restarted, 4) == ['v0', 'v1', 'v2', 'v3']
+    assert source.calls == []
+    # Reading on opens the search where the cache ends
+    assert _ids(restarted, 6)[4:] == ['v4', 'v5']
+    assert source.calls == [4]
+
+def test_failed_source_is_opened_again_at_the_position(tmp_path):
+    calls = []
+
+    def source(query, start):
+        calls.append(start)
+        yield {'id': f"v{start}"}
+        if len(calls) == 1:
+            raise OSError("connection reset")
+        yield {'id': f"v{start + 1}"}
+
+    results = _cache(tmp_path).results('music', source)
+    iterator = iter(results)
+    assert next(iterator)['id'] == 'v0'
+    with pytest.raises(OSError):
+        next(iterator)
+    assert _ids(results) == ['v0', 'v1', 'v2']
+    assert calls == [0, 1]
+
+def test_stale_results_are_refreshed_in_the_background(tmp_path):
+    cache = _cache(tmp_path, ttl=0)
+    results = cache.results('music', Source(prefix='old'))
+    _ids(results, 3)
+    results.fetched = time.time() - 1
+    fresh_source = Source(prefix='new')
+    stale = cache.results('music', fresh_source)
+    # The stale results are shown right away
+    assert stale is results
+    deadline = time.time() + 5
+    while cache.results('music', fresh_source) is results and time.time() < deadline:
+        time.sleep(0.01)
+    assert _ids(cache.results('music', fresh_source), 3) == ['new0', 'new1', 'new2']
+
+def test_old_results_are_dropped(tmp_path):
+    cache = _cache(tmp_path, max_age=60)
+    results = cache.results('music', Source(prefix='old'))
+    _ids(results, 2)
+    results.fetched = time.time() - 120
+    assert _ids(cache.results('music', Source(prefix='new')), 2) == ['new0', 'new1']
+
+def test_disk_and_memory_are_bounded(tmp_path):
+    cache = _cache(tmp_path, max_queries=2, max_memory_queries=2)
+    for i, query in enumerate(['a', 'b', 'c']):
+        results = cache.results(query, Source())
+        _ids(results, 1)
+        results.fetched = time.time() + i
+        cache.save(results)
+    assert list(cache.memory) == ['b', 'c']
+    assert sorted(cache.stored) == ['b', 'c']
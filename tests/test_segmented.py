@@ -0,0 +1,191 @@
+import http.cookiejar
+import json
+import os
+import time
+
+import pytest
+
+import segmented
+from rangeserver import RangeServer
+
+DATA = os.urandom(256 * 1024)
+
+@pytest.fixture(autouse=True)
+def small_segments(monkeypatch):
+    # Real segments start at a megabyte, the tests use small ones to get many ranges out of a small blob
+    monkeypatch.setattr(segmented, 'MIN_SEGMENT_SIZE', 16 * 1024)
+    monkeypatch.setattr(segmented, 'READ_SIZE', 4 * 1024)
+    monkeypatch.setattr(segmented, 'CHECKPOINT_INTERVAL', 0)
+    monkeypatch.setattr(segmented, 'RETRY_DELAY', 0)
+
+@pytest.fixture
+def server():
+    server = RangeServer(DATA).start()
+    yield server
+    server.stop()
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _wait_closed(server):
+    deadline = time.time() + 5
+    while server.open_connections and time.time() < deadline:
+        time.sleep(0.01)
+    return server.open_connections
+
+def test_downloads_all_ranges_over_reused_connections(server, tmp_path):
+    target = str(tmp_path / 'media.bin')
+    downloader = segmented.SegmentedDownloader(server.url, target, connections=4, proxy='')
+    assert downloader.download()
+    assert _read(target) == DATA
+    assert not os.path.exists(target + '.seg')
+    assert not os.path.exists(target + '.seg.json')
+
+    range_requests = [r for r in server.requests if r['range'] != 'bytes=0-0']
+    assert len(range_requests) == 16
+    # Keep-alive: the chunks share the connections of at most 4 workers
+    assert len({r['port'] for r in range_requests}) <= 4
+    # and those connections are closed once the download is done
+    assert downloader.open_connections == []
+    assert _wait_closed(server) == 0
+
+def test_server_without_range_support_is_left_to_ytdlp(tmp_path):
+    server = RangeServer(DATA, ranges=False).start()
+    try:
+        target = str(tmp_path / 'media.bin')
+        assert segmented.SegmentedDownloader(server.url, target, proxy='').download() is False
+        assert not os.path.exists(target)
+        assert not os.path.exists(target + '.seg')
+        assert not os.path.exists(target + '.seg.json')
+    finally:
+        server.stop()
+
+def test_cut_off_responses_are_continued(server, tmp_path):
+    server.cut_requests = 3
+    server.cut_after = 5000
+    target = str(tmp_path / 'media.bin')
+    assert segmented.SegmentedDownloader(server.url, target, connections=2, proxy='').download()
+    assert _read(target) == DATA
+    # What arrived before a cut is kept, only the rest of the range is asked for again
+    assert server.bytes_sent() - 1 <= len(DATA)
+
+def test_connection_closed_without_data_fails(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(segmented, 'SEGMENT_RETRIES', 2)
+    server.cut_requests = 1000
+    server.cut_after = 0
+    target = str(tmp_path / 'media.bin')
+    with pytest.raises(segmented.SegmentedDownloadError):
+        segmented.SegmentedDownloader(server.url, target, connections=2, proxy='').download()
+
+def test_short_range_responses_are_continued(server, tmp_path):
+    server.max_response = 10000
+    target = str(tmp_path / 'media.bin')
+    assert segmented.SegmentedDownloader(server.url, target, connections=3, proxy='').download()
+    assert _read(target) == DATA
+    assert len(server.requests) > 16
+
+def test_resume_after_interrupted_chunks(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(segmented, 'SEGMENT_RETRIES', 1)
+    target = str(tmp_path / 'media.bin')
+
+    # Ranges are cut off after a few bytes and then the server stops sending anything,
+    # the run gives up but keeps what it got
+    server.cut_requests = 6
+    server.cut_after = 3000
+    server.budget = 50000
+    with pytest.raises(segmented.SegmentedDownloadError):
+        segmented.SegmentedDownloader(server.url, target, connections=2, proxy='').download()
+    assert os.path.getsize(target + '.seg') == len(DATA)
+    with open(target + '.seg.json', 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    kept = sum(segment[2] for segment in state['segments'])
+    assert 0 < kept < len(DATA)
+
+    # The next run only fetches what is missing
+    server.cut_requests = 0
+    server.budget = None
+    sent_before = server.bytes_sent()
+    assert segmented.SegmentedDownloader(server.url, target, connections=2, proxy='').download()
+    assert _read(target) == DATA
+    assert server.bytes_sent() - sent_before == len(DATA) - kept + 1  # + the probe byte
+    assert not os.path.exists(target + '.seg.json')
+
+def test_changed_file_size_starts_over(server, tmp_path):
+    target = str(tmp_path / 'media.bin')
+    with open(target + '.seg', 'wb') as f:
+        f.write(b'x' * 1000)
+    with open(target + '.seg.json', 'w', encoding='utf-8') as f:
+        json.dump({'url': server.url, 'total': 1000, 'segments': [[0, 999, 1000]]}, f)
+    assert segmented.SegmentedDownloader(server.url, target, proxy='').download()
+    assert _read(target) == DATA
+
+def test_wrong_content_range_is_not_written(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(segmented, 'SEGMENT_RETRIES', 0)
+    server.max_response = None
+    target = str(tmp_path / 'media.bin')
+    downloader = segmented.SegmentedDownloader(server.url, target, connections=1, proxy='')
+    # Shift every requested range, the server then answers for other bytes than asked
+    original = downloader._headers
+    downloader._headers = lambda url, **extra: original(
+        url, **dict(extra, Range=extra['Range'].replace('bytes=', 'bytes=1')) if 'Range' in extra else extra)
+    with pytest.raises(segmented.SegmentedDownloadError):
+        downloader.download()
+
+def test_proxy_and_cookies_are_used(server, tmp_path):
+    jar = http.cookiejar.CookieJar()
+    jar.set_cookie(http.cookiejar.Cookie(
+        0, 'session', 'abc', None, False, 'media.example', False, False, '/', True, False, None, False,
+        None, None, {}))
+    target = str(tmp_path / 'media.bin')
+    # The host does not exist, only the proxy (our server) can answer
+    downloader = segmented.SegmentedDownloader('http://media.example/media.bin', target, connections=2,
+                                               proxy=server.proxy, cookiejar=jar)
+    assert downloader.download()
+    assert _read(target) == DATA
+    assert server.requests and all(r['proxied'] for r in server.requests)
+    assert all(r['cookie'] == 'session=abc' for r in server.requests)
+
+def test_unsupported_proxy_is_left_to_ytdlp(tmp_path):
+    downloader = segmented.SegmentedDownloader('http://media.example/media.bin', str(tmp_path / 'media.bin'),
+                                               proxy='socks5://127.0.0.1:1')
+    assert downloader.download() is False
+
+class PrefetchYDL:
+    # The parts of YoutubeDL prefetch() uses, the selected format is a plain file on the test server
+    def __init__(self, url, filename):
+        self.params = {}
+        self.url = url
+        self.filename = filename
+        self.warnings = []
+
+    def process_ie_result(self, info, download=True):
+        return dict(info, url=self.url, protocol='http', ext='bin', format_id='1')
+
+    def prepare_filename(self, info, dir_type=''):
+        return self.filename
+
+    def report_warning(self, message):
+        self.warnings.append(message)
+
+def test_prefetch_downloads_plain_files(server, tmp_path):
+    target = str(tmp_path / 'media.bin')
+    ydl = PrefetchYDL(server.url, target)
+    assert segmented.prefetch(ydl, {'id': 'x'}, connections=2)
+    assert _read(target) == DATA
+
+def test_failed_segment_falls_back_to_ytdlp(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(segmented, 'SEGMENT_RETRIES', 0)
+    server.budget = 20000
+    target = str(tmp_path / 'media.bin')
+    ydl = PrefetchYDL(server.url, target)
+    assert segmented.prefetch(ydl, {'id': 'x'}, connections=2) is False
+    assert ydl.warnings
+    assert os.listdir(str(tmp_path)) == []
+
+def test_failed_probe_falls_back_to_ytdlp(server, tmp_path):
+    target = str(tmp_path / 'media.bin')
+    ydl = PrefetchYDL(server.url.replace('media.bin', 'missing.bin'), target)
+    assert segmented.prefetch(ydl, {'id': 'x'}, connections=2) is False
+    assert 'HTTP Error 404' in ydl.warnings[0]
+    assert os.listdir(str(tmp_path)) == []
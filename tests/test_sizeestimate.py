@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+import sizeestimate
+
+@pytest.fixture(autouse=True)
+def bitrate_cache(tmp_path, monkeypatch):
+    cache = sizeestimate.BitrateCache(str(tmp_path / 'bitrates.json'))
+    monkeypatch.setattr(sizeestimate, '_bitrate_cache', cache)
+    return cache
+
+def test_t_quantile():
+    assert sizeestimate.t_quantile(1) == 12.71
+    assert sizeestimate.t_quantile(12) == sizeestimate.T_95[10]
+    assert sizeestimate.t_quantile(1000) == sizeestimate.Z_95
+
+def test_fixed_bitrate_is_exact():
+    bitrate = sizeestimate.target_audio_bitrate('bestaudio/best -x --audio-format mp3 --audio-quality 320K')
+    assert bitrate == 40000
+    estimator = sizeestimate.PlaylistSizeEstimator('audio:mp3:320', fixed_bitrate=bitrate)
+    assert estimator.estimate([100, 200]) == (12000000, 12000000, 12000000)
+
+def test_vbr_audio_has_no_fixed_bitrate():
+    assert sizeestimate.target_audio_bitrate('bestaudio -x --audio-format mp3 --audio-quality 0') is None
+    assert sizeestimate.target_audio_bitrate('best') is None
+
+def test_one_sample_gives_no_interval():
+    estimator = sizeestimate.PlaylistSizeEstimator('format:best:')
+    estimator.add_sample(1000, 10)
+    assert estimator.estimate([10, 20, None]) == (100 * 30 + 1000, None, None)
+
+def test_no_samples_no_estimate():
+    assert sizeestimate.PlaylistSizeEstimator('format:best:').estimate([10, 20]) is None
+
+def test_samples_are_kept_per_format(bitrate_cache):
+    estimator = sizeestimate.PlaylistSizeEstimator('format:best:')
+    estimator.add_sample(1000, 10)
+    estimator.add_sample(3000, 10)
+    assert bitrate_cache.get('format:best:') == [100, 300]
+    # The next playlist of the format starts from these
+    total, low, high = sizeestimate.PlaylistSizeEstimator('format:best:').estimate([10])
+    assert total == 2000
+    assert low < total < high
+
+def test_bitrate_cache_drops_oldest(bitrate_cache, monkeypatch):
+    monkeypatch.setattr(sizeestimate, 'MAX_OBSERVATIONS', 3)
+    for value in range(5):
+        bitrate_cache.add('key', value)
+    assert bitrate_cache.get('key') == [2, 3, 4]
+    assert sizeestimate.BitrateCache(bitrate_cache.path).get('key') == [2, 3, 4]
+
+def test_interval_covers_the_total(bitrate_cache, monkeypatch):
+    # Bitrates of a playlist vary around a mean, 5 sampled videos estimate the total of 40.
+    # A 95% prediction interval has to hold the actual total in about 95% of the playlists
+    monkeypatch.setattr(bitrate_cache, 'add', lambda format_key, bytes_per_second: None)
+    rng = random.Random(7)
+    covered = 0
+    trials = 300
+    for trial in range(trials):
+        durations = [rng.uniform(60, 900) for _ in range(40)]
+        bitrates = [max(1000, rng.gauss(150000, 50000)) for _ in durations]
+        actual = sum(b * d for b, d in zip(bitrates, durations))
+        estimator = sizeestimate.PlaylistSizeEstimator(f"format:{trial}:")
+        for i in rng.sample(range(len(durations)), 5):
+            estimator.add_sample(bitrates[i] * durations[i], durations[i])
+        total, low, high = estimator.estimate(durations)
+        covered += low <= actual <= high
+    assert 0.9 <= covered / trials
+
+def test_selected_size():
+    assert sizeestimate.selected_size({'filesize': 10}) == 10
+    assert sizeestimate.selected_size({'requested_formats': [{'filesize': 10}, {'filesize_approx': 5}]}) == 15
+    assert sizeestimate.selected_size({'requested_formats': [{'filesize': 10}, {}]}) is None
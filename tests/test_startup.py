@@ -0,0 +1,66 @@
+#Startup regression check, the entry points must not pay for yt-dlp, PIL or requests before they are used
+#Every test runs a fresh interpreter with -X importtime, modules imported by an earlier test would hide a regression.
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# CPU time of python yt-dlitec.py --help, interpreter start included, best of STARTUP_RUNS. CPU time
+# and not wall clock, a loaded or throttled test machine would make the wall clock fail at random
+STARTUP_BUDGET_MS = 100
+STARTUP_RUNS = 5
+HEAVY_MODULES = ('yt_dlp', 'PIL', 'requests', 'misc', 'expert')
+# Only the download commands of the CLI need these
+CLI_DOWNLOAD_MODULES = ('infocache', 'segmented', 'archive', 'concurrent.futures', 'http.server', 'socketserver')
+
+def _run(args):
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=60)
+    imported = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        imported[name.strip()] = int(self_us)
+    return result, imported
+
+def _top_level(imported):
+    return {name.split('.')[0] for name in imported}
+
+def test_cli_help_does_not_import_yt_dlp():
+    result, imported = _run(['yt-dlitec.py', '--help'])
+    assert result.returncode == 0, result.stderr
+    assert not _top_level(imported) & set(HEAVY_MODULES)
+    assert not set(imported) & set(CLI_DOWNLOAD_MODULES)
+
+def _cpu_time():
+    try:
+        import resource
+    except ImportError:
+        return time.perf_counter()  # Windows, wall clock it is
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def test_cli_help_starts_within_budget():
+    timings = []
+    for _ in range(STARTUP_RUNS):
+        started = _cpu_time()
+        subprocess.run([sys.executable, 'yt-dlitec.py', '--help'], cwd=ROOT, stdout=subprocess.DEVNULL, timeout=60)
+        timings.append((_cpu_time() - started) * 1000)
+    assert min(timings) < STARTUP_BUDGET_MS
+
+@pytest.mark.parametrize('module', ['begginer', 'yt-dlite', 'expert'])
+def test_gui_modules_import_without_yt_dlp(module):
+    pytest.importorskip('tkinter')
+    code = ("import importlib.util, sys\n"
+            "sys.path.insert(0, '.')\n"
+            f"spec = importlib.util.spec_from_file_location('gui', {module + '.py'!r})\n"
+            "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+            "print(' '.join(sorted(name for name in sys.modules if name.split('.')[0] in %r)))\n" % (HEAVY_MODULES,))
+    result, imported = _run(['-c', code])
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ''
+    assert not _top_level(imported) & {'yt_dlp', 'PIL', 'requests'}
@@ -0,0 +1,45 @@
+import os
+import time
+
+import pytest
+
+import thumbcache
+
+Image = pytest.importorskip('PIL.Image')
+
+def _image():
+    # Noise compresses badly, every thumbnail takes about the same number of bytes
+    return Image.frombytes('RGB', (64, 64), os.urandom(64 * 64 * 3))
+
+def test_round_trip_keyed_by_size_and_mode(tmp_path):
+    cache = thumbcache.ThumbnailCache(str(tmp_path))
+    assert cache.get('http://t/1.jpg', (64, 64)) is None
+    cache.put('http://t/1.jpg', (64, 64), True, _image())
+    assert cache.contains('http://t/1.jpg', (64, 64), True)
+    assert not cache.contains('http://t/1.jpg', (64, 64), False)
+    assert not cache.contains('http://t/1.jpg', (32, 32), True)
+    assert cache.get('http://t/1.jpg', (64, 64)).size == (64, 64)
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith('.tmp')]
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = thumbcache.ThumbnailCache(str(tmp_path))
+    cache.put('http://t/probe.jpg', (64, 64), True, _image())
+    size = os.path.getsize(cache._path('http://t/probe.jpg', (64, 64), True))
+    cache = thumbcache.ThumbnailCache(str(tmp_path / 'cache'), max_bytes=int(size * 4.5))
+
+    urls = [f"http://t/{i}.jpg" for i in range(4)]
+    now = time.time()
+    for i, url in enumerate(urls):
+        cache.put(url, (64, 64), True, _image())
+        os.utime(cache._path(url, (64, 64), True), (now - 100 + i, now - 100 + i))
+    # Reading the oldest one makes it the most recently used
+    assert cache.get(urls[0], (64, 64)) is not None
+
+    cache.put('http://t/new.jpg', (64, 64), True, _image())
+    # Over budget: evicted down to EVICT_TO of it, least recently used first
+    assert not cache.contains(urls[1], (64, 64))
+    assert cache.contains(urls[0], (64, 64))
+    assert cache.contains('http://t/new.jpg', (64, 64))
+    on_disk = sum(os.path.getsize(os.path.join(cache.directory, name)) for name in os.listdir(cache.directory))
+    assert on_disk <= cache.max_bytes * thumbcache.EVICT_TO
+    assert cache.total == on_disk
@@ -0,0 +1,39 @@
+import pytest
+
+import ydlopts
+
+def test_plain_selector():
+    assert ydlopts.build_opts('bestvideo+bestaudio/best') == {'format': 'bestvideo+bestaudio/best'}
+    assert ydlopts.build_opts('') == {'format': 'best'}
+
+def test_audio_extraction():
+    opts = ydlopts.build_opts('bestaudio/best -x --audio-format mp3 --audio-quality 320K --embed-thumbnail')
+    assert opts == {
+        'format': 'bestaudio/best',
+        'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '320'}],
+    }
+
+def test_audio_format_without_extract_codec_is_downloaded_as_is():
+    assert ydlopts.build_opts('bestaudio --audio-format webm', 'audio') == {'format': 'bestaudio'}
+
+def test_merge_output_format_and_explicit_format_flag():
+    opts = ydlopts.build_opts('-f 137+140 --merge-output-format mkv')
+    assert opts == {'format': '137+140', 'merge_output_format': 'mkv'}
+    # Merging is a video option, an audio item ignores it
+    assert ydlopts.build_opts('-f 140 --merge-output-format mkv', 'audio') == {'format': '140'}
+
+def test_compiled_template_is_shared_and_read_only():
+    template = ydlopts.compile_format('bestaudio -x --audio-format m4a')
+    assert template is ydlopts.compile_format('bestaudio -x --audio-format m4a')
+    with pytest.raises(TypeError):
+        template['format'] = 'best'
+    with pytest.raises(TypeError):
+        template['postprocessors'][0]['preferredcodec'] = 'mp3'
+
+def test_build_opts_returns_a_fresh_copy():
+    first = ydlopts.build_opts('bestaudio -x --audio-format mp3', outtmpl='a')
+    first['postprocessors'][0]['preferredcodec'] = 'wav'
+    first['postprocessors'].append({'key': 'Other'})
+    second = ydlopts.build_opts('bestaudio -x --audio-format mp3')
+    assert second['postprocessors'] == [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '0'}]
+    assert 'outtmpl' not in second
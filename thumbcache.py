@@ -0,0 +1,109 @@
+#Thumbnail disk cache, keeps thumbnails already resized to the size a window shows them at
+#The key is the thumbnail URL plus the target size, so a cached thumbnail is shown without a request and
+#without resizing it again. Files are touched when they are read and the least recently used ones are
+#removed once the cache grows past its byte budget.
+import hashlib
+import os
+import threading
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), "Downloads", "yt-dlite", ".cache", "thumbnails")
+MAX_BYTES = 64 * 1024 * 1024
+# Eviction goes down to this share of MAX_BYTES, so it does not run again on the next thumbnail
+EVICT_TO = 0.9
+JPEG_QUALITY = 90
+
+class ThumbnailCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total = None  # bytes on disk, counted on the first write
+
+    def _path(self, url, size, fit):
+        mode = 'fit' if fit else 'exact'
+        key = hashlib.sha1(f"{url} {size[0]}x{size[1]} {mode}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + '.jpg')
+
+    def contains(self, url, size, fit=True):
+        return os.path.exists(self._path(url, size, fit))
+
+    def get(self, url, size, fit=True):
+        """The cached PIL image of url at size, None if it is not cached"""
+        from PIL import Image
+        path = self._path(url, size, fit)
+        try:
+            image = Image.open(path)
+            image.load()
+        except (OSError, ValueError):
+            return None
+        # Touch the file so eviction sees it as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return image
+
+    def put(self, url, size, fit, image):
+        path = self._path(url, size, fit)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+            # Write then rename, a reader never sees half a file
+            image.convert('RGB').save(tmp_path, 'JPEG', quality=JPEG_QUALITY)
+            written = os.path.getsize(tmp_path)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write thumbnail cache: {e}")
+            return
+        with self.lock:
+            if self.total is None:
+                self.total = self._scan()[1]
+            else:
+                self.total += written - replaced
+            if self.total > self.max_bytes:
+                self._evict()
+
+    # Caller must hold self.lock
+    def _scan(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.jpg'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        return entries, total
+
+    # Caller must hold self.lock
+    def _evict(self):
+        entries, total = self._scan()
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self.total = total
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_thumbnail_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache()
+        return _cache
@@ -0,0 +1,166 @@
+#Thumbnail service, fetches, decodes and resizes the thumbnails of both windows on a fixed pool of workers
+#All workers share one keep-alive HTTP session, so the thumbnails of 50 search results cost a few TLS
+#handshakes instead of 50. Waiting requests are served by priority, cards in view first, and a whole
+#group of requests (e.g. the thumbnails of a search) can be cancelled when it is not needed anymore.
+#Callbacks get a resized PIL image, or None, on a worker thread, the caller turns it into a PhotoImage
+#in the Tk thread. Resized thumbnails are kept in thumbcache and served from there ahead of any download.
+import heapq
+import io
+import itertools
+import threading
+import urllib.request
+import thumbcache
+
+WORKERS = 4
+TIMEOUT = 5
+
+# Priorities, lower ones are fetched first. Cached thumbnails only cost a file read and always go first
+CACHED = -1
+VISIBLE = 0
+HIDDEN = 1
+
+class ThumbnailRequest:
+    def __init__(self, urls, size, callback, priority, group, fit):
+        self.urls = urls
+        self.size = size
+        self.callback = callback
+        self.priority = priority
+        self.group = group
+        self.fit = fit
+        self.cancelled = False
+        self.started = False
+        self.cached = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class ThumbnailService:
+    def __init__(self, workers=WORKERS, timeout=TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self.condition = threading.Condition()
+        # heap of (priority, ticket, request). A request whose priority changed is pushed again,
+        # the outdated heap entry is skipped when it comes up
+        self.waiting = []
+        self.tickets = itertools.count()
+        self.threads = []
+        self.session = None
+        self.session_lock = threading.Lock()
+
+    def fetch(self, url, size, callback, priority=HIDDEN, group=None, fit=True):
+        """Queue a thumbnail, url may be a list of URLs tried in order. fit keeps the aspect ratio
+        within size, otherwise the image is resized to exactly size"""
+        urls = [url] if isinstance(url, str) else [u for u in url if u]
+        request = ThumbnailRequest(urls, size, callback, priority, group, fit)
+        if urls and thumbcache.get_thumbnail_cache().contains(urls[0], size, fit):
+            request.cached = True
+            request.priority = priority = CACHED
+        with self.condition:
+            heapq.heappush(self.waiting, (priority, next(self.tickets), request))
+            # Workers are started with the first requests, not when the app starts
+            if len(self.threads) < self.workers:
+                thread = threading.Thread(target=self._run, daemon=True)
+                self.threads.append(thread)
+                thread.start()
+            self.condition.notify()
+        return request
+
+    def prioritize(self, request, priority):
+        with self.condition:
+            if request.started or request.cancelled or request.cached or request.priority == priority:
+                return
+            request.priority = priority
+            heapq.heappush(self.waiting, (priority, next(self.tickets), request))
+            self.condition.notify()
+
+    def cancel(self, group):
+        # Drops the waiting requests of group, the ones already being fetched still finish
+        with self.condition:
+            for _, _, request in self.waiting:
+                if request.group == group:
+                    request.cancelled = True
+            self.waiting = [entry for entry in self.waiting if not entry[2].cancelled]
+            heapq.heapify(self.waiting)
+
+    def _next_request(self):
+        with self.condition:
+            while True:
+                while self.waiting:
+                    priority, _, request = heapq.heappop(self.waiting)
+                    if request.cancelled or request.started or priority != request.priority:
+                        continue
+                    request.started = True
+                    return request
+                self.condition.wait()
+
+    def _run(self):
+        while True:
+            request = self._next_request()
+            image = None
+            cache = thumbcache.get_thumbnail_cache()
+            try:
+                if request.cached:
+                    image = cache.get(request.urls[0], request.size, request.fit)
+                if image is None and request.urls:
+                    data = self._download(request.urls)
+                    if data is not None and not request.cancelled:
+                        image = self._decode(data, request.size, request.fit)
+                        cache.put(request.urls[0], request.size, request.fit, image)
+            except Exception as e:
+                print(f"Could not load thumbnail: {e}")
+            if request.cancelled:
+                continue
+            try:
+                request.callback(image)
+            except Exception as e:
+                print(f"Thumbnail callback failed: {e}")
+
+    def _get_session(self):
+        with self.session_lock:
+            if self.session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                # One connection per worker, kept alive between thumbnails
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.workers)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.session = session
+            return self.session
+
+    def _download(self, urls):
+        for url in urls:
+            if not url.startswith(('http://', 'https://')):
+                continue
+            try:
+                response = self._get_session().get(url, timeout=self.timeout)
+                if response.status_code == 200:
+                    return response.content
+                continue
+            except Exception:
+                pass
+            # requests is optional and can fail where urllib does not, urllib opens a new connection per thumbnail
+            try:
+                with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                    return response.read()
+            except Exception:
+                continue
+        return None
+
+    def _decode(self, data, size, fit):
+        from PIL import Image
+        image = Image.open(io.BytesIO(data))
+        if fit:
+            image.thumbnail(size, Image.LANCZOS)
+            return image
+        return image.resize(size, Image.LANCZOS)
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_thumbnail_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ThumbnailService()
+        return _service
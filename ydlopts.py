@@ -0,0 +1,72 @@
+#Turns the format choices of the tabs into yt-dlp options, one place for what used to be parsed in four
+#A choice is the yt-dlp command line the dropdowns show ("bestaudio/best -x --audio-format mp3 --audio-quality
+#320K ..."). It is compiled once into a read-only template and memoized, every download then only copies
+#the template and adds its own hooks and output template.
+import functools
+import types
+
+# Codecs FFmpegExtractAudio converts to, other audio formats are downloaded as they are
+EXTRACT_CODECS = ('aac', 'alac', 'flac', 'm4a', 'mp3', 'opus', 'vorbis', 'wav')
+# --embed-thumbnail and --add-metadata are accepted but not applied, no tab ever applied them and both
+# depend on tools that are not always installed
+IGNORED_FLAGS = ('--embed-thumbnail', '--add-metadata')
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return types.MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value):
+    if isinstance(value, types.MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+@functools.lru_cache(maxsize=128)
+def compile_format(format_string, item_type=None):
+    """Read-only yt-dlp options for a format choice, item_type 'audio' or 'video' (None guesses from the flags)"""
+    tokens = (format_string or 'best').split()
+    selector = []
+    flags = {}
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in ('-f', '--format', '--audio-format', '--audio-quality', '--merge-output-format') and i + 1 < len(tokens):
+            flags[token] = tokens[i + 1]
+            i += 2
+            continue
+        if token.startswith('-'):
+            flags[token] = True
+        elif not flags:
+            # Words before the first flag are the format selector
+            selector.append(token)
+        i += 1
+
+    opts = {'format': flags.get('-f') or flags.get('--format') or ' '.join(selector) or 'best'}
+    if item_type is None:
+        item_type = 'audio' if '-x' in flags or '--extract-audio' in flags or '--audio-format' in flags else 'video'
+
+    if item_type == 'audio':
+        codec = flags.get('--audio-format')
+        if codec in EXTRACT_CODECS:
+            # yt-dlp takes 320K on the command line and '320' here
+            quality = str(flags.get('--audio-quality', '0')).rstrip('kK')
+            opts['postprocessors'] = [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': codec,
+                'preferredquality': quality,
+            }]
+        if '--prefer-ffmpeg' in flags:
+            opts['prefer_ffmpeg'] = True
+    elif flags.get('--merge-output-format'):
+        opts['merge_output_format'] = flags['--merge-output-format']
+    return _freeze(opts)
+
+def build_opts(format_string, item_type=None, **options):
+    """Fresh ydl_opts for one download: the compiled template plus the caller's own options"""
+    opts = _thaw(compile_format(format_string, item_type))
+    opts.update(options)
+    return opts
@@ -8,15 +8,17 @@ import datetime
 import functools
 import subprocess
 import webbrowser
-import urllib.request
-import yt_dlp
-import io  
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-from PIL import Image, ImageTk
-from misc import PlaylistHandler
-from expert import ExpertGui, RedirectText
 from begginer import HomeGui
+import infocache
+import scheduler
+import thumbnails
+import ydlopts
+# yt_dlp, PIL and the expert mode are imported where they are first needed so the window shows up quickly
+
+# Format choice behind the MP3 entry of the formats list
+MP3_FORMAT = "bestaudio/best -x --audio-format mp3 --audio-quality 192K"
 
 class YouTubeDownloaderGUI: 
     def __init__(self, root): 
@@ -295,6 +297,8 @@ class YouTubeDownloaderGUI:
 
     #Importing expert.py so that it adapt this frame
     def load_hello(self):
+        from expert import ExpertGui
+
         class FrameYTDLPGui(ExpertGui):
             def __init__(self, frame):
                 # Set basic attributes before calling any methods
@@ -890,6 +894,7 @@ class YouTubeDownloaderGUI:
             self.root.after(5000, lambda: self.check_fetch_timeout(thread, 0))
     #Thread function to fetch video info without blocking UI
     def _fetch_video_info_thread(self, url):
+        import yt_dlp
         try:
             # Set up yt-dlp options
             ydl_opts = {
@@ -905,10 +910,8 @@ class YouTubeDownloaderGUI:
                     self.root.after(0, lambda: self.set_loading_state(False))
                     return                
                 self.video_info = info                
-                # Update UI in the main thread
+                # Update UI in the main thread, this also fetches the thumbnail
                 self.root.after(0, self.update_video_info)                
-                # Download thumbnail in the background
-                self.download_thumbnail(info.get('thumbnail'))        
         except Exception as e:
             self.log(f"Error fetching video info: {str(e)}", "ERROR")
             self.root.after(0, lambda: messagebox.showerror("Error", f"An error occurred: {str(e)}"))
@@ -916,6 +919,7 @@ class YouTubeDownloaderGUI:
     #Background thread for fetching video info.#########################################################
 
     def _fetch_info_thread(self, url):
+        import yt_dlp
         start_time = time.time()
         self.log(f"Starting fetch for URL: {url}", "INFO")
         
@@ -940,9 +944,9 @@ class YouTubeDownloaderGUI:
                     self.log("Fetch cancelled before extraction", "INFO")
                     return
                 
-                # Direct extraction without format processing (faster)
+                # Direct extraction without format processing (faster), cached for the download that follows
                 self.log("Extracting basic video info...", "DEBUG")
-                info_dict = ydl.extract_info(url, download=False, process=False)
+                info_dict = infocache.extract_info(ydl, url)
                 
                 if not info_dict:
                     self.log("No video information returned by yt-dlp", "ERROR")
@@ -1028,7 +1032,7 @@ class YouTubeDownloaderGUI:
         # Update thumbnail if available
         thumbnail_url = self.video_info.get('thumbnail')
         if thumbnail_url:
-            threading.Thread(target=self.download_thumbnail, args=(thumbnail_url,), daemon=True).start()
+            self.download_thumbnail(thumbnail_url)
         else:
             self.clear_thumbnail()       
         self.log(f"Video info updated: {title} ({duration_str})", "DEBUG")
@@ -1036,23 +1040,22 @@ class YouTubeDownloaderGUI:
     def download_thumbnail(self, thumbnail_url):
         if not thumbnail_url:
             self.root.after(0, self.clear_thumbnail)
-            return        
-        try:
-            # Download the thumbnail
-            with urllib.request.urlopen(thumbnail_url) as response:
-                thumbnail_data = response.read()            
-            # Convert to PIL Image
-            image = Image.open(io.BytesIO(thumbnail_data))            
-            # Resize to fit the frame
-            image = image.resize((320, 180), Image.LANCZOS)            
-            # Convert to PhotoImage
-            photo = ImageTk.PhotoImage(image)            
-            # Update the thumbnail label in the main thread
-            self.thumbnail_image = photo  # Keep a reference to prevent garbage collection
-            self.root.after(0, lambda: self.thumbnail_label.configure(image=photo, text=""))            
-        except Exception as e:
-            self.log(f"Error loading thumbnail: {str(e)}", "ERROR")
-            self.root.after(0, self.clear_thumbnail)
+            return
+        # Fetched and resized to fit the frame on the shared thumbnail workers
+        thumbnails.get_thumbnail_service().fetch(
+            thumbnail_url, (320, 180), lambda image: self.root.after(0, self.show_thumbnail, image),
+            priority=thumbnails.VISIBLE, fit=False)
+
+    # Runs in the main thread
+    def show_thumbnail(self, image):
+        if image is None:
+            self.log("Error loading thumbnail", "ERROR")
+            self.clear_thumbnail()
+            return
+        from PIL import ImageTk
+        photo = ImageTk.PhotoImage(image)
+        self.thumbnail_image = photo  # Keep a reference to prevent garbage collection
+        self.thumbnail_label.configure(image=photo, text="")
             
     def clear_thumbnail(self):
         self.thumbnail_image = None
@@ -1366,6 +1369,7 @@ class YouTubeDownloaderGUI:
             self.notebook.select(1)  # Index 1 is the Verbose tab
 
     def _download_mp3(self, save_path):
+        import yt_dlp
         self.root.after(0, lambda: (self.status_label.config(text="Downloading MP3...")))
         self.root.after(0, lambda: (self.progress.__setitem__('value', 0)))
         start_time = time.time()
@@ -1439,25 +1443,25 @@ class YouTubeDownloaderGUI:
                     
             base_outtmpl = os.path.join(save_path, '%(title)s-%(id)s.%(ext)s')
             
-            # Set up yt-dlp options for MP3 conversion
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'outtmpl': base_outtmpl,
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '192',
-                }],
-                'progress_hooks': [progress_hook],
-                'quiet': False,
-                'no_warnings': False,
-            }
+            # Set up yt-dlp options for MP3 conversion, compiled like the format choices of the other tabs
+            ydl_opts = ydlopts.build_opts(
+                MP3_FORMAT, 'audio',
+                outtmpl=base_outtmpl,
+                progress_hooks=[progress_hook, scheduler.get_scheduler().progress_hook()],
+                quiet=False,
+                no_warnings=False,
+            )
             
             self.log(f"Starting MP3 download with options: {ydl_opts}", "INFO")
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                if not self.cancel_flag:
-                    ydl.download([self.video_info['webpage_url']])
+            # Shares the download slots and bandwidth cap with the other tabs
+            with scheduler.get_scheduler().slot(scheduler.INTERACTIVE, lambda: self.cancel_flag,
+                                                lambda: self.log("Waiting for another download to finish...", "INFO")) as acquired:
+                if not acquired:
+                    raise Exception("Download cancelled by user")
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    if not self.cancel_flag:
+                        infocache.download(ydl, self.video_info['webpage_url'])
             
             elapsed = time.time() - start_time
             
@@ -1500,6 +1504,7 @@ class YouTubeDownloaderGUI:
             self.status_label.config(text="Cancelling download...")
                 
     def _download_thread(self, format_id, save_path, is_combined_format=False):
+        import yt_dlp
         self.root.after(0, lambda: (self.status_label.config(text="Downloading...")))
         self.root.after(0, lambda: (self.progress.__setitem__('value', 0)))
 
@@ -1602,7 +1607,7 @@ class YouTubeDownloaderGUI:
             ydl_opts = {
                 'format': format_id,
                 'outtmpl': base_outtmpl,
-                'progress_hooks': [progress_hook],
+                'progress_hooks': [progress_hook, scheduler.get_scheduler().progress_hook()],
                 'postprocessor_hooks': [post_process_hook],
                 'quiet': False,
                 'no_warnings': False,
@@ -1612,9 +1617,14 @@ class YouTubeDownloaderGUI:
             
             self.log(f"yt-dlp options: {ydl_opts}", "DEBUG")            
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                if not self.cancel_flag:
-                    ydl.download([self.video_info['webpage_url']])            
+            # Shares the download slots and bandwidth cap with the other tabs
+            with scheduler.get_scheduler().slot(scheduler.INTERACTIVE, lambda: self.cancel_flag,
+                                                lambda: self.log("Waiting for another download to finish...", "INFO")) as acquired:
+                if not acquired:
+                    raise Exception("Download cancelled by user")
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    if not self.cancel_flag:
+                        infocache.download(ydl, self.video_info['webpage_url'])
             
             elapsed = time.time() - start_time            
             
@@ -1,9 +1,15 @@
 #Command line interface source code
+#yt_dlp and the download modules are imported inside the functions that use them, --help and argument errors
+#never pay for loading them
 import argparse
+import collections
+import itertools
+import json
 import sys
-import yt_dlp
 import os
 import re
+import threading
+import time
 
 def sanitize_filename(filename):
     #Sanitize filename to remove or replace problematic characters
@@ -23,6 +29,25 @@ def sanitize_filename(filename):
     
     return sanitized
 
+# Options of yt-dlitec itself that yt-dlp does not know, and whether they take a value
+CLI_ONLY_OPTIONS = {'--batch-file': True, '--download-archive': True, '--jobs': True, '--segments': True,
+                    '--port': True, '--serve': False, '--json': False, '--ndjson': False}
+
+def strip_cli_options(args):
+    """Command line arguments without the options only yt-dlitec understands"""
+    stripped = []
+    skip_value = False
+    for arg in args:
+        if skip_value:
+            skip_value = False
+            continue
+        name = arg.split('=', 1)[0]
+        if name in CLI_ONLY_OPTIONS:
+            skip_value = CLI_ONLY_OPTIONS[name] and '=' not in arg
+            continue
+        stripped.append(arg)
+    return stripped
+
 def parse_yt_dlp_args(args):
     """Parse command line arguments into yt-dlp options dictionary"""
     ydl_opts = {}
@@ -87,8 +112,205 @@ def parse_yt_dlp_args(args):
     
     return ydl_opts
 
-def download_media(video_url=None, audio_url=None, video_format='mp4', audio_format='mp3', output_path=None, resume=False, extra_args=None):
+class ResultReporter:
+    """Machine readable output, one record per format or finished download as JSON or NDJSON"""
+    def __init__(self, mode='ndjson', stream=None):
+        self.mode = mode
+        self.stream = stream or sys.stdout
+        self.lock = threading.Lock()
+        self.records = []  # Only used in json mode, written as one array on close
+        self.downloads = {}  # video id -> {'start': time, 'bytes': written so far, 'urls': URLs it was requested by}
+
+    def emit(self, record):
+        with self.lock:
+            if self.mode == 'ndjson':
+                # Flush every line so schedulers can consume results as they arrive
+                self.stream.write(json.dumps(record) + '\n')
+                self.stream.flush()
+            else:
+                self.records.append(record)
+
+    def close(self):
+        if self.mode == 'json':
+            json.dump(self.records, self.stream, indent=2)
+            self.stream.write('\n')
+            self.stream.flush()
+
+    def format_record(self, fmt):
+        return {
+            'type': 'format',
+            'id': fmt.get('format_id'),
+            'ext': fmt.get('ext'),
+            'resolution': fmt.get('resolution'),
+            'filesize': fmt.get('filesize') or fmt.get('filesize_approx'),
+            'vcodec': fmt.get('vcodec'),
+            'acodec': fmt.get('acodec'),
+            'note': fmt.get('format_note'),
+        }
+
+    def error(self, url, message, record_type='download'):
+        self.emit({'type': record_type, 'status': 'error', 'url': url, 'error': str(message)})
+
+    # Drop the state of the downloads a URL started, called once the URL is done whether it worked or not.
+    # A failed download never reaches MoveFilesAfterDownload and would keep its entry for good otherwise
+    def forget(self, url):
+        with self.lock:
+            for video_id in [video_id for video_id, state in self.downloads.items() if url in state['urls']]:
+                del self.downloads[video_id]
+
+    # Add the reporter hooks to yt-dlp options and keep yt-dlp's own output off stdout
+    def attach(self, ydl_opts):
+        ydl_opts['quiet'] = True
+        ydl_opts['noprogress'] = True
+        ydl_opts['progress_hooks'] = list(ydl_opts.get('progress_hooks', [])) + [self.progress_hook]
+        ydl_opts['postprocessor_hooks'] = list(ydl_opts.get('postprocessor_hooks', [])) + [self.postprocessor_hook]
+        return ydl_opts
+
+    def progress_hook(self, d):
+        info = d.get('info_dict', {})
+        with self.lock:
+            state = self.downloads.setdefault(info.get('id'), {'start': time.time(), 'bytes': 0, 'urls': set()})
+            # Playlist entries are forgotten with the playlist URL they came from
+            state['urls'].update(url for url in (info.get('original_url'), info.get('webpage_url'),
+                                                 info.get('playlist_webpage_url')) if url)
+            # Merged formats finish once per component, add them all up
+            if d.get('status') == 'finished':
+                state['bytes'] += d.get('total_bytes') or d.get('downloaded_bytes') or 0
+
+    def postprocessor_hook(self, d):
+        # Moving the files into place is always the last postprocessor, the info is final by then
+        if d.get('status') != 'finished' or d.get('postprocessor') != 'MoveFilesAfterDownload':
+            return
+        info = d.get('info_dict', {})
+        with self.lock:
+            state = self.downloads.pop(info.get('id'), None) or {'start': time.time(), 'bytes': 0}
+        path = info.get('filepath')
+        self.emit({
+            'type': 'download',
+            'status': 'finished',
+            'url': info.get('webpage_url') or info.get('original_url'),
+            'id': info.get('id'),
+            'title': info.get('title'),
+            'ext': info.get('ext'),
+            'resolution': info.get('resolution'),
+            'filesize': os.path.getsize(path) if path and os.path.exists(path) else info.get('filesize') or info.get('filesize_approx'),
+            'bytes': state['bytes'],
+            'elapsed': round(time.time() - state['start'], 3),
+            'path': path,
+        })
+
+def video_format_selector(video_format):
+    # yt-dlp format selection for the --video container choice
+    if video_format == 'mp4':
+        return 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]'
+    elif video_format == 'webm':
+        return 'bestvideo[ext=webm]+bestaudio[ext=webm]/best[ext=webm]'
+    return 'best'
+
+def _copy_info(info):
+    # Fresh copy for one processing pass, yt-dlp adds keys to the info and format dicts while selecting
+    info = dict(info)
+    if info.get('formats'):
+        info['formats'] = [dict(fmt) for fmt in info['formats']]
+    return info
+
+def download_video_and_audio(url, ydl_opts, video_format='mp4', audio_format='mp3', output_path=None, resume=False, archive=None, reporter=None, segments=1):
+    """Download video and audio of one URL from a single extraction on a single YoutubeDL session"""
+    import yt_dlp
+    from yt_dlp.postprocessor import FFmpegExtractAudioPP
+    from archive import ArchiveTransaction
+    import infocache
+    import segmented
+
+    ydl_opts = dict(ydl_opts)
+    pending = None
+    if archive is not None:
+        # Hold the archive entry back until both passes finished, otherwise the
+        # video pass would record the id and the audio pass would be skipped
+        pending = ArchiveTransaction(archive)
+        ydl_opts['download_archive'] = pending
+    destination = 'current directory' if not output_path else output_path
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        try:
+            info = infocache.extract_info(ydl, url)
+        except Exception as e:
+            print(f"Error extracting media info: {e}")
+            if reporter:
+                reporter.error(url, e)
+            return
+        if info is None:
+            print("Media is already in the download archive, skipping")
+            return
+
+        if info.get('_type') in ('playlist', 'multi_video'):
+            # Playlist entries are lazy and can only be walked once, let each pass page them in again
+            def run_pass(last):
+                ydl.download([url])
+        else:
+            def run_pass(last):
+                if segments > 1:
+                    segmented.prefetch(ydl, info, segments)
+                ydl.process_ie_result(info if last else _copy_info(info), download=True)
+
+        # Errors yt-dlp only reports (ignoreerrors) count as a failed pass too
+        failed = False
+        try:
+            if resume:
+                print(f"Attempting to resume video download in {video_format} format...")
+            else:
+                print(f"Downloading video in {video_format} format...")
+            if infocache.download(ydl, url, lambda ydl, url: run_pass(last=False)):
+                failed = True
+                print("Error downloading video")
+                if reporter:
+                    reporter.error(url, "yt-dlp reported an error downloading the video")
+            else:
+                print(f"Video downloaded to {destination}")
+        except Exception as e:
+            failed = True
+            print(f"Error downloading video: {e}")
+            if reporter:
+                reporter.error(url, e)
+        finally:
+            if reporter:
+                reporter.forget(url)
+
+        # Switch the same session over to audio extraction
+        ydl.format_selector = ydl.build_format_selector('bestaudio/best')
+        ydl.add_post_processor(FFmpegExtractAudioPP(ydl, preferredcodec=audio_format, preferredquality='192'), when='post_process')
+        try:
+            if resume:
+                print(f"Attempting to resume audio download in {audio_format} format...")
+            else:
+                print(f"Downloading audio in {audio_format} format...")
+            if infocache.download(ydl, url, lambda ydl, url: run_pass(last=True)):
+                failed = True
+                print("Error downloading audio")
+                if reporter:
+                    reporter.error(url, "yt-dlp reported an error downloading the audio")
+            else:
+                print(f"Audio downloaded to {destination}")
+        except Exception as e:
+            failed = True
+            print(f"Error downloading audio: {e}")
+            if reporter:
+                reporter.error(url, e)
+        finally:
+            if reporter:
+                reporter.forget(url)
+
+    # Only media that got both passes counts as downloaded, a re-run does the missing pass
+    if pending is not None:
+        if failed:
+            pending.rollback()
+        else:
+            pending.commit()
+
+def download_media(video_url=None, audio_url=None, video_format='mp4', audio_format='mp3', output_path=None, resume=False, extra_args=None, archive=None, reporter=None, segments=1):
     #It download video similar to yt-dlp but keep it super duper simple
+    import yt_dlp
+    import segmented
     # Default yt-dlp options
     ydl_opts = {
         'quiet': False,
@@ -117,16 +339,26 @@ def download_media(video_url=None, audio_url=None, video_format='mp4', audio_for
         extra_opts = parse_yt_dlp_args(extra_args)
         ydl_opts.update(extra_opts)
 
+    # yt-dlp skips archived ids before extracting and records finished ones
+    if archive is not None:
+        ydl_opts['download_archive'] = archive
+    if reporter:
+        reporter.attach(ydl_opts)
+    if segments > 1:
+        ydl_opts['concurrent_fragment_downloads'] = segments
+
+    # Same URL for both outputs, extract it once and run both passes on one session
+    if video_url and audio_url and video_url == audio_url:
+        if 'format' not in ydl_opts:
+            ydl_opts['format'] = video_format_selector(video_format)
+        download_video_and_audio(video_url, ydl_opts, video_format, audio_format, output_path, resume, archive, reporter, segments)
+        return
+
     # Handle video download
     if video_url:
         # Customize video format selection (don't override if format already specified in extra_args)
         if 'format' not in ydl_opts:
-            if video_format == 'mp4':
-                ydl_opts['format'] = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]'
-            elif video_format == 'webm':
-                ydl_opts['format'] = 'bestvideo[ext=webm]+bestaudio[ext=webm]/best[ext=webm]'
-            else:
-                ydl_opts['format'] = 'best'
+            ydl_opts['format'] = video_format_selector(video_format)
 
         # Download video
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
@@ -135,10 +367,20 @@ def download_media(video_url=None, audio_url=None, video_format='mp4', audio_for
                     print(f"Attempting to resume video download in {video_format} format...")
                 else:
                     print(f"Downloading video in {video_format} format...")
-                ydl.download([video_url])
-                print(f"Video downloaded to {'current directory' if not output_path else output_path}")
+                retcode = segmented.download(ydl, video_url, segments)
+                if retcode != 0:
+                    print("Error downloading video")
+                    if reporter:
+                        reporter.error(video_url, f"yt-dlp returned error code: {retcode}")
+                else:
+                    print(f"Video downloaded to {'current directory' if not output_path else output_path}")
             except Exception as e:
                 print(f"Error downloading video: {e}")
+                if reporter:
+                    reporter.error(video_url, e)
+            finally:
+                if reporter:
+                    reporter.forget(video_url)
 
     # Handle audio download
     if audio_url:
@@ -169,13 +411,25 @@ def download_media(video_url=None, audio_url=None, video_format='mp4', audio_for
                     print(f"Attempting to resume audio download in {audio_format} format...")
                 else:
                     print(f"Downloading audio in {audio_format} format...")
-                ydl.download([audio_url])
-                print(f"Audio downloaded to {'current directory' if not output_path else output_path}")
+                retcode = segmented.download(ydl, audio_url, segments)
+                if retcode != 0:
+                    print("Error downloading audio")
+                    if reporter:
+                        reporter.error(audio_url, f"yt-dlp returned error code: {retcode}")
+                else:
+                    print(f"Audio downloaded to {'current directory' if not output_path else output_path}")
             except Exception as e:
                 print(f"Error downloading audio: {e}")
+                if reporter:
+                    reporter.error(audio_url, e)
+            finally:
+                if reporter:
+                    reporter.forget(audio_url)
 
-def list_formats(url, extra_args=None):
+def list_formats(url, extra_args=None, reporter=None):
     """List available formats for a given URL"""
+    import yt_dlp
+    import infocache
     try:
         options = {'quiet': True}
         
@@ -185,33 +439,442 @@ def list_formats(url, extra_args=None):
             options.update(extra_opts)
             
         with yt_dlp.YoutubeDL(options) as ydl:
-            info = ydl.extract_info(url, download=False)
+            # Format selection runs locally on the cached extraction
+            info = ydl.process_ie_result(infocache.extract_info(ydl, url), download=False)
             formats = info.get('formats', [])
+            if reporter:
+                for fmt in formats:
+                    reporter.emit(reporter.format_record(fmt))
+                return info
             print("Available formats:")
             for fmt in formats:
                 print(f"ID: {fmt['format_id']} | Ext: {fmt['ext']} | Resolution: {fmt.get('resolution', 'N/A')} | Note: {fmt.get('format_note', '')}")
             return info
     except Exception as e:
         print(f"Error listing formats: {e}")
+        if reporter:
+            reporter.error(url, e, record_type='format')
         sys.exit(1)
 
-def direct_yt_dlp_download(urls, extra_args=None):
+def direct_yt_dlp_download(urls, extra_args=None, archive=None, reporter=None, segments=1):
     """Use yt-dlp library with user arguments directly"""
+    import yt_dlp
+    import segmented
     print("Using direct yt-dlp library download...")
     
     # Parse command-line arguments to yt-dlp options
     ydl_opts = {}
     if extra_args:
         ydl_opts = parse_yt_dlp_args(extra_args)
+    if archive is not None:
+        ydl_opts['download_archive'] = archive
+    if reporter:
+        reporter.attach(ydl_opts)
+    if segments > 1:
+        ydl_opts['concurrent_fragment_downloads'] = segments
     
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download(urls)
-        return True
+            if isinstance(urls, list) and not reporter and segments <= 1:
+                ydl.download(urls)
+                return True
+            # Streamed batch, each URL is dispatched as soon as it is read
+            # and one bad line must not stop the rest of the queue.
+            # JSON output goes the same way so every error record names its URL
+            ok = True
+            for url in urls:
+                try:
+                    retcode = segmented.download(ydl, url, segments)
+                    if retcode != 0:
+                        ok = False
+                        if reporter:
+                            reporter.error(url, f"yt-dlp returned error code: {retcode}")
+                except Exception as e:
+                    print(f"Error downloading {url}: {e}")
+                    if reporter:
+                        reporter.error(url, e)
+                    ok = False
+                finally:
+                    if reporter:
+                        reporter.forget(url)
+            return ok
     except Exception as e:
         print(f"Error using yt-dlp library: {e}")
+        if reporter:
+            reporter.error(None, e)
         return False
 
+def read_batch_file(path):
+    """Yield URLs from a batch file, or from stdin when path is '-', one line at a time"""
+    stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        # Iterating the stream reads lazily, so huge queue files or a slow pipe
+        # never have to be loaded before the first download starts
+        for line in stream:
+            url = line.strip()
+            # Same comment markers yt-dlp accepts in its own batch files
+            if not url or url.startswith(('#', ';', ']')):
+                continue
+            yield url
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+class BatchProgress:
+    """Aggregated single-line progress for parallel downloads"""
+    def __init__(self, total=None):
+        self.total = total
+        self.lock = threading.Lock()
+        self.done = 0
+        self.failed = 0
+        self.active = {}  # url -> (downloaded_bytes, speed)
+        self.finished_bytes = 0
+        self.last_render = 0
+
+    def hook(self, url):
+        # Progress hook bound to one URL, yt-dlp calls it from the worker thread
+        def progress_hook(d):
+            if d.get('status') == 'downloading':
+                with self.lock:
+                    self.active[url] = (d.get('downloaded_bytes') or 0, d.get('speed') or 0)
+                self.render()
+        return progress_hook
+
+    def start(self, url):
+        with self.lock:
+            self.active[url] = (0, 0)
+        self.render(force=True)
+
+    def finish(self, url, ok):
+        with self.lock:
+            downloaded, _ = self.active.pop(url, (0, 0))
+            self.finished_bytes += downloaded
+            self.done += 1
+            if not ok:
+                self.failed += 1
+        self.render(force=True)
+
+    def render(self, force=False):
+        # Redraw at most 10 times a second unless something started or finished
+        now = time.time()
+        with self.lock:
+            if not force and now - self.last_render < 0.1:
+                return
+            self.last_render = now
+            downloaded = self.finished_bytes + sum(b for b, _ in self.active.values())
+            speed = sum(s for _, s in self.active.values())
+            total = self.total if self.total is not None else '?'
+            line = (f"[{self.done}/{total} done | {len(self.active)} active | {self.failed} failed] "
+                    f"{downloaded / 1024 / 1024:.1f} MB at {speed / 1024 / 1024:.2f} MB/s")
+        sys.stderr.write('\r' + line.ljust(79))
+        sys.stderr.flush()
+
+    def close(self):
+        sys.stderr.write('\n')
+        sys.stderr.flush()
+
+def _download_one(url, ydl_opts, progress, segments=1):
+    # Download a single URL with its own YoutubeDL so workers never share state
+    import yt_dlp
+    import segmented
+    opts = dict(ydl_opts)
+    opts['progress_hooks'] = list(opts.get('progress_hooks', [])) + [progress.hook(url)]
+    progress.start(url)
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            retcode = segmented.download(ydl, url, segments)
+        error = None if retcode == 0 else f"yt-dlp returned error code: {retcode}"
+    except Exception as e:
+        retcode = 1
+        error = str(e)
+    progress.finish(url, retcode == 0)
+    return retcode, error
+
+def parallel_yt_dlp_download(urls, extra_args=None, jobs=1, archive=None, reporter=None, segments=1):
+    """Download URLs across a bounded thread pool, returns {url: (exit_code, error)} for failures"""
+    from concurrent.futures import ThreadPoolExecutor
+    print(f"Using parallel yt-dlp download with {jobs} workers...")
+
+    ydl_opts = {}
+    if extra_args:
+        ydl_opts = parse_yt_dlp_args(extra_args)
+    # Per-file yt-dlp output would garble the shared progress line
+    ydl_opts.setdefault('quiet', True)
+    ydl_opts['noprogress'] = True
+    # Every worker shares the same archive object, it is thread safe
+    if archive is not None:
+        ydl_opts['download_archive'] = archive
+    if reporter:
+        reporter.attach(ydl_opts)
+    if segments > 1:
+        ydl_opts['concurrent_fragment_downloads'] = segments
+
+    progress = BatchProgress(len(urls) if hasattr(urls, '__len__') else None)
+    # Only failures are kept, successful URLs would grow without bound on streamed batches
+    failed = {}
+    # Never queue more than a couple of URLs per worker so huge lists stay cheap
+    slots = threading.BoundedSemaphore(jobs * 2)
+
+    def on_done(url, future):
+        retcode, error = future.result()
+        if retcode != 0:
+            failed[url] = (retcode, error)
+            if reporter:
+                reporter.error(url, error)
+        if reporter:
+            reporter.forget(url)
+        slots.release()
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for url in urls:
+            slots.acquire()
+            future = pool.submit(_download_one, url, ydl_opts, progress, segments)
+            future.add_done_callback(lambda f, url=url: on_done(url, f))
+    progress.close()
+
+    print(f"Finished {progress.done} downloads: {progress.done - progress.failed} succeeded, {progress.failed} failed")
+    for url, (retcode, error) in failed.items():
+        print(f"  [exit {retcode}] {url}: {error}")
+    return failed
+
+class JobQueue:
+    """Jobs submitted to a --serve process, run on a fixed worker pool with a warm yt-dlp"""
+    # Finished jobs kept around for status queries, oldest are dropped first
+    MAX_FINISHED_JOBS = 1000
+
+    def __init__(self, workers=1, base_opts=None, archive=None, download_root=None):
+        import yt_dlp
+        from concurrent.futures import ThreadPoolExecutor
+        self.yt_dlp = yt_dlp
+        # Jobs can only write below this folder, whatever output they ask for
+        self.download_root = os.path.realpath(download_root or os.getcwd())
+        # Creating one YoutubeDL loads every extractor class, later jobs only pay for the download itself
+        yt_dlp.YoutubeDL({'quiet': True})
+        self.base_opts = dict(base_opts or {})
+        self.base_opts['quiet'] = True
+        self.base_opts['noprogress'] = True
+        if archive is not None:
+            self.base_opts['download_archive'] = archive
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.jobs = collections.OrderedDict()
+        self.ids = itertools.count(1)
+        # Set by shutdown(), running downloads stop at their next progress update
+        self.stopping = threading.Event()
+
+    def resolve_output(self, output):
+        """Absolute folder for a job's output, relative ones are taken from the download root.
+        None if it is outside the download root"""
+        path = os.path.realpath(os.path.join(self.download_root, os.path.expanduser(output or '')))
+        try:
+            inside = os.path.commonpath([path, self.download_root]) == self.download_root
+        except ValueError:
+            inside = False  # Another drive
+        return path if inside else None
+
+    def submit(self, url, format=None, output=None):
+        with self.lock:
+            job_id = str(next(self.ids))
+            self.jobs[job_id] = {
+                'id': job_id,
+                'url': url,
+                'format': format,
+                'output': output,
+                'status': 'queued',
+                'downloaded_bytes': 0,
+                'total_bytes': None,
+                'speed': None,
+                'eta': None,
+                'path': None,
+                'error': None,
+                'created': time.time(),
+                'started': None,
+                'finished': None,
+            }
+            self._prune()
+        self.pool.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self):
+        with self.lock:
+            return [dict(job) for job in self.jobs.values()]
+
+    def _update(self, job_id, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def _prune(self):
+        # Caller must hold self.lock
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in ('finished', 'error', 'cancelled')]
+        for job_id in finished[:max(0, len(finished) - self.MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _run(self, job_id):
+        job = self.get(job_id)
+        if self.stopping.is_set():
+            self._update(job_id, status='cancelled', finished=time.time())
+            return
+        self._update(job_id, status='running', started=time.time())
+
+        def progress_hook(d):
+            if self.stopping.is_set():
+                raise self.yt_dlp.utils.DownloadCancelled("Server is shutting down")
+            if d.get('status') == 'downloading':
+                self._update(job_id,
+                             downloaded_bytes=d.get('downloaded_bytes') or 0,
+                             total_bytes=d.get('total_bytes') or d.get('total_bytes_estimate'),
+                             speed=d.get('speed'),
+                             eta=d.get('eta'))
+            elif d.get('status') == 'finished':
+                size = d.get('total_bytes') or d.get('downloaded_bytes') or 0
+                self._update(job_id, downloaded_bytes=size, total_bytes=size, eta=0)
+
+        def postprocessor_hook(d):
+            if d.get('status') == 'finished' and d.get('postprocessor') == 'MoveFilesAfterDownload':
+                self._update(job_id, path=d.get('info_dict', {}).get('filepath'))
+
+        opts = dict(self.base_opts)
+        opts['progress_hooks'] = list(opts.get('progress_hooks', [])) + [progress_hook]
+        opts['postprocessor_hooks'] = list(opts.get('postprocessor_hooks', [])) + [postprocessor_hook]
+        if job['format']:
+            opts['format'] = job['format']
+        opts['outtmpl'] = os.path.join(job['output'] or self.download_root, '%(title)s.%(ext)s')
+        try:
+            with self.yt_dlp.YoutubeDL(opts) as ydl:
+                retcode = ydl.download([job['url']])
+            if self.stopping.is_set():
+                self._update(job_id, status='cancelled', finished=time.time())
+            elif retcode == 0:
+                self._update(job_id, status='finished', finished=time.time())
+            else:
+                self._update(job_id, status='error', error=f"yt-dlp returned error code: {retcode}", finished=time.time())
+        except Exception as e:
+            if self.stopping.is_set():
+                self._update(job_id, status='cancelled', finished=time.time())
+            else:
+                self._update(job_id, status='error', error=str(e), finished=time.time())
+
+    def shutdown(self):
+        # Queued jobs are dropped, running ones are stopped and waited for so no download is left half written
+        self.stopping.set()
+        try:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+        except TypeError:
+            # Python < 3.9, the queued jobs still start but return right away
+            self.pool.shutdown(wait=True)
+        with self.lock:
+            for job in self.jobs.values():
+                if job['status'] == 'queued':
+                    job.update(status='cancelled', finished=time.time())
+
+# HTTP server of --serve on 127.0.0.1:port, port 0 picks a free one.
+# POST /jobs {"url", "format", "output"} -> {"id"}, GET /jobs and GET /jobs/<id> -> job status
+def job_server(job_queue, port=8765):
+    # Only --serve needs these, the other commands start without them
+    import socketserver
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class JobRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        # Binding to loopback is not enough, a web page can still send requests to 127.0.0.1. The browser
+        # marks them with a foreign Origin, and through DNS rebinding with a foreign Host
+        def _allowed(self):
+            port = self.server.server_address[1]
+            local = (f"127.0.0.1:{port}", f"localhost:{port}")
+            if self.headers.get('Host') not in local:
+                self._send_json(403, {'error': 'forbidden host'})
+                return False
+            origin = self.headers.get('Origin')
+            if origin is not None and origin not in tuple(f"http://{host}" for host in local):
+                self._send_json(403, {'error': 'forbidden origin'})
+                return False
+            return True
+
+        def do_GET(self):
+            if not self._allowed():
+                return
+            parts = [part for part in self.path.split('?')[0].split('/') if part]
+            if parts == ['jobs']:
+                self._send_json(200, self.server.job_queue.list())
+            elif len(parts) == 2 and parts[0] == 'jobs':
+                job = self.server.job_queue.get(parts[1])
+                if job:
+                    self._send_json(200, job)
+                else:
+                    self._send_json(404, {'error': 'unknown job id'})
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if not self._allowed():
+                return
+            if self.path.split('?')[0].rstrip('/') != '/jobs':
+                self._send_json(404, {'error': 'not found'})
+                return
+            # A page can only send JSON after a CORS preflight, which this server never answers
+            content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+            if content_type != 'application/json':
+                self._send_json(415, {'error': 'Content-Type must be application/json'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                spec = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+            except ValueError:
+                self._send_json(400, {'error': 'body must be a JSON object'})
+                return
+            if not isinstance(spec, dict) or not spec.get('url'):
+                self._send_json(400, {'error': "'url' is required"})
+                return
+            output = None
+            if spec.get('output'):
+                output = self.server.job_queue.resolve_output(spec['output'])
+                if output is None:
+                    self._send_json(400, {'error': "'output' must be inside the download folder of the server"})
+                    return
+            job_id = self.server.job_queue.submit(spec['url'], spec.get('format'), output)
+            self._send_json(201, {'id': job_id})
+
+        def log_message(self, format, *args):
+            # Keep the request log on stderr quiet, job status is available over the API
+            pass
+
+    class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+    # Only bind to loopback, anyone who can reach the port can make this machine download files
+    server = ThreadingHTTPServer(('127.0.0.1', port), JobRequestHandler)
+    server.job_queue = job_queue
+    return server
+
+def serve(port=8765, extra_args=None, jobs=1, archive=None, download_root=None):
+    """Keep a warm process that runs download jobs posted to a localhost HTTP endpoint"""
+    ydl_opts = {}
+    if extra_args:
+        ydl_opts = parse_yt_dlp_args(extra_args)
+    print("Loading yt-dlp...")
+    job_queue = JobQueue(jobs, ydl_opts, archive, download_root)
+    server = job_server(job_queue, port)
+    print(f"Serving download jobs on http://127.0.0.1:{port}/jobs with {jobs} workers into {job_queue.download_root}, press Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping server...")
+    finally:
+        server.server_close()
+        job_queue.shutdown()
+
 def main():
     # Create parser to handle the special cases
     parser = argparse.ArgumentParser(
@@ -229,10 +892,23 @@ def main():
             "  python yt-dlitec.py --list-formats <URL>      # List available formats\n"
             "  python yt-dlitec.py --resume --video <URL>    # Resume interrupted video download\n"
             "  python yt-dlitec.py --no-playlist --video <URL> # Skip playlist, download single video\n"
-            "  python yt-dlitec.py <URL>                     # Pass directly to yt-dlp\n\n"
+            "  python yt-dlitec.py <URL>                     # Pass directly to yt-dlp\n"
+            "  python yt-dlitec.py --jobs 4 <URL> <URL> ...  # Download several URLs in parallel\n"
+            "  python yt-dlitec.py --batch-file urls.txt     # Download URLs listed in a file, one per line\n"
+            "  cat urls.txt | python yt-dlitec.py --batch-file -   # Read URLs from stdin\n"
+            "  python yt-dlitec.py --download-archive archive.txt --batch-file urls.txt  # Skip already downloaded media\n"
+            "  python yt-dlitec.py --ndjson --list-formats <URL>  # One JSON record per format\n"
+            "  python yt-dlitec.py --serve --jobs 4          # Run a local job server on port 8765\n"
+            "  python yt-dlitec.py --segments 8 <URL>        # Fetch each file over 8 connections\n\n"
             "Notes:\n"
             "  '--list-formats' requires a valid URL.\n"
             "  '--resume' will attempt to continue partially downloaded files.\n"
+            "  '--jobs N' runs direct URL downloads on N workers, default is one after another.\n"
+            "  '--batch-file' starts downloading as soon as each line is read, lines starting with # are skipped.\n"
+            "  '--download-archive' records finished downloads and skips them on later runs without re-extracting.\n"
+            "  '--json' and '--ndjson' print records on stdout, human readable messages move to stderr.\n"
+            "  '--segments N' splits direct media files into byte ranges fetched in parallel, interrupted ranges resume.\n"
+            "  '--serve' accepts POST /jobs with {\"url\", \"format\", \"output\"}, poll GET /jobs/<id> for progress.\n"
             "  Supported formats include: mp4, webm, mp3, m4a, and more.\n"
             "   GUI version consider using yt-dlite.py.\n"
             "  Any yt-dlp options like --no-playlist and other similar are supported and passed through."
@@ -248,6 +924,15 @@ def main():
     parser.add_argument('--output', help='Specify custom output directory')
     parser.add_argument('--list-formats', help='List available formats from given URL')
     parser.add_argument('--resume', action='store_true', help='Resume partially downloaded files')
+    parser.add_argument('--batch-file', help="File with URLs to download, one per line ('-' for stdin)")
+    parser.add_argument('--download-archive', help='Archive file of finished downloads, already archived media is skipped')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of URLs to download in parallel (default: 1)')
+    parser.add_argument('--segments', type=int, default=1, help='Connections per file for direct media URLs (default: 1)')
+    parser.add_argument('--serve', action='store_true', help='Keep running and accept download jobs on a localhost HTTP endpoint')
+    parser.add_argument('--port', type=int, default=8765, help='Port for --serve (default: 8765)')
+    output_mode = parser.add_mutually_exclusive_group()
+    output_mode.add_argument('--json', action='store_true', help='Print formats or download results as one JSON array')
+    output_mode.add_argument('--ndjson', action='store_true', help='Stream formats or download results as one JSON object per line')
     parser.add_argument('--help', action='store_true', help='Show this help message')
     parser.add_argument('urls', nargs='*', help='URLs to download')
 
@@ -258,14 +943,37 @@ def main():
     if args.help and not unknown:
         parser.print_help()
         sys.exit(0)
-        
+
+    # Records own stdout in json modes, every other message goes to stderr
+    reporter = None
+    if args.json or args.ndjson:
+        reporter = ResultReporter('json' if args.json else 'ndjson', sys.stdout)
+        sys.stdout = sys.stderr
+    try:
+        run(parser, args, unknown, reporter)
+    finally:
+        if reporter:
+            reporter.close()
+
+def run(parser, args, unknown, reporter=None):
     # Handle --list-formats
     if args.list_formats:
-        list_formats(args.list_formats, unknown)
-        sys.exit(0)
+        list_formats(args.list_formats, unknown, reporter)
+        return
+
+    # Collect all arguments for passing to yt-dlp options, except the ones meant for yt-dlitec alone
+    all_args = strip_cli_options(sys.argv[1:])
 
-    # Collect all arguments for passing to yt-dlp options
-    all_args = sys.argv[1:]
+    # Shared download archive, consulted before any URL is extracted
+    archive = None
+    if args.download_archive:
+        from archive import open_archive
+        archive = open_archive(args.download_archive)
+
+    # Daemon mode, remaining yt-dlp options become the defaults for every job
+    if args.serve:
+        serve(args.port, unknown, max(1, args.jobs), archive, args.output)
+        return
     
     # Handle special cases with --video or --audio flags
     if args.video or args.audio:
@@ -288,10 +996,13 @@ def main():
             audio_format=audio_format,
             output_path=args.output,
             resume=args.resume,
-            extra_args=all_args  # Pass all arguments to apply global options
+            extra_args=all_args,  # Pass all arguments to apply global options
+            archive=archive,
+            reporter=reporter,
+            segments=args.segments
         )
     # If URLs are provided directly or with unknown args, use yt-dlp library directly
-    elif args.urls or unknown:
+    elif args.urls or unknown or args.batch_file:
         # Collect all URLs
         urls = args.urls
         
@@ -299,9 +1010,18 @@ def main():
         # (simple URL detection - just looking for strings not starting with '-')
         url_args = [arg for arg in unknown if not arg.startswith('-')]
         urls.extend(url_args)
+
+        # Batch file URLs are streamed after the ones given on the command line
+        if args.batch_file:
+            urls = itertools.chain(urls, read_batch_file(args.batch_file))
         
-        if urls:
-            direct_yt_dlp_download(urls, all_args)
+        if args.batch_file or urls:
+            if args.jobs > 1:
+                failed = parallel_yt_dlp_download(urls, all_args, args.jobs, archive, reporter, args.segments)
+                if failed:
+                    sys.exit(1)
+            else:
+                direct_yt_dlp_download(urls, all_args, archive, reporter, args.segments)
         else:
             print("No URLs provided. Pass a URL to download or use --help to see available options.")
             sys.exit(1)